@@ -0,0 +1 @@
+"""效能測試工具，不會被機器人載入，需另外以 `python -m benchmark.<模組名稱>` 執行"""
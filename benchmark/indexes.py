@@ -0,0 +1,194 @@
+"""排程時間欄位索引的查詢效能測試
+
+在暫存的 SQLite 資料庫建立 N 位模擬使用者 (排程時間分散在未來 24 小時內，只有少數已到期；
+最後使用時間以指數分布模擬，只有少數過期)，分別在沒有索引與有索引時執行排程與刪除過期使用者的查詢，
+輸出每個查詢的執行時間中位數與 SQLite 的查詢計畫
+
+Example:
+    python -m benchmark.indexes --users 100000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from database import (
+    Base,
+    GenshinScheduleNotes,
+    ScheduleDailyCheckin,
+    StarrailScheduleNotes,
+    User,
+    ZZZScheduleNotes,
+)
+from genshin_py.auto_task import DailyReward
+from genshin_py.auto_task.realtime_notes.schedule_queue import NotesScheduleQueue
+
+NOTES_TABLES = (GenshinScheduleNotes, StarrailScheduleNotes, ZZZScheduleNotes)
+
+INDEXES: dict[str, tuple[str, str]] = {
+    "ix_schedule_daily_checkin_next_checkin_time": ("schedule_daily_checkin", "next_checkin_time"),
+    "ix_schedule_daily_checkin_checkin_slot_time": ("schedule_daily_checkin", "checkin_slot_time"),
+    "ix_genshin_schedule_notes_next_check_time": ("genshin_schedule_notes", "next_check_time"),
+    "ix_starrail_schedule_notes_next_check_time": ("starrail_schedule_notes", "next_check_time"),
+    "ix_zzz_schedule_notes_next_check_time": ("zzz_schedule_notes", "next_check_time"),
+    "ix_users_last_used_time": ("users", "last_used_time"),
+}
+"""dict[索引名稱, (資料表, 欄位)]：測試前後刪除與建立的索引"""
+
+EXPIRED_DAYS = 180
+
+
+async def seed(engine: AsyncEngine, num_users: int) -> None:
+    """建立資料表並寫入 num_users 位模擬使用者"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    now = datetime.now()
+
+    def schedule_time() -> datetime:
+        # 約 1% 的使用者已到期，其餘分散在未來 24 小時
+        if random.random() < 0.01:
+            return now - timedelta(minutes=random.uniform(0, 10))
+        return now + timedelta(minutes=random.uniform(0, 24 * 60))
+
+    users, checkins, notes = [], [], []
+    for i in range(num_users):
+        discord_id = 10**17 + i
+        users.append(
+            {
+                "discord_id": discord_id,
+                "cookie_default": f"ltuid_v2={i + 1}; ltoken_v2=fake",
+                "last_used_time": now - timedelta(days=random.expovariate(1 / 30)),
+            }
+        )
+        checkins.append(
+            {
+                "discord_id": discord_id,
+                "discord_channel_id": 10**18 + i,
+                "is_mention": False,
+                "next_checkin_time": schedule_time(),
+                "has_genshin": True,
+                "has_honkai3rd": False,
+                "has_starrail": False,
+                "has_themis": False,
+                "has_themis_tw": False,
+                "has_zzz": False,
+            }
+        )
+        notes.append(
+            {
+                "discord_id": discord_id,
+                "discord_channel_id": 10**18 + i,
+                "next_check_time": schedule_time(),
+            }
+        )
+
+    async with engine.begin() as conn:
+        await conn.execute(sqlalchemy.insert(User), users)
+        await conn.execute(sqlalchemy.insert(ScheduleDailyCheckin), checkins)
+        for table in NOTES_TABLES:
+            await conn.execute(sqlalchemy.insert(table), notes)
+
+
+def queries(now: datetime) -> dict[str, sqlalchemy.Select | sqlalchemy.CompoundSelect]:
+    """排程與刪除過期使用者實際使用的查詢"""
+    result: dict[str, sqlalchemy.Select | sqlalchemy.CompoundSelect] = {
+        # DailyReward._produce_due_users 每次排程查詢一次的到期使用者 ID
+        "daily_checkin_due": DailyReward._due_ids_stmt(False, now),
+        # Tool.remove_expired_user
+        "expired_users": sqlalchemy.select(User).where(
+            User.last_used_time <= now - timedelta(days=EXPIRED_DAYS + 1)
+        ),
+    }
+    for table in NOTES_TABLES:
+        # NotesScheduleQueue.load
+        result[f"{table.__tablename__}_load"] = NotesScheduleQueue._load_stmt(table)
+        # 以索引範圍查詢到期的使用者
+        result[f"{table.__tablename__}_due"] = sqlalchemy.select(table.discord_id).where(
+            table.next_check_time < now
+        )
+    return result
+
+
+async def measure(engine: AsyncEngine, repeat: int) -> dict[str, tuple[float, int, str]]:
+    """執行每個查詢 repeat 次
+
+    Returns
+    ------
+    `dict[str, tuple[float, int, str]]`:
+        dict[查詢名稱, (執行時間中位數 (毫秒), 結果數量, 查詢計畫)]
+    """
+    result: dict[str, tuple[float, int, str]] = {}
+    async with engine.connect() as conn:
+        for name, stmt in queries(datetime.now()).items():
+            sql = str(stmt.compile(engine.sync_engine, compile_kwargs={"literal_binds": True}))
+            plan_rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")).all()
+            plan = "; ".join(str(row[-1]) for row in plan_rows)
+            times: list[float] = []
+            count = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                count = len((await conn.execute(stmt)).all())
+                times.append(time.perf_counter() - start)
+            result[name] = (statistics.median(times) * 1000, count, plan)
+    return result
+
+
+async def set_indexes(engine: AsyncEngine, enabled: bool) -> None:
+    async with engine.begin() as conn:
+        for index, (table, column) in INDEXES.items():
+            if enabled:
+                sql = f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({column})"
+                await conn.exec_driver_sql(sql)
+            else:
+                await conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+        await conn.exec_driver_sql("ANALYZE")
+
+
+async def run(num_users: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmpdir) / 'benchmark.db'}")
+        try:
+            await seed(engine, num_users)
+            await set_indexes(engine, False)
+            before = await measure(engine, repeat)
+            await set_indexes(engine, True)
+            after = await measure(engine, repeat)
+        finally:
+            await engine.dispose()
+
+    print(f"[indexes] users={num_users} repeat={repeat}", flush=True)
+    for name, (before_ms, count, before_plan) in before.items():
+        after_ms, _, after_plan = after[name]
+        speedup = before_ms / after_ms if after_ms > 0 else float("inf")
+        print(
+            f"  {name}: rows={count} before={before_ms:.2f}ms after={after_ms:.2f}ms "
+            + f"({speedup:.1f}x)\n"
+            + f"    before plan: {before_plan}\n"
+            + f"    after plan:  {after_plan}",
+            flush=True,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="排程時間欄位索引的查詢效能測試")
+    parser.add_argument("--users", type=int, nargs="+", default=[100000])
+    parser.add_argument("--repeat", type=int, default=20, help="每個查詢的執行次數")
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    for num_users in args.users:
+        asyncio.run(run(num_users, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
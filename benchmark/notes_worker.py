@@ -0,0 +1,91 @@
+"""遠端即時便箋 API 的本地替代服務，用來測試 `config.realtime_notes_api_list`
+
+實作 `RemoteNotes` 使用的協定：
+- `GET /`：回傳 HTTP 200 表示正常
+- `POST /realtime-notes`：傳入 `{discord_id, game, uid, cookie}`，
+  成功時回傳 `{"notes": 原始資料}`，Hoyolab 回傳錯誤時回傳 `{"retcode": 錯誤碼, "message": 訊息}`
+
+加上 `--fake` 時以 benchmark.scheduler 的假 Hoyolab 回應，不會真的向 Hoyolab 請求；
+`--fail-rate` 可模擬服務本身故障，測試機器人暫停使用與重新測試遠端 API 的行為
+
+Example:
+    python -m benchmark.notes_worker --port 8090 --fake --latency 0.05
+    REALTIME_NOTES_API_LIST='["http://127.0.0.1:8090"]' python main.py
+"""
+
+import argparse
+import random
+from typing import Any
+
+import genshin
+from aiohttp import web
+
+
+class _CaptureClient(genshin.Client):
+    """記錄最後一次 API 回應原始資料的 Client，讓回傳給機器人的是未經 genshin.py 轉換的資料"""
+
+    last_data: dict[str, Any] | None = None
+
+    async def request(self, *args: Any, **kwargs: Any) -> Any:
+        data = await super().request(*args, **kwargs)
+        self.last_data = data
+        return data
+
+
+async def _get_raw_notes(game: genshin.Game, uid: int, cookie: str) -> dict[str, Any] | None:
+    region = genshin.utility.recognize_region(uid, game) or genshin.Region.OVERSEAS
+    client = _CaptureClient(cookie, game=game, uid=uid, region=region)
+    match game:
+        case genshin.Game.STARRAIL:
+            await client.get_starrail_notes(uid)
+        case genshin.Game.ZZZ:
+            await client.get_zzz_notes(uid)
+        case _:
+            await client.get_genshin_notes(uid)
+    return client.last_data
+
+
+def create_app(fail_rate: float = 0.0) -> web.Application:
+    routes = web.RouteTableDef()
+
+    @routes.get("/")
+    async def health(request: web.Request) -> web.Response:
+        return web.Response(text="OK")
+
+    @routes.post("/realtime-notes")
+    async def realtime_notes(request: web.Request) -> web.Response:
+        if random.random() < fail_rate:
+            return web.Response(status=503)
+        payload: dict[str, Any] = await request.json()
+        try:
+            raw = await _get_raw_notes(
+                genshin.Game(payload["game"]), int(payload["uid"]), payload["cookie"] or ""
+            )
+        except genshin.errors.GenshinException as e:
+            return web.json_response({"retcode": e.retcode, "message": e.original})
+        return web.json_response({"notes": raw})
+
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="遠端即時便箋 API 的本地替代服務")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fake", action="store_true", help="以假 Hoyolab 回應，不對外請求")
+    parser.add_argument("--latency", type=float, default=0.0, help="假 Hoyolab 平均延遲（單位：秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="假 Hoyolab 回傳錯誤的機率")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="服務本身回傳 HTTP 503 的機率")
+    args = parser.parse_args()
+
+    if args.fake:
+        from .scheduler import FakeHoyolab
+
+        genshin.Client.request = FakeHoyolab(args.latency, args.error_rate).request  # type: ignore
+    web.run_app(create_app(args.fail_rate), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""自動排程 (每日簽到、即時便箋) 的負載模擬測試
+
+在暫存的 SQLite 資料庫建立 N 位模擬使用者，將 genshin.Client 的 HTTP 請求替換成本地的假 Hoyolab
+(可設定延遲與錯誤率)，並以假的 Discord 頻道接收通知，完整執行一次排程後輸出：
+每秒處理人數、每位使用者處理時間的 p50/p99、資料庫執行時間、對外請求次數
+
+Example:
+    python -m benchmark.scheduler --users 1000 10000 100000 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import importlib
+import random
+import re
+import statistics
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import genshin
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from database import (
+    Base,
+    Database,
+    GenshinScheduleNotes,
+    ScheduleDailyCheckin,
+    StarrailScheduleNotes,
+    User,
+    ZZZScheduleNotes,
+)
+from genshin_py.auto_task import DailyReward, Outbox, RealtimeNotes
+from genshin_py.auto_task.realtime_notes.schedule_queue import NotesScheduleQueue
+from utility import config
+
+USERS_PER_CHANNEL = 20
+"""模擬時平均每個 Discord 頻道的使用者數量"""
+
+
+@dataclass
+class Stats:
+    """一次排程執行的統計資料"""
+
+    latencies: list[float] = field(default_factory=list)
+    """每位使用者的處理時間（單位：秒）"""
+    db_time: float = 0.0
+    """資料庫語句的累計執行時間（單位：秒）"""
+    db_statements: int = 0
+    """資料庫語句的執行次數"""
+    hoyolab_calls: Counter[str] = field(default_factory=Counter)
+    """對 Hoyolab 的請求次數 Counter[端點類型]"""
+    hoyolab_errors: int = 0
+    """假 Hoyolab 回傳錯誤的次數"""
+    discord_messages: int = 0
+    """實際呼叫 channel.send 的次數"""
+
+
+stats = Stats()
+
+
+# ================ 假 Hoyolab ================
+
+
+class FakeHoyolab:
+    """取代 `genshin.Client.request` 的假 Hoyolab，依網址回傳與官方 API 相同格式的資料"""
+
+    def __init__(self, latency: float, error_rate: float) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+
+    async def request(self, url: Any, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        url = str(url)
+        kind = self._kind(url)
+        stats.hoyolab_calls[kind] += 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        if random.random() < self.error_rate:
+            stats.hoyolab_errors += 1
+            # retcode -1 對應 genshin.errors.InternalDatabaseError，會觸發併發控制器的過載處理
+            genshin.errors.raise_for_retcode({"retcode": -1, "message": "fake overload"})
+        return self._response(kind)
+
+    @staticmethod
+    def _kind(url: str) -> str:
+        if "dailyNote" in url:
+            return "genshin_notes"
+        if "hkrpg" in url and "note" in url:
+            return "starrail_notes"
+        if "zzz" in url and "note" in url:
+            return "zzz_notes"
+        for kind in ("sign", "info", "home"):
+            if url.rstrip("/").endswith(kind):
+                return f"daily_{kind}"
+        return "other"
+
+    @staticmethod
+    def _response(kind: str) -> dict[str, Any]:
+        match kind:
+            case "genshin_notes":
+                resin = random.randint(0, 200)
+                return {
+                    "current_resin": resin,
+                    "max_resin": 200,
+                    "resin_recovery_time": str((200 - resin) * 480),
+                    "finished_task_num": 4,
+                    "total_task_num": 4,
+                    "is_extra_task_reward_received": True,
+                    "remain_resin_discount_num": 3,
+                    "resin_discount_num_limit": 3,
+                    "current_expedition_num": 0,
+                    "max_expedition_num": 5,
+                    "expeditions": [],
+                    "current_home_coin": 0,
+                    "max_home_coin": 2400,
+                    "home_coin_recovery_time": "0",
+                    "calendar_url": "",
+                    "transformer": {
+                        "obtained": False,
+                        "recovery_time": {
+                            "Day": 0,
+                            "Hour": 0,
+                            "Minute": 0,
+                            "Second": 0,
+                            "reached": True,
+                        },
+                    },
+                }
+            case "starrail_notes":
+                stamina = random.randint(0, 240)
+                return {
+                    "current_stamina": stamina,
+                    "max_stamina": 240,
+                    "stamina_recover_time": (240 - stamina) * 360,
+                    "accepted_epedition_num": 0,
+                    "total_expedition_num": 4,
+                    "expeditions": [],
+                    "current_train_score": 500,
+                    "max_train_score": 500,
+                    "current_rogue_score": 14000,
+                    "max_rogue_score": 14000,
+                    "weekly_cocoon_cnt": 0,
+                    "weekly_cocoon_limit": 3,
+                    "current_reserve_stamina": 0,
+                    "is_reserve_stamina_full": False,
+                }
+            case "zzz_notes":
+                battery = random.randint(0, 240)
+                return {
+                    "energy": {
+                        "progress": {"max": 240, "current": battery},
+                        "restore": (240 - battery) * 360,
+                    },
+                    "vitality": {"max": 400, "current": 400},
+                    "vhs_sale": {"sale_state": "SaleStateDone"},
+                    "card_sign": "CardSignDone",
+                }
+            case "daily_info":
+                return {
+                    "total_sign_day": date.today().day,
+                    "today": date.today().isoformat(),
+                    "is_sign": True,
+                    "first_bind": False,
+                    "is_sub": False,
+                    "region": "",
+                    "sign_cnt_missed": 0,
+                }
+            case "daily_home":
+                award = {"icon": "", "name": "Primogem", "cnt": 20}
+                return {"month": date.today().month, "awards": [award] * 31, "resign": False}
+            case _:
+                return {}
+
+
+# ================ 假 Discord ================
+
+
+class FakeMessage:
+    def __init__(self, content: str | None) -> None:
+        self.mention_everyone = False
+        self.mentions = [FakeUser(int(i)) for i in re.findall(r"<@(\d+)>", content or "")]
+
+
+class FakeChannel:
+    """只計算發送次數的假 Discord 頻道"""
+
+    def __init__(self, channel_id: int) -> None:
+        self.id = channel_id
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> FakeMessage:
+        stats.discord_messages += 1
+        return FakeMessage(content)
+
+
+class FakeUser:
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+
+class FakeBot:
+    """提供自動排程所需的 `get_channel`、`get_user` 的假 Discord 機器人"""
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        return FakeChannel(channel_id)
+
+    def get_user(self, user_id: int) -> FakeUser:
+        return FakeUser(user_id)
+
+    async def fetch_channel(self, channel_id: int) -> FakeChannel:
+        return FakeChannel(channel_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        return FakeUser(user_id)
+
+
+# ================ 資料庫 ================
+
+
+def use_database(path: Path) -> AsyncEngine:
+    """將 `Database` 的 engine 換成暫存的資料庫，並記錄每個語句的執行時間"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Database.engine = engine
+    Database.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._benchmark_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats.db_time += time.perf_counter() - context._benchmark_start
+        stats.db_statements += 1
+
+    return engine
+
+
+async def seed(engine: AsyncEngine, num_users: int) -> None:
+    """建立資料表並寫入 num_users 位所有排程都已到期的模擬使用者"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    past = datetime.now() - timedelta(minutes=1)
+    num_channels = max(1, num_users // USERS_PER_CHANNEL)
+    users, checkins, genshin_notes, starrail_notes, zzz_notes = [], [], [], [], []
+    for i in range(num_users):
+        discord_id = 10**17 + i
+        channel_id = 10**18 + i % num_channels
+        users.append(
+            {
+                "discord_id": discord_id,
+                "cookie_default": f"ltuid_v2={i + 1}; ltoken_v2=fake",
+                "uid_genshin": 800000000 + i,
+                "uid_starrail": 800000000 + i,
+                "uid_zzz": 1300000000 + i,
+                "last_used_time": datetime.now(),
+            }
+        )
+        checkins.append(
+            {
+                "discord_id": discord_id,
+                "discord_channel_id": channel_id,
+                "is_mention": False,
+                "next_checkin_time": past,
+                "has_genshin": True,
+                "has_honkai3rd": False,
+                "has_starrail": random.random() < 0.5,
+                "has_themis": False,
+                "has_themis_tw": False,
+                "has_zzz": random.random() < 0.3,
+            }
+        )
+        common = {
+            "discord_id": discord_id,
+            "discord_channel_id": channel_id,
+            "next_check_time": past,
+        }
+        genshin_notes.append({**common, "threshold_resin": 2})
+        starrail_notes.append({**common, "threshold_power": 2})
+        zzz_notes.append({**common, "threshold_battery": 2})
+
+    async with Database.sessionmaker() as session:
+        for table, rows in (
+            (User, users),
+            (ScheduleDailyCheckin, checkins),
+            (GenshinScheduleNotes, genshin_notes),
+            (StarrailScheduleNotes, starrail_notes),
+            (ZZZScheduleNotes, zzz_notes),
+        ):
+            await session.execute(sqlalchemy.insert(table), rows)
+        await session.commit()
+
+
+# ================ 計時 ================
+
+
+def _timed(func):
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            stats.latencies.append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def instrument() -> None:
+    """在每位使用者的處理函式外加上計時"""
+    DailyReward._claim_daily_reward = classmethod(  # type: ignore
+        _timed(DailyReward._claim_daily_reward.__func__)  # type: ignore
+    )
+    module = importlib.import_module("genshin_py.auto_task.realtime_notes.realtime_notes")
+    for name in ("check_genshin_notes", "check_starrail_notes", "check_zzz_notes"):
+        setattr(module, name, _timed(getattr(module, name)))
+
+
+# ================ 執行 ================
+
+
+def _percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if len(values) == 1 else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def report(task: str, num_users: int, elapsed: float) -> None:
+    latencies = stats.latencies
+    calls = ", ".join(f"{k}={v}" for k, v in sorted(stats.hoyolab_calls.items()))
+    print(
+        f"[{task}] users={num_users} processed={len(latencies)} time={elapsed:.2f}s "
+        + f"users/sec={len(latencies) / elapsed if elapsed > 0 else 0:.1f}\n"
+        + f"  latency p50={_percentile(latencies, 50) * 1000:.1f}ms "
+        + f"p99={_percentile(latencies, 99) * 1000:.1f}ms\n"
+        + f"  db time={stats.db_time:.2f}s statements={stats.db_statements}\n"
+        + f"  hoyolab calls={sum(stats.hoyolab_calls.values())} ({calls}) "
+        + f"errors={stats.hoyolab_errors}\n"
+        + f"  discord messages={stats.discord_messages}",
+        flush=True,
+    )
+
+
+async def run(num_users: int, tasks: list[str]) -> None:
+    global stats
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = use_database(Path(tmpdir) / "benchmark.db")
+        try:
+            await seed(engine, num_users)
+            bot: Any = FakeBot()
+            if "daily_reward" in tasks:
+                stats = Stats()
+                start = time.perf_counter()
+                await DailyReward.execute(bot)
+                await Outbox.execute(bot)
+                report("daily_reward", num_users, time.perf_counter() - start)
+            if "realtime_notes" in tasks:
+                NotesScheduleQueue._entries = {}
+                NotesScheduleQueue._loaded = False
+                stats = Stats()
+                start = time.perf_counter()
+                await RealtimeNotes.execute(bot)
+                await Outbox.execute(bot)
+                report("realtime_notes", num_users, time.perf_counter() - start)
+        finally:
+            await engine.dispose()
+
+
+async def run_all(users: list[int], tasks: list[str]) -> None:
+    # 排程類別的 Lock 等物件在模組載入時建立，所有測試需在同一個 event loop 內執行
+    for num_users in users:
+        await run(num_users, tasks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="自動排程的負載模擬測試")
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument(
+        "--task",
+        choices=["daily_reward", "realtime_notes"],
+        nargs="+",
+        default=["daily_reward", "realtime_notes"],
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="假 Hoyolab 的平均延遲（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="假 Hoyolab 的錯誤率 (0~1)")
+    parser.add_argument("--loop-delay", type=float, default=0.0, help="config.schedule_loop_delay")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="config.schedule_notes_rate_limit"
+    )
+    parser.add_argument(
+        "--unified", action="store_true", help="config.schedule_notes_unified，依使用者合併檢查"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="亂數種子")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config.schedule_loop_delay = args.loop_delay
+    config.schedule_notes_rate_limit = args.rate_limit
+    config.schedule_notes_unified = args.unified
+    config.schedule_message_coalesce_seconds = 0.5
+    config.daily_reward_api_list = []
+    config.game_maintenance_time = None
+
+    genshin.Client.request = FakeHoyolab(args.latency, args.error_rate).request  # type: ignore
+    instrument()
+    asyncio.run(run_all(args.users, args.task))
+
+
+if __name__ == "__main__":
+    main()
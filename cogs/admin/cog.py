@@ -91,6 +91,12 @@ class Admin(commands.Cog):
                 value="schedule_check_resin_interval",
             ),
             Choice(name="schedule_loop_delay", value="schedule_loop_delay"),
+            Choice(name="schedule_notes_workers", value="schedule_notes_workers"),
+            Choice(name="schedule_notes_rate_limit", value="schedule_notes_rate_limit"),
+            Choice(
+                name="schedule_message_coalesce_seconds",
+                value="schedule_message_coalesce_seconds",
+            ),
         ]
     )
     @SlashCommandLogger
@@ -98,9 +104,14 @@ class Admin(commands.Cog):
         if option in [
             "schedule_daily_reward_time",
             "schedule_check_resin_interval",
+            "schedule_notes_workers",
         ]:
             setattr(config, option, int(value))
-        elif option in ["schedule_loop_delay"]:
+        elif option in [
+            "schedule_loop_delay",
+            "schedule_notes_rate_limit",
+            "schedule_message_coalesce_seconds",
+        ]:
             setattr(config, option, float(value))
         await interaction.response.send_message(f"已將{option}的值設為: {value}")
 
@@ -16,6 +16,7 @@ from database import (
     StarrailScheduleNotes,
     ZZZScheduleNotes,
 )
+from genshin_py import auto_task
 from utility import EmbedTemplate, get_app_command_mention
 from utility.custom_log import SlashCommandLogger
 
@@ -149,7 +150,16 @@ class ScheduleCommandCog(commands.Cog, name="Schedule"):
                 )
                 if checkin_user.next_checkin_time < datetime.now():
                     checkin_user.update_next_checkin_time()
-                await Database.insert_or_replace(checkin_user)
+                async with Database.sessionmaker() as session:
+                    # 分散簽到時間時分配簽到時段，並釋放原本設定分配到的時段
+                    old = await session.get(ScheduleDailyCheckin, interaction.user.id)
+                    if old is not None:
+                        checkin_user.checkin_slot_time = old.checkin_slot_time
+                    await auto_task.CheckinSlotAllocator.allocate(
+                        session, [checkin_user], datetime.now()
+                    )
+                    await session.merge(checkin_user)
+                    await session.commit()
 
                 await interaction.edit_original_response(
                     embed = EmbedTemplate.normal(
@@ -162,8 +172,8 @@ class ScheduleCommandCog(commands.Cog, name="Schedule"):
                 )
 
             elif switch == "OFF":  # 關閉簽到功能
-                await Database.delete(
-                    ScheduleDailyCheckin, ScheduleDailyCheckin.discord_id.is_(interaction.user.id)
+                await auto_task.CheckinSlotAllocator.remove(
+                    ScheduleDailyCheckin.discord_id.is_(interaction.user.id)
                 )
                 await interaction.response.send_message(
                     embed=EmbedTemplate.normal("Daily Auto Check-In is turned off")
@@ -243,8 +253,7 @@ class ScheduleCommandCog(commands.Cog, name="Schedule"):
     ):
         channel_id = interaction.channel_id
         if function == "DAILY":
-            await Database.delete(
-                ScheduleDailyCheckin,
+            await auto_task.CheckinSlotAllocator.remove(
                 ScheduleDailyCheckin.discord_id.is_(user.id)
                 & ScheduleDailyCheckin.discord_channel_id.is_(channel_id),
             )
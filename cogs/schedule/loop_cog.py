@@ -1,6 +1,5 @@
 import asyncio
-import shutil
-from datetime import date, datetime
+from datetime import datetime
 
 import sentry_sdk
 from discord.ext import commands, tasks
@@ -15,9 +14,12 @@ class ScheduleLoopCog(commands.Cog, name="排程循環"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.schedule.start()
+        self.send_outbox.change_interval(seconds=max(1, config.schedule_message_coalesce_seconds))
+        self.send_outbox.start()
 
     async def cog_unload(self) -> None:
         self.schedule.cancel()
+        self.send_outbox.cancel()
 
     loop_interval = 1  # 循環間隔1分鐘
 
@@ -30,29 +32,47 @@ class ScheduleLoopCog(commands.Cog, name="排程循環"):
         if config.game_maintenance_time is None or not (
             config.game_maintenance_time[0] <= now < config.game_maintenance_time[1]
         ):
+            # 維護結束後的釋放期內每分鐘都執行，讓逾期的使用者依各自的釋放時間平均分散
+            is_draining = auto_task.BacklogDrain.drain_window(now) is not None
+
             # 每 {config.schedule_daily_checkin_interval} 分鐘啟動自動簽到
-            if now.minute % config.schedule_daily_checkin_interval < self.loop_interval:
+            if is_draining or now.minute % config.schedule_daily_checkin_interval < self.loop_interval:
                 asyncio.create_task(auto_task.DailyReward.execute(self.bot))
 
             # 每 {config.schedule_check_resin_interval} 分鐘檢查一次樹脂
-            if now.minute % config.schedule_check_resin_interval < self.loop_interval:
+            if is_draining or now.minute % config.schedule_check_resin_interval < self.loop_interval:
                 asyncio.create_task(auto_task.RealtimeNotes.execute(self.bot))
 
         # 每日凌晨一點備份資料庫、刪除過期使用者資料
         if now.hour == 1 and now.minute < self.loop_interval:
-            try:
-                db_path = "data/bot/bot.db"
-                today = date.today()
-                shutil.copyfile(db_path, f"{db_path.split('.')[0]}_backup_{today}.db")
-            except Exception as e:
-                LOG.Error(str(e))
-                sentry_sdk.capture_exception(e)
-            asyncio.create_task(database.Tool.remove_expired_user(config.expired_user_days))
+            asyncio.create_task(self.daily_maintenance())
+
+    async def daily_maintenance(self):
+        """備份資料庫後刪除過期使用者資料"""
+        try:
+            await database.DatabaseBackup.run()
+        except Exception as e:
+            LOG.Error(f"資料庫備份失敗：{e}")
+            sentry_sdk.capture_exception(e)
+        await database.Tool.remove_expired_user(config.expired_user_days)
+
+    @tasks.loop(seconds=3)
+    async def send_outbox(self):
+        """每 {config.schedule_message_coalesce_seconds} 秒發送寄件匣內的自動排程通知"""
+        await auto_task.Outbox.execute(self.bot)
+        # 發送間隔可透過 /config 指令即時調整，每次發送後重新讀取
+        interval = max(1, config.schedule_message_coalesce_seconds)
+        if self.send_outbox.seconds != interval:
+            self.send_outbox.change_interval(seconds=interval)
 
     @schedule.before_loop
     async def before_schedule(self):
         await self.bot.wait_until_ready()
 
+    @send_outbox.before_loop
+    async def before_send_outbox(self):
+        await self.bot.wait_until_ready()
+
 
 async def setup(client: commands.Bot):
     await client.add_cog(ScheduleLoopCog(client))
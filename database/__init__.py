@@ -1,12 +1,16 @@
 from .app import Database
+from .backup import DatabaseBackup
 from .dataclass import *
 from .migration import migrate
 from .models import (
     Base,
+    DailyCheckinSlot,
+    DailyRewardJournal,
     GeetestChallenge,
     GenshinScheduleNotes,
     GenshinShowcase,
     GenshinSpiralAbyss,
+    NotificationOutbox,
     ScheduleDailyCheckin,
     StarrailForgottenHall,
     StarrailPureFiction,
@@ -1,41 +1,132 @@
+import contextlib
 import pathlib
-from typing import Sequence, TypeVar
+from typing import Any, AsyncIterator, Callable, ClassVar, Iterable, Sequence, TypeVar
 
 import sqlalchemy
 from alembic import command as alembic_cmd
 from alembic.config import Config as alembic_config
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.sql._typing import ColumnExpressionArgument
 
+from utility import config
+
 from .models import (
     Base,
+    DailyCheckinSlot,
+    GeetestChallenge,
     GenshinScheduleNotes,
     GenshinShowcase,
     GenshinSpiralAbyss,
+    NotificationOutbox,
     ScheduleDailyCheckin,
+    StarrailForgottenHall,
+    StarrailPureFiction,
+    StarrailScheduleNotes,
     StarrailShowcase,
     User,
+    ZZZScheduleNotes,
 )
 
+DATABASE_PATH = pathlib.Path("data/bot/bot.db")
+"""SQLite 資料庫檔案的路徑"""
+
 DatabaseModel = Base
 T_DatabaseModel = TypeVar("T_DatabaseModel", bound=Base)
 
+USER_TABLES: tuple[type[Base], ...] = (
+    ScheduleDailyCheckin,
+    GenshinScheduleNotes,
+    StarrailScheduleNotes,
+    ZZZScheduleNotes,
+    GenshinSpiralAbyss,
+    StarrailForgottenHall,
+    StarrailPureFiction,
+    GeetestChallenge,
+    NotificationOutbox,
+)
+"""以 discord_id 記錄使用者資料的 Table (不含 `User`)，刪除使用者時一併刪除；
+`DailyRewardJournal` 是簽到排程的執行紀錄，排程結束時會自行刪除，不在此列"""
+SHOWCASE_TABLES: dict[type[Base], str] = {
+    GenshinShowcase: "uid_genshin",
+    StarrailShowcase: "uid_starrail",
+}
+"""dict[以 UID 記錄的展示櫃 Table, 對應的 `User` UID 欄位名稱]"""
+
+SELECT_BY_IDS_CHUNK = 500
+"""`select_by_ids` 每次查詢的 ID 數量，避免超過 SQLite 單一語句的參數數量上限"""
+
+
+def _sqlite_pragmas(profile: str) -> list[str]:
+    """取得 SQLite 設定檔在每個資料庫連線建立時要執行的 PRAGMA
+
+    - `default`：維持 SQLite 預設的 rollback journal，只設定 busy_timeout
+    - `wal`：使用 WAL 日誌，讀取不會被寫入阻擋，機器人、排程與外部的 geetest 網頁伺服器
+      同時存取資料庫時不需互相等待；WAL 模式會記錄在資料庫檔案內，改回 `default` 不會還原日誌模式
+    """
+    busy_timeout = f"PRAGMA busy_timeout={int(config.database_busy_timeout * 1000)}"
+    if profile == "default":
+        return [busy_timeout]
+    if profile == "wal":
+        return [
+            "PRAGMA journal_mode=WAL",
+            # WAL 模式下 NORMAL 不會損毀資料庫，只有斷電時可能遺失最後提交的交易
+            "PRAGMA synchronous=NORMAL",
+            busy_timeout,
+            f"PRAGMA mmap_size={config.database_mmap_size_mb * 1024 * 1024}",
+            # 負值表示單位為 KiB
+            f"PRAGMA cache_size={-config.database_cache_size_mb * 1024}",
+            "PRAGMA temp_store=MEMORY",
+        ]
+    raise ValueError(f"未知的 SQLite 設定檔：{profile}")
+
+
+_pragmas = _sqlite_pragmas(config.database_sqlite_profile)
+_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{DATABASE_PATH}",
+    pool_size=max(1, config.database_pool_size),
+    max_overflow=max(0, config.database_max_overflow),
+)
+
+
+@sqlalchemy.event.listens_for(_engine.sync_engine, "connect")
+def _on_connect(dbapi_connection, connection_record) -> None:
+    """每個新的資料庫連線套用 SQLite 設定檔"""
+    cursor = dbapi_connection.cursor()
+    for pragma in _pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
 
-_engine = create_async_engine("sqlite+aiosqlite:///data/bot/bot.db")
 _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
 
 
 class Database:
-    """資料庫方法類別，提供類別方法來操作資料庫，包含了：初始化、關閉、插入、選擇、刪除"""
+    """資料庫方法類別，提供類別方法來操作資料庫，包含了：初始化、關閉、插入、選擇、更新、刪除
+
+    批次方法 (`insert_or_replace_many`、`update_where`、`delete_where`) 可傳入 `session`
+    參數，在 `transaction()` 的交易內執行，多項操作只需提交一次；
+    批次刪除不會觸發 ORM 的 delete 事件，需要得知被刪除資料的模組以 `listen_delete` 註冊
+    """
 
     engine = _engine
     sessionmaker = _sessionmaker
+    _delete_listeners: ClassVar[dict[type[Base], list[Callable[[Sequence[Any]], None]]]] = {}
+    """dict[資料庫 Table, 批次刪除後以被刪除資料的 Primary Key 呼叫的函式]"""
+
+    @classmethod
+    def listen_delete(
+        cls, table: type[T_DatabaseModel], callback: Callable[[Sequence[Any]], None]
+    ) -> None:
+        """註冊 `delete_where` 批次刪除指定 Table 後要呼叫的函式，參數為被刪除資料的 Primary Key，
+        Example: `Database.listen_delete(GenshinScheduleNotes, on_delete)`
+        """
+        cls._delete_listeners.setdefault(table, []).append(callback)
 
     @classmethod
     async def init(cls) -> None:
         """初始化資料庫，在 bot 最初運行時需要呼叫一次"""
         alembic_cfg = alembic_config("database/alembic/alembic.ini")
-        if pathlib.Path("data/bot/bot.db").exists():
+        if DATABASE_PATH.exists():
             # 如果資料庫檔案存在，運行 Alembic 的 upgrade 命令
             alembic_cmd.upgrade(alembic_cfg, "head")
         else:
@@ -49,6 +140,26 @@ class Database:
         """關閉資料庫，在 bot 關閉前需要呼叫一次"""
         await cls.engine.dispose()
 
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def transaction(cls) -> AsyncIterator[AsyncSession]:
+        """開啟一個交易，區塊結束時提交，發生例外時回復，
+        Example: `async with Database.transaction() as session: ...`
+        """
+        async with cls.sessionmaker() as session:
+            async with session.begin():
+                yield session
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def _session(cls, session: AsyncSession | None) -> AsyncIterator[AsyncSession]:
+        """有傳入 session 時沿用呼叫者的交易 (不提交)，否則開啟新的交易"""
+        if session is not None:
+            yield session
+            return
+        async with cls.transaction() as new_session:
+            yield new_session
+
     @classmethod
     async def insert_or_replace(cls, instance: DatabaseModel) -> None:
         """插入物件到資料庫，若已存在相同 Primary Key，則以新物件取代舊物件，
@@ -63,6 +174,23 @@ class Database:
             await session.merge(instance)
             await session.commit()
 
+    @classmethod
+    async def insert_or_replace_many(
+        cls, instances: Iterable[DatabaseModel], *, session: AsyncSession | None = None
+    ) -> None:
+        """在同一個交易內插入多個物件，若已存在相同 Primary Key，則以新物件取代舊物件
+
+        Paramaters:
+        ------
+        instances: `Iterable[DatabaseModel]`
+            資料庫 Table (ORM) 的實例物件
+        session: `AsyncSession` | `None`
+            `transaction()` 開啟的交易，若為 `None` 則開啟新的交易並提交
+        """
+        async with cls._session(session) as active_session:
+            for instance in instances:
+                await active_session.merge(instance)
+
     @classmethod
     async def select_one(
         cls,
@@ -119,6 +247,121 @@ class Database:
             result = await session.execute(stmt)
             return result.scalars().all()
 
+    @classmethod
+    async def select_by_ids(
+        cls, table: type[T_DatabaseModel], ids: Iterable[Any]
+    ) -> Sequence[T_DatabaseModel]:
+        """以 Primary Key 從資料庫選擇多項物件，
+        Example: `Database.select_by_ids(User, [123, 456])`
+
+        Parameters
+        ------
+        table: `type[T_DatabaseModel]`
+            要選擇的資料庫 Table (ORM) Class，只能有單一欄位的 Primary Key，Ex: `User`
+        ids: `Iterable[Any]`
+            要選擇的 Primary Key 值
+
+        Returns
+        ------
+        `Sequence[T_DatabaseModel]`:
+            存在於資料庫的物件，不存在的 ID 會被略過，順序不保證與 ids 相同
+        """
+        primary_key = sqlalchemy.inspect(table).primary_key
+        if len(primary_key) != 1:
+            raise ValueError(f"{table.__name__} 的 Primary Key 不是單一欄位")
+        ids = list(dict.fromkeys(ids))
+        result: list[T_DatabaseModel] = []
+        async with cls.sessionmaker() as session:
+            for i in range(0, len(ids), SELECT_BY_IDS_CHUNK):
+                stmt = sqlalchemy.select(table).where(
+                    primary_key[0].in_(ids[i : i + SELECT_BY_IDS_CHUNK])
+                )
+                result.extend((await session.execute(stmt)).scalars().all())
+        return result
+
+    @classmethod
+    async def update_where(
+        cls,
+        table: type[T_DatabaseModel],
+        whereclause: ColumnExpressionArgument[bool],
+        values: dict[str, Any],
+        *,
+        session: AsyncSession | None = None,
+    ) -> int:
+        """以單一 UPDATE 語句更新符合條件的資料，不需先讀取物件，
+        Example: `Database.update_where(User, User.discord_id.is_(id), {"uid_genshin": 123})`
+
+        Parameters
+        ------
+        table: `type[T_DatabaseModel]`
+            要更新的資料庫 Table (ORM) Class，Ex: `User`
+        whereclause: `ColumnExpressionArgument[bool]`
+            ORM Column 的 Where 選擇條件，Ex: `User.discord_id.is_(123456)`
+        values: `dict[str, Any]`
+            dict[欄位名稱, 新的值]
+        session: `AsyncSession` | `None`
+            `transaction()` 開啟的交易，若為 `None` 則開啟新的交易並提交
+
+        Returns
+        ------
+        `int`:
+            更新的資料數量
+        """
+        stmt = (
+            sqlalchemy.update(table)
+            .where(whereclause)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        async with cls._session(session) as active_session:
+            result = await active_session.execute(stmt)
+        return result.rowcount
+
+    @classmethod
+    async def delete_where(
+        cls,
+        table: type[T_DatabaseModel],
+        whereclause: ColumnExpressionArgument[bool],
+        *,
+        session: AsyncSession | None = None,
+    ) -> int:
+        """以單一 DELETE 語句刪除符合條件的資料，不需先讀取物件，
+        Example: `Database.delete_where(User, User.discord_id.is_(id))`
+
+        Parameters
+        ------
+        table: `type[T_DatabaseModel]`
+            要刪除的資料庫 Table (ORM) Class，Ex: `User`
+        whereclause: `ColumnExpressionArgument[bool]`
+            ORM Column 的 Where 選擇條件，Ex: `User.discord_id.is_(123456)`
+        session: `AsyncSession` | `None`
+            `transaction()` 開啟的交易，若為 `None` 則開啟新的交易並提交
+
+        Returns
+        ------
+        `int`:
+            刪除的資料數量
+        """
+        stmt = (
+            sqlalchemy.delete(table)
+            .where(whereclause)
+            .execution_options(synchronize_session=False)
+        )
+        listeners = cls._delete_listeners.get(table)
+        if not listeners:
+            async with cls._session(session) as active_session:
+                result = await active_session.execute(stmt)
+            return result.rowcount
+
+        # 有註冊的函式時以 RETURNING 取得被刪除資料的 Primary Key
+        primary_key = sqlalchemy.inspect(table).primary_key[0]
+        async with cls._session(session) as active_session:
+            result = await active_session.execute(stmt.returning(primary_key))
+            deleted = result.scalars().all()
+        for callback in listeners:
+            callback(deleted)
+        return len(deleted)
+
     @classmethod
     async def delete_instance(cls, instance: DatabaseModel) -> None:
         """從資料庫內刪除該物件，使用方式是先使用 `select_one` 或 `select_all` 方法取得物件實例後，傳入本方法進行刪除
@@ -146,26 +389,81 @@ class Database:
         whereclause: `ColumnExpressionArgument[bool]` | `None`
             ORM Column 的 Where 選擇條件，Ex: `User.discord_id.is_(123456)`
         """
-        instances = await cls.select_all(table, whereclause)
-        for instance in instances:
-            await cls.delete_instance(instance)
+        await cls.delete_where(table, whereclause)
 
     @classmethod
-    async def delete_all(cls, discord_id: int) -> None:
+    async def delete_all(cls, discord_id: int) -> dict[str, int]:
         """指定使用者 discord_id，刪除此使用者在資料庫內的所有資料
 
         Parameters
         ------
         discord_id: `int`
             使用者 Discord ID
+
+        Returns
+        ------
+        `dict[str, int]`:
+            dict[Table 名稱, 刪除的資料數量]
         """
-        user = await cls.select_one(User, User.discord_id.is_(discord_id))
-        if user is None:
-            return
-        await cls.delete(User, User.discord_id.is_(discord_id))
-        await cls.delete(ScheduleDailyCheckin, ScheduleDailyCheckin.discord_id.is_(discord_id))
-        await cls.delete(GenshinScheduleNotes, GenshinScheduleNotes.discord_id.is_(discord_id))
-        await cls.delete(GenshinSpiralAbyss, GenshinSpiralAbyss.discord_id.is_(discord_id))
-        await cls.delete(GenshinShowcase, GenshinShowcase.uid.is_(user.uid_genshin))
-        await cls.delete(StarrailShowcase, StarrailShowcase.uid.is_(user.uid_starrail))
-        await cls.delete(User, User.discord_id.is_(discord_id))
+        return await cls.delete_users([discord_id])
+
+    @classmethod
+    async def delete_users(
+        cls,
+        user_ids: Sequence[int] | sqlalchemy.Select[tuple[int]],
+        *,
+        session: AsyncSession | None = None,
+    ) -> dict[str, int]:
+        """在同一個交易內以集合式的 DELETE 語句刪除多位使用者在所有 Table 的資料，
+        並釋放使用者分配到的簽到時段；展示櫃只刪除沒有其他使用者設定相同 UID 的資料，
+        Example: `Database.delete_users(sqlalchemy.select(User.discord_id).where(...))`
+
+        Parameters
+        ------
+        user_ids: `Sequence[int]` | `Select[tuple[int]]`
+            使用者 Discord ID，或選擇使用者 Discord ID 的子查詢
+        session: `AsyncSession` | `None`
+            `transaction()` 開啟的交易，若為 `None` 則開啟新的交易並提交
+
+        Returns
+        ------
+        `dict[str, int]`:
+            dict[Table 名稱, 刪除的資料數量]
+        """
+        counts: dict[str, int] = {}
+        S = ScheduleDailyCheckin
+        async with cls._session(session) as active_session:
+            # 子查詢可能依賴使用者資料 (例：last_used_time)，因此 users 最後才刪除
+            released = (
+                sqlalchemy.select(sqlalchemy.func.count())
+                .where(S.checkin_slot_time == DailyCheckinSlot.slot_time)
+                .where(S.discord_id.in_(user_ids))
+                .scalar_subquery()
+            )
+            await active_session.execute(
+                sqlalchemy.update(DailyCheckinSlot)
+                .where(
+                    DailyCheckinSlot.slot_time.in_(
+                        sqlalchemy.select(S.checkin_slot_time).where(S.discord_id.in_(user_ids))
+                    )
+                )
+                .values(occupancy=sqlalchemy.func.max(DailyCheckinSlot.occupancy - released, 0))
+            )
+
+            for showcase, uid_column in SHOWCASE_TABLES.items():
+                uid = getattr(User, uid_column)
+                kept_uids = sqlalchemy.select(uid).where(
+                    uid.is_not(None), User.discord_id.not_in(user_ids)
+                )
+                removed_uids = sqlalchemy.select(uid).where(User.discord_id.in_(user_ids))
+                counts[showcase.__tablename__] = await cls.delete_where(
+                    showcase,
+                    showcase.uid.in_(removed_uids) & showcase.uid.not_in(kept_uids),
+                    session=active_session,
+                )
+
+            for table in USER_TABLES + (User,):
+                counts[table.__tablename__] = await cls.delete_where(
+                    table, table.discord_id.in_(user_ids), session=active_session
+                )
+        return counts
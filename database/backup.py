@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import os
+import pathlib
+import shutil
+import sqlite3
+import time
+from datetime import date
+from typing import ClassVar
+
+from utility import config
+from utility.custom_log import LOG
+from utility.prometheus import Metrics
+
+from .app import DATABASE_PATH
+
+BACKUP_PREFIX = f"{DATABASE_PATH.stem}_backup_"
+"""備份檔案名稱的前綴，完整名稱為 `bot_backup_YYYY-MM-DD.db` 或 `bot_backup_YYYY-MM-DD.db.gz`"""
+
+
+class DatabaseBackup:
+    """SQLite 資料庫的線上備份
+
+    使用 SQLite 的 online backup API 在另一個執行緒內分步驟複製資料庫，不會阻塞事件迴圈，
+    機器人與排程可以繼續寫入；WAL 模式下所有步驟都從同一個讀取快照複製，其他模式下資料庫被修改時
+    SQLite 會重新開始複製，因此得到的備份檔案一定是某個時間點一致的資料庫，不會有複製到一半的交易
+
+    Methods
+    -----
+    run()
+        備份資料庫並刪除超過保留數量的舊備份
+    """
+
+    _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+
+    @classmethod
+    async def run(cls) -> pathlib.Path | None:
+        """備份資料庫到資料庫檔案的資料夾，並刪除超過 `config.database_backup_retention` 份的舊備份
+
+        Returns
+        ------
+        `pathlib.Path` | `None`:
+            備份檔案的路徑，若已經有備份正在執行則回傳 `None`
+        """
+        if cls._lock.locked():
+            return None
+        async with cls._lock:
+            start = time.perf_counter()
+            path = await asyncio.to_thread(cls._backup, date.today())
+            duration = time.perf_counter() - start
+            size = path.stat().st_size
+            Metrics.DATABASE_BACKUP_DURATION.observe(duration)
+            Metrics.DATABASE_BACKUP_SIZE.set(size)
+            Metrics.DATABASE_BACKUP_LAST_SUCCESS.set_to_current_time()
+
+            removed = await asyncio.to_thread(cls._prune)
+            LOG.System(
+                f"資料庫備份完成：{path.name} ({size / 1024 / 1024:.1f} MB)，"
+                + f"耗時 {duration:.1f} 秒，刪除 {len(removed)} 份舊備份"
+            )
+            return path
+
+    @staticmethod
+    def _backup(today: date) -> pathlib.Path:
+        """複製資料庫到暫存檔，完成 (與壓縮) 後才改名為正式的備份檔案，避免留下不完整的備份"""
+        target = DATABASE_PATH.with_name(f"{BACKUP_PREFIX}{today}{DATABASE_PATH.suffix}")
+        tmp_db = target.with_name(target.name + ".tmp")
+        src = sqlite3.connect(DATABASE_PATH, isolation_level=None)
+        dst = sqlite3.connect(tmp_db)
+        try:
+            # WAL 模式下先開啟讀取交易，所有步驟都從同一個快照複製，寫入不會使備份重新開始，
+            # 也不會阻擋其他連線寫入；rollback journal 模式下持有讀取鎖會阻擋寫入，因此不使用
+            is_wal = src.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            if is_wal:
+                src.execute("BEGIN")
+                src.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            src.backup(dst, pages=config.database_backup_pages_per_step, sleep=0.005)
+            if is_wal:
+                src.execute("COMMIT")
+            # 備份檔案會沿用來源的 WAL 模式，改回預設模式讓備份是可以單獨複製的一個檔案
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+            src.close()
+
+        if not config.database_backup_compress:
+            os.replace(tmp_db, target)
+            return target
+
+        target = target.with_name(target.name + ".gz")
+        tmp_gz = target.with_name(target.name + ".tmp")
+        try:
+            with open(tmp_db, "rb") as f_in, gzip.open(tmp_gz, "wb", compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            os.replace(tmp_gz, target)
+        finally:
+            tmp_db.unlink(missing_ok=True)
+            tmp_gz.unlink(missing_ok=True)
+        return target
+
+    @staticmethod
+    def _prune() -> list[pathlib.Path]:
+        """刪除超過保留數量的舊備份，回傳被刪除的檔案"""
+        retention = config.database_backup_retention
+        if retention <= 0:
+            return []
+        backups = sorted(
+            (
+                path
+                for path in DATABASE_PATH.parent.glob(f"{BACKUP_PREFIX}*")
+                if path.name.endswith((DATABASE_PATH.suffix, ".gz"))
+            ),
+            key=lambda path: path.name,
+            reverse=True,
+        )
+        removed = backups[retention:]
+        for path in removed:
+            path.unlink(missing_ok=True)
+        return removed
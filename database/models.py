@@ -14,7 +14,7 @@ from .dataclass import spiral_abyss
 class Base(MappedAsDataclass, DeclarativeBase):
     """資料庫 Table 基礎類別，繼承自 sqlalchemy `MappedAsDataclass`, `DeclarativeBase`"""
 
-    type_annotation_map = {dict[str, str]: sqlalchemy.JSON}
+    type_annotation_map = {dict[str, str]: sqlalchemy.JSON, dict[str, typing.Any]: sqlalchemy.JSON}
 
 
 class User(Base):
@@ -24,7 +24,7 @@ class User(Base):
 
     discord_id: Mapped[int] = mapped_column(primary_key=True)
     """使用者 Discord ID"""
-    last_used_time: Mapped[datetime.datetime | None] = mapped_column(default=None)
+    last_used_time: Mapped[datetime.datetime | None] = mapped_column(default=None, index=True)
     """使用者最後一次成功使用機器人指令的時間"""
 
     cookie_default: Mapped[str | None] = mapped_column(default=None)
@@ -61,7 +61,7 @@ class ScheduleDailyCheckin(Base):
     """發送通知訊息的 Discord 頻道的 ID"""
     is_mention: Mapped[bool]
     """發送訊息時是否要 tag 使用者"""
-    next_checkin_time: Mapped[datetime.datetime]
+    next_checkin_time: Mapped[datetime.datetime] = mapped_column(index=True)
     """下次簽到的時間 (使用者設定每日要簽到的時間)"""
 
     has_genshin: Mapped[bool] = mapped_column(default=False)
@@ -76,13 +76,83 @@ class ScheduleDailyCheckin(Base):
     """是否要簽到未定事件簿(台服)"""
     has_zzz: Mapped[bool] = mapped_column(default=False)
     """是否要簽到絕區零"""
+    checkin_slot_time: Mapped[datetime.datetime | None] = mapped_column(default=None, index=True)
+    """分散簽到時間時分配到的實際簽到時段，早於 next_checkin_time；None 表示在 next_checkin_time 簽到"""
+
+    @property
+    def due_time(self) -> datetime.datetime:
+        """實際要簽到的時間，有分配簽到時段時為時段開始時間，否則為 next_checkin_time"""
+        return self.checkin_slot_time or self.next_checkin_time
 
     def update_next_checkin_time(self) -> None:
-        """將下次簽到時間更新為明日"""
-        dt = datetime.datetime
-        self.next_checkin_time = dt.combine(
-            dt.now().date(), self.next_checkin_time.time()
-        ) + datetime.timedelta(days=1)
+        """將下次簽到時間以整天往後移到現在之後，並清除已使用的簽到時段
+
+        至少往後移一天：分散簽到時間時可能在午夜前的時段簽到隔天凌晨的期限，
+        以今天的日期計算會得到剛完成的同一個期限，造成同一天重複簽到
+        """
+        now = datetime.datetime.now()
+        next_time = self.next_checkin_time + datetime.timedelta(days=1)
+        if next_time <= now:
+            next_time += datetime.timedelta(days=(now - next_time).days + 1)
+        self.next_checkin_time = next_time
+        self.checkin_slot_time = None
+
+
+class DailyCheckinSlot(Base):
+    """每日自動簽到時段的分配人數資料庫 Table，用來將簽到時間分散到人數較少的時段"""
+
+    __tablename__ = "daily_checkin_slot"
+
+    slot_time: Mapped[datetime.datetime] = mapped_column(primary_key=True)
+    """時段的開始時間"""
+    occupancy: Mapped[int] = mapped_column(default=0)
+    """分配到此時段簽到的人數"""
+
+
+class DailyRewardJournal(Base):
+    """每日自動簽到執行紀錄資料庫 Table，記錄每次排程要簽到的使用者與進度，程序重啟後可從中斷處繼續"""
+
+    __tablename__ = "daily_reward_journal"
+
+    discord_id: Mapped[int] = mapped_column(primary_key=True)
+    """使用者 Discord ID"""
+    run_id: Mapped[str] = mapped_column(index=True)
+    """排程執行的 ID，同一次排程的使用者有相同的 ID"""
+    state: Mapped[str] = mapped_column(default="queued")
+    """簽到進度："queued" 等待簽到、"done" 已簽到且已寫入下次簽到時間"""
+    host: Mapped[str | None] = mapped_column(default=None)
+    """完成簽到的主機 ("LOCAL" 或遠端簽到 API 網址)"""
+    is_counted: Mapped[bool] = mapped_column(default=False)
+    """是否計入簽到人數統計 (有產生簽到結果訊息)"""
+
+
+class NotificationOutbox(Base):
+    """自動排程通知的寄件匣資料庫 Table，排程將要發送的通知寫入後由獨立的發送器發送，程序重啟後未發送的通知會繼續發送"""
+
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    """通知 ID"""
+    discord_id: Mapped[int]
+    """通知對象的使用者 Discord ID"""
+    channel_id: Mapped[int]
+    """發送通知的 Discord 頻道 ID"""
+    source: Mapped[str]
+    """產生通知的排程資料表名稱，因沒有權限、頻道不存在而發送失敗時，從此資料表移除使用者"""
+    content: Mapped[str]
+    """訊息文字內容"""
+    embed: Mapped[dict[str, typing.Any] | None] = mapped_column(default=None)
+    """訊息的 embed (`discord.Embed.to_dict()`)"""
+    resolve_name: Mapped[bool] = mapped_column(default=False)
+    """發送前是否要將 embed 說明內的 "{user_name}" 替換成使用者名稱"""
+    check_mention: Mapped[bool] = mapped_column(default=False)
+    """發送後是否檢查使用者在頻道內 (有被提及)，不在頻道內則從排程資料表移除使用者"""
+    attempts: Mapped[int] = mapped_column(default=0)
+    """已嘗試發送的次數"""
+    next_attempt_time: Mapped[datetime.datetime] = mapped_column(
+        default_factory=datetime.datetime.now, index=True
+    )
+    """下次嘗試發送的時間"""
 
 
 class GeetestChallenge(Base):
@@ -111,7 +181,7 @@ class GenshinScheduleNotes(Base):
     discord_channel_id: Mapped[int]
     """發送通知訊息的 Discord 頻道的 ID"""
     next_check_time: Mapped[datetime.datetime | None] = mapped_column(
-        insert_default=sqlalchemy.func.now(), default=None
+        insert_default=sqlalchemy.func.now(), default=None, index=True
     )
     """下次檢查的時間，當檢查時超過此時間才會對 Hoyolab 請求資料"""
 
@@ -234,7 +304,7 @@ class StarrailScheduleNotes(Base):
     discord_channel_id: Mapped[int]
     """發送通知訊息的 Discord 頻道的 ID"""
     next_check_time: Mapped[datetime.datetime | None] = mapped_column(
-        insert_default=sqlalchemy.func.now(), default=None
+        insert_default=sqlalchemy.func.now(), default=None, index=True
     )
     """下次檢查的時間，當檢查時超過此時間才會對 Hoyolab 請求資料"""
 
@@ -363,7 +433,7 @@ class ZZZScheduleNotes(Base):
     discord_channel_id: Mapped[int]
     """發送通知訊息的 Discord 頻道的 ID"""
     next_check_time: Mapped[datetime.datetime | None] = mapped_column(
-        insert_default=sqlalchemy.func.now(), default=None
+        insert_default=sqlalchemy.func.now(), default=None, index=True
     )
     """下次檢查的時間，當檢查時超過此時間才會對 Hoyolab 請求資料"""
 
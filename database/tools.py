@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import genshin
+import sqlalchemy
 
 from utility.custom_log import LOG
 from utility.utils import get_app_command_mention
@@ -64,14 +65,12 @@ class Tool:
         diff_days: `int`
             刪除超過此天數未使用的使用者
         """
-        now = datetime.now()
-        count = 0
-        users = await Database.select_all(User)
-        for user in users:
-            if user.last_used_time is None:
-                continue
-            interval = now - user.last_used_time
-            if interval.days > diff_days:
-                await Database.delete_instance(user)
-                count += 1
-        LOG.System(f"檢查過期使用者：{len(users)} 位使用者已檢查，已刪除 {count} 位過期使用者")
+        # 超過 diff_days 整天未使用，以 last_used_time 索引做範圍查詢，不需讀取所有使用者
+        cutoff = datetime.now() - timedelta(days=diff_days + 1)
+        expired = sqlalchemy.select(User.discord_id).where(User.last_used_time <= cutoff)
+        counts = await Database.delete_users(expired)
+        details = "、".join(f"{table} {count}" for table, count in counts.items() if count > 0)
+        LOG.System(
+            f"檢查過期使用者：已刪除 {counts[User.__tablename__]} 位超過 {diff_days} 天未使用的使用者"
+            + (f" ({details})" if details else "")
+        )
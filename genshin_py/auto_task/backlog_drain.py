@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timedelta
+
+from utility import config
+from utility.prometheus import Metrics
+
+
+class BacklogDrain:
+    """遊戲維護結束後的積壓釋放
+
+    維護期間自動排程不會執行，維護結束後所有逾期的簽到與即時便箋檢查會在同一分鐘內湧入而被 Hoyolab 限速。
+    維護結束後的 `config.schedule_maintenance_ramp_minutes` 分鐘內為釋放期，
+    逾期的使用者依逾期程度 (越早到期越優先) 加上隨機抖動，分散到釋放期內的不同時間點執行
+
+    Methods
+    -----
+    drain_window(now)
+        取得目前所在的釋放期
+    release_time(discord_id, due_time, window)
+        計算使用者在釋放期內的執行時間
+    is_released(discord_id, due_time, now)
+        使用者是否已到可以執行的時間
+    report(task, released, pending, now)
+        匯出釋放進度到 Prometheus
+    """
+
+    @staticmethod
+    def drain_window(now: datetime | None = None) -> tuple[datetime, datetime, datetime] | None:
+        """取得目前所在的釋放期
+
+        Returns
+        ------
+        `tuple[datetime, datetime, datetime]` | `None`:
+            (維護開始時間, 維護結束時間, 釋放期結束時間)；不在釋放期內時回傳 `None`
+        """
+        now = now or datetime.now()
+        if config.game_maintenance_time is None or config.schedule_maintenance_ramp_minutes <= 0:
+            return None
+        start, end = config.game_maintenance_time
+        ramp_end = end + timedelta(minutes=config.schedule_maintenance_ramp_minutes)
+        if not (end <= now < ramp_end):
+            return None
+        return (start, end, ramp_end)
+
+    @classmethod
+    def release_time(
+        cls, discord_id: int, due_time: datetime, window: tuple[datetime, datetime, datetime]
+    ) -> datetime:
+        """計算使用者在釋放期內的執行時間
+
+        逾期越久的使用者排在釋放期越前面，並加上以使用者 ID 為種子的抖動，
+        讓同一位使用者在每次排程計算出的時間都相同；維護結束後才到期的使用者不受影響
+        """
+        start, end, ramp_end = window
+        if due_time >= end:
+            return due_time
+        ramp = (ramp_end - end).total_seconds()
+        maintenance = max((end - start).total_seconds(), 1.0)
+        # 逾期程度：0 = 維護結束前一刻才到期，1 = 維護開始前就已到期
+        overdue = min((end - due_time).total_seconds() / maintenance, 1.0)
+        jitter = min(max(config.schedule_maintenance_jitter, 0.0), 1.0)
+        rng = random.Random(f"{discord_id}-{end.timestamp()}")
+        fraction = (1.0 - overdue) * (1.0 - jitter) + rng.random() * jitter
+        return end + timedelta(seconds=ramp * fraction)
+
+    @classmethod
+    def is_released(
+        cls, discord_id: int, due_time: datetime | None, now: datetime | None = None
+    ) -> bool:
+        """使用者是否已到可以執行的時間，不在釋放期內時一律回傳 `True`"""
+        now = now or datetime.now()
+        window = cls.drain_window(now)
+        if window is None:
+            return True
+        return cls.release_time(discord_id, due_time or datetime.min, window) <= now
+
+    @classmethod
+    def report(cls, task: str, released: int, pending: int, now: datetime | None = None) -> None:
+        """匯出釋放進度到 Prometheus
+
+        Parameters
+        ------
+        task: `str`
+            排程名稱，例如 "daily_reward"、遊戲的即時便箋資料表名稱
+        released: `int`
+            本次排程在釋放期內執行的使用者數量
+        pending: `int`
+            本次排程因尚未到釋放時間而延後的使用者數量
+        """
+        now = now or datetime.now()
+        window = cls.drain_window(now)
+        if window is None:
+            Metrics.SCHEDULE_BACKLOG_PROGRESS.set(1.0)
+            Metrics.SCHEDULE_BACKLOG_PENDING.labels(task).set(0)
+            return
+        _, end, ramp_end = window
+        progress = (now - end).total_seconds() / (ramp_end - end).total_seconds()
+        Metrics.SCHEDULE_BACKLOG_PROGRESS.set(progress)
+        Metrics.SCHEDULE_BACKLOG_PENDING.labels(task).set(pending)
+        Metrics.SCHEDULE_BACKLOG_RELEASED.labels(task).inc(released)
@@ -0,0 +1,192 @@
+import collections
+from datetime import datetime, timedelta
+from typing import Sequence
+
+import sqlalchemy
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql._typing import ColumnExpressionArgument
+
+from database import DailyCheckinSlot, Database, ScheduleDailyCheckin
+from utility import config
+from utility.prometheus import Metrics
+
+
+class CheckinSlotAllocator:
+    """分散每日自動簽到的時間
+
+    多數使用者會選擇整點 (例：08:00) 簽到，使得整點的排程湧入大量簽到而其他排程閒置。
+    開啟後 (`config.schedule_daily_checkin_levelling_minutes` > 0)，使用者設定的簽到時間視為最晚期限，
+    從期限前的範圍內挑選分配人數最少的時段作為實際簽到時間 (人數相同時選擇較接近期限的時段)，
+    每個時段最多分配 `config.schedule_daily_checkin_slot_capacity` 人，各時段的分配人數記錄在資料庫。
+    所有時段都已額滿時，使用者在原本設定的時間簽到
+
+    Methods
+    -----
+    allocate(session, users, now)
+        為使用者分配簽到時段
+    release(session, users, now)
+        釋放使用者分配到的未來時段
+    remove(whereclause)
+        刪除自動簽到的使用者並釋放時段
+    cleanup(session, now)
+        刪除已經過去的時段
+    report(session, now)
+        匯出未來 24 小時各時段的分配人數到 Prometheus
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """是否開啟分散簽到時間"""
+        return config.schedule_daily_checkin_levelling_minutes > 0
+
+    @staticmethod
+    def slot_length() -> timedelta:
+        """時段長度，與自動簽到排程的間隔相同"""
+        return timedelta(minutes=max(1, config.schedule_daily_checkin_interval))
+
+    @classmethod
+    def candidate_slots(cls, deadline: datetime, now: datetime) -> list[datetime]:
+        """取得簽到期限前可以分配的時段，不包含已經過去的時段"""
+        length = cls.slot_length()
+        start = deadline - timedelta(minutes=config.schedule_daily_checkin_levelling_minutes)
+        slot = datetime.min + (start - datetime.min) // length * length
+        slots: list[datetime] = []
+        while slot <= deadline:
+            if slot >= now:
+                slots.append(slot)
+            slot += length
+        return slots
+
+    @classmethod
+    async def allocate(
+        cls, session: AsyncSession, users: Sequence[ScheduleDailyCheckin], now: datetime
+    ) -> None:
+        """為使用者分配簽到時段並更新 `checkin_slot_time`，釋放使用者原本分配到的未來時段；
+        不會提交交易，由呼叫者將使用者資料與時段人數在同一個交易內寫入
+
+        Parameters
+        ------
+        session: `AsyncSession`
+            資料庫 session
+        users: `Sequence[ScheduleDailyCheckin]`
+            要分配時段的使用者，`next_checkin_time` 需已設定為簽到期限
+        now: `datetime`
+            目前時間
+        """
+        candidates = {
+            user.discord_id: (
+                cls.candidate_slots(user.next_checkin_time, now) if cls.is_enabled() else []
+            )
+            for user in users
+        }
+        old_slots = [
+            user.checkin_slot_time
+            for user in users
+            if user.checkin_slot_time is not None and user.checkin_slot_time >= now
+        ]
+        all_slots = {slot for slots in candidates.values() for slot in slots} | set(old_slots)
+        if len(all_slots) == 0:
+            for user in users:
+                user.checkin_slot_time = None
+            return
+
+        stmt = sqlalchemy.select(DailyCheckinSlot).where(
+            DailyCheckinSlot.slot_time.in_(all_slots)
+        )
+        occupancy: dict[datetime, int] = {
+            row.slot_time: row.occupancy for row in (await session.execute(stmt)).scalars()
+        }
+        # 各時段人數的變化量，以增減的方式寫入，不會覆蓋其他交易同時分配的人數
+        delta: collections.Counter[datetime] = collections.Counter()
+        for slot in old_slots:  # 釋放原本分配到的時段
+            occupancy[slot] = max(occupancy.get(slot, 0) - 1, 0)
+            delta[slot] -= 1
+
+        capacity = config.schedule_daily_checkin_slot_capacity
+        for user in users:
+            available = [s for s in candidates[user.discord_id] if occupancy.get(s, 0) < capacity]
+            if len(available) == 0:
+                user.checkin_slot_time = None
+                continue
+            slot = min(available, key=lambda s: (occupancy.get(s, 0), -s.timestamp()))
+            occupancy[slot] = occupancy.get(slot, 0) + 1
+            delta[slot] += 1
+            user.checkin_slot_time = slot
+
+        changed = {slot: count for slot, count in delta.items() if count != 0}
+        if len(changed) > 0:
+            table = DailyCheckinSlot.__table__
+            stmt = sqlite_insert(table).values(
+                slot_time=sqlalchemy.bindparam("_slot_time"),
+                occupancy=sqlalchemy.bindparam("_occupancy"),
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.slot_time],
+                set_={
+                    "occupancy": sqlalchemy.func.max(
+                        table.c.occupancy + sqlalchemy.bindparam("_delta"), 0
+                    )
+                },
+            )
+            await session.execute(
+                stmt,
+                [
+                    {"_slot_time": slot, "_occupancy": max(count, 0), "_delta": count}
+                    for slot, count in changed.items()
+                ],
+            )
+
+    @staticmethod
+    async def release(
+        session: AsyncSession, users: Sequence[ScheduleDailyCheckin], now: datetime
+    ) -> None:
+        """釋放使用者分配到的未來時段，不會提交交易"""
+        counts = collections.Counter(
+            user.checkin_slot_time
+            for user in users
+            if user.checkin_slot_time is not None and user.checkin_slot_time >= now
+        )
+        if len(counts) == 0:
+            return
+        table = DailyCheckinSlot.__table__
+        await session.execute(
+            sqlalchemy.update(table)
+            .where(table.c.slot_time == sqlalchemy.bindparam("_slot_time"))
+            .values(
+                occupancy=sqlalchemy.func.max(
+                    table.c.occupancy - sqlalchemy.bindparam("_count"), 0
+                )
+            ),
+            [{"_slot_time": slot, "_count": count} for slot, count in counts.items()],
+        )
+
+    @classmethod
+    async def remove(cls, whereclause: ColumnExpressionArgument[bool]) -> None:
+        """刪除符合條件的自動簽到使用者，並在同一個交易內釋放他們分配到的時段"""
+        async with Database.transaction() as session:
+            stmt = sqlalchemy.select(ScheduleDailyCheckin).where(whereclause)
+            users = (await session.execute(stmt)).scalars().all()
+            await cls.release(session, users, datetime.now())
+            await Database.delete_where(ScheduleDailyCheckin, whereclause, session=session)
+
+    @classmethod
+    async def cleanup(cls, session: AsyncSession, now: datetime) -> None:
+        """刪除已經過去的時段，不會提交交易"""
+        stmt = sqlalchemy.delete(DailyCheckinSlot).where(
+            DailyCheckinSlot.slot_time < now - cls.slot_length()
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def report(session: AsyncSession, now: datetime) -> None:
+        """匯出未來 24 小時各時段的分配人數到 Prometheus，label 為時段的 "HH:MM" """
+        stmt = sqlalchemy.select(DailyCheckinSlot).where(
+            DailyCheckinSlot.slot_time >= now,
+            DailyCheckinSlot.slot_time < now + timedelta(days=1),
+        )
+        Metrics.SCHEDULE_CHECKIN_SLOT_OCCUPANCY.clear()
+        for row in (await session.execute(stmt)).scalars():
+            Metrics.SCHEDULE_CHECKIN_SLOT_OCCUPANCY.labels(row.slot_time.strftime("%H:%M")).set(
+                row.occupancy
+            )
@@ -0,0 +1,95 @@
+import enum
+import time
+from typing import Final
+
+from utility import LOG
+from utility.prometheus import Metrics
+
+FAILURE_THRESHOLD: Final[int] = 3
+"""連續失敗幾次後斷路"""
+OPEN_SECONDS: Final[float] = 30.0
+"""第一次斷路的時間（單位：秒），之後每次半開測試失敗加倍"""
+MAX_OPEN_SECONDS: Final[float] = 600.0
+"""斷路時間的上限（單位：秒）"""
+LATENCY_SMOOTHING: Final[float] = 0.2
+"""每位使用者處理時間的指數移動平均係數"""
+
+
+class CircuitState(enum.IntEnum):
+    """斷路器狀態，數值會匯出到 Prometheus"""
+
+    CLOSED = 0
+    """正常使用"""
+    HALF_OPEN = 1
+    """斷路時間結束，以少量請求測試是否恢復"""
+    OPEN = 2
+    """斷路中，不分派使用者給此主機"""
+
+
+class HostCircuitBreaker:
+    """自動簽到主機 (LOCAL 或遠端簽到 API) 的斷路器
+
+    - 連續失敗 `FAILURE_THRESHOLD` 次後斷路 (OPEN)，斷路期間不分派使用者，避免使用者卡在故障的主機上
+    - 斷路時間結束後進入半開 (HALF_OPEN)，只分派一位使用者測試，成功則恢復 (CLOSED)，
+      失敗則再次斷路並將斷路時間加倍，最多 `MAX_OPEN_SECONDS` 秒
+    - 記錄每位使用者處理時間的指數移動平均，作為依速度分派使用者的依據
+
+    Attributes
+    -----
+    host: `str`
+        主機名稱
+    state: `CircuitState`
+        目前狀態
+    latency: `float` | `None`
+        每位使用者處理時間的指數移動平均（單位：秒），尚未有紀錄時為 `None`
+    """
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.state = CircuitState.CLOSED
+        self.latency: float | None = None
+        self._failures: int = 0
+        self._open_seconds: float = OPEN_SECONDS
+        self._open_until: float = 0.0
+        Metrics.SCHEDULE_HOST_CIRCUIT_STATE.labels(host).set(self.state)
+
+    @property
+    def retry_in(self) -> float:
+        """距離斷路結束還有多久（單位：秒）"""
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def half_open(self) -> None:
+        """斷路時間結束，進入半開狀態"""
+        self._set_state(CircuitState.HALF_OPEN)
+
+    def record_success(self, latency: float) -> None:
+        """記錄一次成功與每位使用者的處理時間，半開狀態時恢復正常使用"""
+        if self.state != CircuitState.CLOSED:
+            LOG.System(f"自動簽到主機 {self.host} 已恢復，重新分派使用者")
+        self._failures = 0
+        self._open_seconds = OPEN_SECONDS
+        self.latency = (
+            latency
+            if self.latency is None
+            else LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+        self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        """記錄一次失敗，連續失敗達到門檻或半開測試失敗時斷路"""
+        self._failures += 1
+        if self.state == CircuitState.HALF_OPEN:
+            self._open_seconds = min(self._open_seconds * 2, MAX_OPEN_SECONDS)
+        elif self._failures < FAILURE_THRESHOLD:
+            return
+        self.open()
+
+    def open(self) -> None:
+        """斷路，`retry_in` 秒後才能再使用"""
+        self._open_until = time.monotonic() + self._open_seconds
+        LOG.Error(f"自動簽到主機 {self.host} 斷路 {self._open_seconds:.0f} 秒")
+        self._set_state(CircuitState.OPEN)
+
+    def _set_state(self, state: CircuitState) -> None:
+        self.state = state
+        Metrics.SCHEDULE_HOST_CIRCUIT_STATE.labels(self.host).set(state)
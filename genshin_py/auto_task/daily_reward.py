@@ -1,17 +1,44 @@
 import asyncio
+import time
+import uuid
 from datetime import datetime
-from typing import Any, ClassVar, Final
+from typing import Any, ClassVar, NamedTuple
 
 import aiohttp
-import discord
 import sentry_sdk
+import sqlalchemy
 from discord.ext import commands
 
 import database
-from database import Database, GeetestChallenge, ScheduleDailyCheckin, User
+from database import (
+    DailyRewardJournal,
+    Database,
+    GeetestChallenge,
+    ScheduleDailyCheckin,
+    User,
+)
 from utility import LOG, EmbedTemplate, config
+from utility.prometheus import Metrics
 
-from .. import claim_daily_reward
+from .. import (
+    HoyolabOutage,
+    OutageState,
+    claim_daily_reward,
+    error_label,
+    use_schedule_concurrency,
+)
+from .backlog_drain import BacklogDrain
+from .checkin_slot import CheckinSlotAllocator
+from .circuit_breaker import CircuitState, HostCircuitBreaker
+from .outbox import USER_NAME, Outbox
+
+
+class _Completion(NamedTuple):
+    """已簽到但尚未寫入資料庫的使用者"""
+
+    user: ScheduleDailyCheckin
+    host: str
+    message: str | None
 
 
 class DailyReward:
@@ -35,6 +62,15 @@ class DailyReward:
     """簽到絕區零的人數 dict[host, count]"""
     _themis_count: ClassVar[dict[str, int]] = {}
     """簽到未定事件簿的人數 dict[host, count]"""
+    _run_id: ClassVar[str] = ""
+    """目前執行中的排程 ID，對應 `DailyRewardJournal.run_id`"""
+    _pending_completions: ClassVar[list[_Completion]] = []
+    """已簽到但尚未寫入資料庫的使用者，寫入後才發送通知"""
+    _flush_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    _breakers: ClassVar[dict[str, HostCircuitBreaker]] = {}
+    """各簽到主機的斷路器 dict[host, breaker]，跨排程保留狀態"""
+    _session: ClassVar[aiohttp.ClientSession | None] = None
+    """與遠端簽到 API 共用的 session"""
 
     @classmethod
     async def execute(cls, bot: commands.Bot):
@@ -48,6 +84,8 @@ class DailyReward:
         if cls._lock.locked():
             return
         await cls._lock.acquire()
+        start_time = time.perf_counter()
+        use_schedule_concurrency()  # 簽到任務在此之後建立，一併使用自動排程的併發控制器
         try:
             LOG.System("Daily automatic sign-in start")
 
@@ -58,22 +96,24 @@ class DailyReward:
             cls._starrail_count = {}
             cls._zzz_count = {}
             cls._themis_count = {}
-            daily_users = await Database.select_all(ScheduleDailyCheckin)
+            # 若上次的排程在完成前中斷 (例如程序重啟)，從執行紀錄繼續上次的排程
+            resumed = await cls._start_run()
 
-            # 將所有需要簽到的使用者放入佇列 (Producer)
-            for user in daily_users:
-                if user.next_checkin_time < datetime.now():
-                    await queue.put(user)
+            # 分批從資料庫讀取已到簽到時間的使用者放入佇列 (Producer)
+            producer = asyncio.create_task(cls._produce_due_users(queue, resumed))
 
             # 建立本地簽到任務 (Consumer)
-            tasks = [asyncio.create_task(cls._claim_daily_reward_task(queue, "LOCAL", bot))]
+            tasks = [asyncio.create_task(cls._claim_daily_reward_task(queue, "LOCAL"))]
             # 建立遠端簽到任務 (Consumer)
             for host in config.daily_reward_api_list:
-                tasks.append(asyncio.create_task(cls._claim_daily_reward_task(queue, host, bot)))
+                tasks.append(asyncio.create_task(cls._claim_daily_reward_task(queue, host)))
 
+            await producer
             await queue.join()  # 等待所有使用者簽到完成
             for task in tasks:  # 關閉簽到任務
                 task.cancel()
+            await cls._flush_completions()
+            await cls._finish_run()
 
             _log_message = (
                 f"Auto check-in ended: {sum(cls._total.values())} people checked in in total, "
@@ -92,13 +132,218 @@ class DailyReward:
             sentry_sdk.capture_exception(e)
             LOG.Error(f"自動排程 DailyReward 發生錯誤：{e}")
         finally:
+            await cls._flush_completions()
+            if cls._session is not None:  # 關閉與遠端簽到 API 的連線
+                await cls._session.close()
+                cls._session = None
+            Metrics.SCHEDULE_RUN_DURATION.labels("daily_reward").observe(
+                time.perf_counter() - start_time
+            )
             cls._lock.release()
 
     @classmethod
-    async def _claim_daily_reward_task(
-        cls, queue: asyncio.Queue[ScheduleDailyCheckin], host: str, bot: commands.Bot
-    ):
-        """從傳入的 asyncio.Queue 裡面取得使用者，然後進行每日簽到，並根據簽到結果發送訊息給使用者
+    async def _start_run(cls) -> bool:
+        """從執行紀錄取得未完成的排程並還原簽到人數統計，若沒有則建立新的排程 ID
+
+        Returns
+        ------
+        `bool`:
+            是否為繼續上次未完成的排程
+        """
+        J, S = DailyRewardJournal, ScheduleDailyCheckin
+        async with Database.sessionmaker() as session:
+            run_id = (await session.execute(sqlalchemy.select(J.run_id).limit(1))).scalar()
+            if run_id is None:
+                cls._run_id = uuid.uuid4().hex
+                return False
+
+            cls._run_id = run_id
+
+            def _sum(column) -> sqlalchemy.ColumnElement[int]:
+                return sqlalchemy.func.coalesce(
+                    sqlalchemy.func.sum(sqlalchemy.cast(column, sqlalchemy.Integer)), 0
+                )
+
+            stmt = (
+                sqlalchemy.select(
+                    J.host,
+                    sqlalchemy.func.count(),
+                    _sum(S.has_honkai3rd),
+                    _sum(S.has_starrail),
+                    _sum(S.has_zzz),
+                    _sum(S.has_themis) + _sum(S.has_themis_tw),
+                )
+                .join(S, S.discord_id == J.discord_id)
+                .where(J.run_id == run_id, J.state == "done", J.is_counted.is_(True))
+                .group_by(J.host)
+            )
+            for host, total, honkai, starrail, zzz, themis in (await session.execute(stmt)).all():
+                cls._total[host] = total
+                cls._honkai_count[host] = honkai
+                cls._starrail_count[host] = starrail
+                cls._zzz_count[host] = zzz
+                cls._themis_count[host] = themis
+        LOG.System(f"Resume the unfinished daily automatic sign-in: {run_id}")
+        return True
+
+    @classmethod
+    async def _finish_run(cls) -> None:
+        """排程完成，刪除此次排程的執行紀錄"""
+        async with Database.sessionmaker() as session:
+            stmt = sqlalchemy.delete(DailyRewardJournal).where(
+                DailyRewardJournal.run_id == cls._run_id
+            )
+            await session.execute(stmt)
+            await CheckinSlotAllocator.cleanup(session, datetime.now())
+            await session.commit()
+            await CheckinSlotAllocator.report(session, datetime.now())
+
+    @classmethod
+    async def _produce_due_users(
+        cls, queue: asyncio.Queue[ScheduleDailyCheckin], resumed: bool
+    ) -> None:
+        """每次排程以 next_checkin_time 與 checkin_slot_time 索引查詢一次已到簽到時間的使用者 ID，
+        再依 discord_id 分頁讀取使用者資料，寫入執行紀錄後放入佇列；遊戲維護結束後的釋放期內
+        尚未到釋放時間的使用者，以及 Hoyolab 異常時超過可處理人數的使用者，留待之後的排程
+
+        Parameters
+        -----
+        queue: `asyncio.Queue[ScheduleDailyCheckin]`
+            存放需要簽到的使用者的佇列
+        resumed: `bool`
+            是否為繼續上次未完成的排程，是的話改為讀取執行紀錄中尚未簽到的使用者
+        """
+        now = datetime.now()
+        page_size = max(1, config.schedule_daily_checkin_page_size)
+        async with Database.sessionmaker() as session:
+            due_ids = sorted((await session.execute(cls._due_ids_stmt(resumed, now))).scalars())
+        released = pending = 0
+        # Hoyolab 異常時暫停簽到，測試與恢復期間只簽到部分使用者
+        budget: int | None = None
+        if HoyolabOutage.state() != OutageState.NORMAL:
+            budget = HoyolabOutage.admit(len(due_ids))
+        for i in range(0, len(due_ids), page_size):
+            if budget == 0 or HoyolabOutage.is_paused():
+                break
+            # 佇列內尚有一整頁未處理的使用者時，先等待 Consumer 消化
+            while queue.qsize() >= page_size:
+                await asyncio.sleep(1)
+            stmt = (
+                sqlalchemy.select(ScheduleDailyCheckin)
+                .where(ScheduleDailyCheckin.discord_id.in_(due_ids[i : i + page_size]))
+                .order_by(ScheduleDailyCheckin.discord_id)
+            )
+            async with Database.sessionmaker() as session:
+                users = (await session.execute(stmt)).scalars().all()
+                due_users = [
+                    user
+                    for user in users
+                    if BacklogDrain.is_released(user.discord_id, user.due_time, now)
+                ]
+                if budget is not None:
+                    due_users = due_users[:budget]
+                    budget -= len(due_users)
+                if not resumed and len(due_users) > 0:
+                    await session.execute(
+                        sqlalchemy.insert(DailyRewardJournal).prefix_with("OR REPLACE"),
+                        [
+                            {"discord_id": u.discord_id, "run_id": cls._run_id, "state": "queued"}
+                            for u in due_users
+                        ],
+                    )
+                    await session.commit()
+            for user in due_users:
+                queue.put_nowait(user)
+            Metrics.SCHEDULE_QUEUE_DEPTH.labels("daily_reward").set(queue.qsize())
+            released += len(due_users)
+            pending += len(users) - len(due_users)
+        BacklogDrain.report("daily_reward", released, pending, now)
+
+    @staticmethod
+    def _due_ids_stmt(
+        resumed: bool, now: datetime
+    ) -> sqlalchemy.Select[tuple[int]] | sqlalchemy.CompoundSelect:
+        """已到簽到時間的使用者 ID 的查詢；繼續上次的排程時為執行紀錄中尚未簽到的使用者"""
+        if resumed:
+            return sqlalchemy.select(DailyRewardJournal.discord_id).where(
+                DailyRewardJournal.state == "queued"
+            )
+        # 有分配簽到時段的使用者在時段開始時簽到，時段一定早於 next_checkin_time；
+        # 兩個時間分別以索引做範圍查詢後合併，每次排程只執行一次，分頁時不再重複查詢
+        S = ScheduleDailyCheckin
+        return sqlalchemy.union(
+            sqlalchemy.select(S.discord_id).where(S.next_checkin_time < now),
+            sqlalchemy.select(S.discord_id).where(S.checkin_slot_time < now),
+        )
+
+    @classmethod
+    async def _flush_completions(cls) -> None:
+        """將累積的下次簽到時間、執行紀錄與簽到結果通知以單一交易批次寫入資料庫，
+        通知由 Outbox 另外發送，確保收到通知的使用者在程序重啟後不會被重複簽到"""
+        async with cls._flush_lock:
+            if len(cls._pending_completions) == 0:
+                return
+            completions = cls._pending_completions
+            cls._pending_completions = []
+            checkin_table = ScheduleDailyCheckin.__table__
+            update_checkin = (
+                sqlalchemy.update(checkin_table)
+                .where(checkin_table.c.discord_id == sqlalchemy.bindparam("_discord_id"))
+                .values(
+                    next_checkin_time=sqlalchemy.bindparam("_next_checkin_time"),
+                    checkin_slot_time=sqlalchemy.bindparam("_checkin_slot_time"),
+                )
+            )
+            journal_table = DailyRewardJournal.__table__
+            update_journal = (
+                sqlalchemy.update(journal_table)
+                .where(journal_table.c.discord_id == sqlalchemy.bindparam("_discord_id"))
+                .values(
+                    state="done",
+                    host=sqlalchemy.bindparam("_host"),
+                    is_counted=sqlalchemy.bindparam("_is_counted"),
+                )
+            )
+            async with Database.sessionmaker() as session:
+                # 為明天的簽到分配時段，與下次簽到時間在同一個交易內寫入
+                await CheckinSlotAllocator.allocate(
+                    session, [c.user for c in completions], datetime.now()
+                )
+                await session.execute(
+                    update_checkin,
+                    [
+                        {
+                            "_discord_id": c.user.discord_id,
+                            "_next_checkin_time": c.user.next_checkin_time,
+                            "_checkin_slot_time": c.user.checkin_slot_time,
+                        }
+                        for c in completions
+                    ],
+                )
+                await session.execute(
+                    update_journal,
+                    [
+                        {
+                            "_discord_id": c.user.discord_id,
+                            "_host": c.host,
+                            "_is_counted": c.message is not None,
+                        }
+                        for c in completions
+                    ],
+                )
+                await Outbox.put(
+                    session,
+                    [
+                        cls._create_notification(c.user, c.message)
+                        for c in completions
+                        if c.message is not None
+                    ],
+                )
+                await session.commit()
+
+    @classmethod
+    async def _claim_daily_reward_task(cls, queue: asyncio.Queue[ScheduleDailyCheckin], host: str):
+        """從傳入的 asyncio.Queue 裡面取得使用者，然後進行每日簽到，並將簽到結果的通知寫入 Outbox
 
         Parameters
         -----
@@ -108,57 +353,128 @@ class DailyReward:
             簽到的主機
             - 本地：固定為字串 "LOCAL"
             - 遠端：簽到 API 網址
-
-        bot: `commands.Bot`
-            Discord 機器人客戶端
         """
         LOG.Info(f"自動排程簽到任務開始：{host}")
-        if host != "LOCAL":
-            # 先測試 API 是否正常
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.get(host) as resp:
-                        if resp.status != 200:
-                            raise Exception(f"Http 狀態碼 {resp.status}")
-                except Exception as e:
-                    sentry_sdk.capture_exception(e)
-                    LOG.Error(f"自動排程 DailyReward 測試 API {host} 時發生錯誤：{e}")
-                    return
+        # 建立斷路器時會重設 Prometheus 狀態，只在第一次使用此主機時建立
+        if host not in cls._breakers:
+            cls._breakers[host] = HostCircuitBreaker(host)
+        breaker = cls._breakers[host]
+        # 斷路中的主機等斷路結束後再測試，其他主機先測試 API 是否正常
+        if breaker.state != CircuitState.OPEN and not await cls._probe_host(host):
+            breaker.open()
 
-        cls._total[host] = 0  # 初始化簽到人數
-        cls._honkai_count[host] = 0  # 初始化簽到崩壞3的人數
-        cls._starrail_count[host] = 0  # 初始化簽到星穹鐵道的人數
-        cls._zzz_count[host] = 0  # 初始化簽到絕區零的人數
-        cls._themis_count[host] = 0  # 初始化簽到未定事件簿的人數
-        MAX_API_ERROR_COUNT: Final[int] = 20  # 遠端 API 發生錯誤的最大次數
-        api_error_count = 0  # 遠端 API 發生錯誤的次數
+        # 初始化簽到人數 (繼續上次的排程時保留從執行紀錄還原的人數)
+        cls._total.setdefault(host, 0)  # 簽到人數
+        cls._honkai_count.setdefault(host, 0)  # 簽到崩壞3的人數
+        cls._starrail_count.setdefault(host, 0)  # 簽到星穹鐵道的人數
+        cls._zzz_count.setdefault(host, 0)  # 簽到絕區零的人數
+        cls._themis_count.setdefault(host, 0)  # 簽到未定事件簿的人數
 
         while True:
-            user = await queue.get()
+            if breaker.state == CircuitState.OPEN:
+                # 斷路期間不取出使用者，斷路結束後測試 API，恢復正常的主機在排程中途重新加入
+                await asyncio.sleep(breaker.retry_in)
+                breaker.half_open()
+                if not await cls._probe_host(host):
+                    breaker.record_failure()
+                    continue
+
+            users = [await queue.get()]
+            if HoyolabOutage.is_paused():
+                # Hoyolab 異常，不簽到取出的使用者，下次簽到時間不變，留待之後的排程
+                queue.task_done()
+                continue
+            # 遠端批次簽到時，佇列內有其他使用者則一起取出，速度越快的主機一次取出越多人
+            batch_size = cls._batch_size(host)
+            while len(users) < batch_size and not queue.empty():
+                users.append(queue.get_nowait())
+            Metrics.SCHEDULE_QUEUE_DEPTH.labels("daily_reward").set(queue.qsize())
+            for user in users:
+                Metrics.SCHEDULE_LAG.labels("daily_reward").observe(
+                    max((datetime.now() - user.due_time).total_seconds(), 0.0)
+                )
+            results: dict[int, str | None] = {}
+            start_time = time.perf_counter()
             try:
-                message = await cls._claim_daily_reward(host, user)
+                if len(users) == 1:
+                    results[users[0].discord_id] = await cls._claim_daily_reward(host, users[0])
+                else:
+                    results = await cls._claim_remote_daily_rewards(host, users)
+                if len(results) < len(users):
+                    raise Exception(f"{host} 沒有回傳部分使用者的簽到結果")
             except Exception as e:
-                await queue.put(user)  # 簽到發生異常，將使用者放回佇列
-                api_error_count += 1
-                LOG.Error(f"遠端 API：{host} 發生錯誤 ({api_error_count}/{MAX_API_ERROR_COUNT})")
-                # 如果發生錯誤超過 MAX_API_ERROR_COUNT 次，則停止簽到任務
-                if api_error_count >= MAX_API_ERROR_COUNT:
+                Metrics.SCHEDULE_ERRORS.labels("daily_reward", error_label(e)).inc()
+                LOG.Error(f"自動排程 DailyReward 主機 {host} 發生錯誤：{e}")
+                breaker.record_failure()
+                if breaker.state == CircuitState.OPEN:
                     sentry_sdk.capture_exception(e)
-                    return
             else:
-                # 簽到成功後，更新資料庫中的簽到日期、發送訊息給使用者、更新計數器
+                breaker.record_success((time.perf_counter() - start_time) / len(users))
+
+            # 簽到期間判定 Hoyolab 異常時，錯誤已被轉為訊息，不記錄簽到完成，
+            # 下次簽到時間與執行紀錄不變，留待 Hoyolab 恢復後的排程重新簽到
+            is_paused = HoyolabOutage.is_paused()
+            for user in users:
+                if is_paused:
+                    continue
+                if user.discord_id not in results:
+                    await queue.put(user)  # 簽到發生異常，將使用者放回佇列交給其他主機
+                    continue
+                # 簽到成功後，更新簽到日期並更新計數器，每累積一定人數才批次寫入資料庫並發送訊息給使用者
+                message = results[user.discord_id]
                 user.update_next_checkin_time()
-                await Database.insert_or_replace(user)
+                cls._pending_completions.append(_Completion(user, host, message))
+                Metrics.SCHEDULE_DAILY_CHECKIN_USERS.labels(host).inc()
                 if message is not None:
-                    await cls._send_message(bot, user, message)
                     cls._total[host] += 1
                     cls._honkai_count[host] += int(user.has_honkai3rd)
                     cls._starrail_count[host] += int(user.has_starrail)
                     cls._zzz_count[host] += int(user.has_zzz)
                     cls._themis_count[host] += int(user.has_themis) + int(user.has_themis_tw)
-                    await asyncio.sleep(config.schedule_loop_delay)
+            # 寫入資料庫後才標記完成，否則 queue.join() 可能在寫入途中返回，關閉簽到任務時中斷寫入
+            try:
+                if len(cls._pending_completions) >= config.schedule_daily_checkin_commit_batch:
+                    await cls._flush_completions()
             finally:
-                queue.task_done()
+                for _ in users:
+                    queue.task_done()
+            if any(message is not None for message in results.values()):
+                await asyncio.sleep(config.schedule_loop_delay)
+
+    @classmethod
+    async def _probe_host(cls, host: str) -> bool:
+        """測試簽到主機是否正常，本地簽到不需測試"""
+        if host == "LOCAL":
+            return True
+        try:
+            async with cls._get_session().get(host) as resp:
+                if resp.status != 200:
+                    raise Exception(f"Http 狀態碼 {resp.status}")
+        except Exception as e:
+            LOG.Error(f"自動排程 DailyReward 測試 API {host} 時發生錯誤：{e}")
+            return False
+        return True
+
+    @classmethod
+    def _batch_size(cls, host: str) -> int:
+        """依各主機每位使用者的平均處理時間，決定此主機一次簽到的人數
+
+        最快的正常主機一次簽到 `config.daily_reward_api_batch_size` 人，其他主機依速度比例減少；
+        本地簽到與半開測試中的主機一次只簽到一人
+        """
+        breaker = cls._breakers[host]
+        if host == "LOCAL" or breaker.state != CircuitState.CLOSED or breaker.latency is None:
+            return 1
+        max_batch_size = max(1, config.daily_reward_api_batch_size)
+        if breaker.latency <= 0:
+            return max_batch_size
+        latencies = [
+            b.latency
+            for h, b in cls._breakers.items()
+            if h != "LOCAL" and b.state == CircuitState.CLOSED and b.latency is not None
+        ]
+        fastest = min(latencies, default=breaker.latency)
+        return max(1, round(max_batch_size * fastest / breaker.latency))
 
     @classmethod
     async def _claim_daily_reward(cls, host: str, user: ScheduleDailyCheckin) -> str | None:
@@ -187,6 +503,7 @@ class DailyReward:
         if host == "LOCAL":  # 本地簽到
             message = await claim_daily_reward(
                 user.discord_id,
+                metric_task="daily_reward",
                 has_genshin=user.has_genshin,
                 has_honkai3rd=user.has_honkai3rd,
                 has_starrail=user.has_starrail,
@@ -196,67 +513,133 @@ class DailyReward:
             )
             return message
         else:  # 遠端 API 簽到
-            # 為了有 cookie，所以這裡從資料庫取得 User Table 的資料
-            user_data = await Database.select_one(User, User.discord_id.is_(user.discord_id))
-            gt_challenge = await Database.select_one(
-                GeetestChallenge, GeetestChallenge.discord_id.is_(user.discord_id)
-            )
-            if user_data is None:
-                return None
+            results = await cls._claim_remote_daily_rewards(host, [user])
+            if user.discord_id not in results:
+                raise Exception(f"{host} 沒有回傳簽到結果")
+            return results[user.discord_id]
+
+    @classmethod
+    async def _claim_remote_daily_rewards(
+        cls, host: str, users: list[ScheduleDailyCheckin]
+    ) -> dict[int, str | None]:
+        """透過遠端 API 為多位使用者進行每日簽到
+
+        `config.daily_reward_api_batch_size` 大於 1 時，以 JSON 陣列一次傳送所有使用者到
+        `{host}/daily-reward/batch`，遠端 API 回傳 `[{"discord_id": int, "message": str}, ...]`；
+        否則每次傳送一位使用者到 `{host}/daily-reward`，遠端 API 回傳 `{"message": str}`
+
+        Returns
+        -------
+        dict[int, str | None]
+            dict[discord_id, 簽到結果訊息]；None 表示跳過此使用者，遠端 API 沒有回傳結果的使用者不會在內
+
+        Raises
+        ------
+        Exception
+            遠端 API 的 HTTP 狀態碼不是 200 時拋出
+        """
+        results: dict[int, str | None] = {}
+        payloads: list[dict[str, Any]] = []
+        # 為了有 cookie，以單一查詢從資料庫取得所有使用者的 User 與 GeetestChallenge 資料
+        accounts = await cls._get_accounts([user.discord_id for user in users])
+        for user in users:
+            if (account := accounts.get(user.discord_id)) is None:
+                results[user.discord_id] = None
+                continue
+            user_data, gt_challenge = account
             check, msg = await database.Tool.check_user(user_data)
             if check is False:
-                return msg
-            payload: dict[str, Any] = {
-                "discord_id": user.discord_id,
-                "uid": 0,
-                "cookie": user_data.cookie_default,
-                "cookie_genshin": user_data.cookie_genshin,
-                "cookie_honkai3rd": user_data.cookie_honkai3rd,
-                "cookie_starrail": user_data.cookie_starrail,
-                "cookie_zzz": user_data.cookie_zzz,
-                "cookie_themis": user_data.cookie_themis,
-                "has_genshin": "true" if user.has_genshin else "false",
-                "has_honkai": "true" if user.has_honkai3rd else "false",
-                "has_starrail": "true" if user.has_starrail else "false",
-                "has_zzz": "true" if user.has_zzz else "false",
-                "has_themis": "true" if user.has_themis else "false",
-                "has_themis_tw": "true" if user.has_themis_tw else "false",
-            }
-            if gt_challenge is not None:
-                payload.update(
-                    {
-                        "geetest_genshin": gt_challenge.genshin,
-                        "geetest_honkai3rd": gt_challenge.honkai3rd,
-                        "geetest_starrail": gt_challenge.starrail,
-                    }
-                )
-            async with aiohttp.ClientSession() as session:
+                results[user.discord_id] = msg
+                continue
+            payloads.append(cls._remote_payload(user, user_data, gt_challenge))
+
+        if len(payloads) == 0:
+            return results
+        session = cls._get_session()
+        if config.daily_reward_api_batch_size > 1:  # 批次簽到
+            async with session.post(url=host + "/daily-reward/batch", json=payloads) as resp:
+                if resp.status != 200:
+                    raise Exception(f"{host} 批次簽到失敗，HTTP 狀態碼：{resp.status}")
+                items: list[dict[str, Any]] = await resp.json()
+            for item in items:
+                results[int(item["discord_id"])] = item.get("message", "遠端 API 簽到失敗")
+        else:
+            for payload in payloads:
                 async with session.post(url=host + "/daily-reward", json=payload) as resp:
-                    if resp.status == 200:
-                        result: dict[str, str] = await resp.json()
-                        message = result.get("message", "遠端 API 簽到失敗")
-                        return message
-                    else:
+                    if resp.status != 200:
                         raise Exception(f"{host} 簽到失敗，HTTP 狀態碼：{resp.status}")
+                    result: dict[str, str] = await resp.json()
+                results[payload["discord_id"]] = result.get("message", "遠端 API 簽到失敗")
+        return results
+
+    @staticmethod
+    async def _get_accounts(
+        discord_ids: list[int],
+    ) -> dict[int, tuple[User, GeetestChallenge | None]]:
+        """以單一查詢取得多位使用者的 User 與 GeetestChallenge 資料"""
+        stmt = (
+            sqlalchemy.select(User, GeetestChallenge)
+            .outerjoin(GeetestChallenge, GeetestChallenge.discord_id == User.discord_id)
+            .where(User.discord_id.in_(discord_ids))
+        )
+        async with Database.sessionmaker() as session:
+            rows = (await session.execute(stmt)).all()
+        return {user.discord_id: (user, gt_challenge) for user, gt_challenge in rows}
+
+    @staticmethod
+    def _remote_payload(
+        user: ScheduleDailyCheckin, user_data: User, gt_challenge: GeetestChallenge | None
+    ) -> dict[str, Any]:
+        """建立傳給遠端簽到 API 的使用者資料"""
+        payload: dict[str, Any] = {
+            "discord_id": user.discord_id,
+            "uid": 0,
+            "cookie": user_data.cookie_default,
+            "cookie_genshin": user_data.cookie_genshin,
+            "cookie_honkai3rd": user_data.cookie_honkai3rd,
+            "cookie_starrail": user_data.cookie_starrail,
+            "cookie_zzz": user_data.cookie_zzz,
+            "cookie_themis": user_data.cookie_themis,
+            "has_genshin": "true" if user.has_genshin else "false",
+            "has_honkai": "true" if user.has_honkai3rd else "false",
+            "has_starrail": "true" if user.has_starrail else "false",
+            "has_zzz": "true" if user.has_zzz else "false",
+            "has_themis": "true" if user.has_themis else "false",
+            "has_themis_tw": "true" if user.has_themis_tw else "false",
+        }
+        if gt_challenge is not None:
+            payload.update(
+                {
+                    "geetest_genshin": gt_challenge.genshin,
+                    "geetest_honkai3rd": gt_challenge.honkai3rd,
+                    "geetest_starrail": gt_challenge.starrail,
+                }
+            )
+        return payload
 
     @classmethod
-    async def _send_message(cls, bot: commands.Bot, user: ScheduleDailyCheckin, message: str):
-        """向使用者發送簽到結果的訊息"""
-        try:
-            _id = user.discord_channel_id
-            channel = bot.get_channel(_id) or await bot.fetch_channel(_id)
-            # 若不用@提及使用者，則先取得此使用者的名稱然後發送訊息
-            if user.is_mention is False and "Cookie已失效" not in message:
-                _user = await bot.fetch_user(user.discord_id)
-                await channel.send(embed=EmbedTemplate.normal(f"Automatic sign-in: {_user.name}：{message}"))  # type: ignore
-            else:  # 若需要@提及使用者或是 Cookie 已失效
-                await channel.send(f"<@{user.discord_id}>", embed=EmbedTemplate.normal(f"Automatic sign-in: {message}"))  # type: ignore
-        except (
-            discord.Forbidden,
-            discord.NotFound,
-            discord.InvalidData,
-        ) as e:  # 發送訊息失敗，移除此使用者
-            LOG.Except(f"Failed to send message, remove this user. {LOG.User(user.discord_id)}：{e}")
-            await Database.delete_instance(user)
-        except Exception as e:
-            sentry_sdk.capture_exception(e)
+    def _get_session(cls) -> aiohttp.ClientSession:
+        """取得與遠端簽到 API 共用的 session，同一次排程內重複使用已建立的連線"""
+        if cls._session is None or cls._session.closed:
+            cls._session = aiohttp.ClientSession()
+        return cls._session
+
+    @staticmethod
+    def _create_notification(user: ScheduleDailyCheckin, message: str) -> dict[str, Any]:
+        """建立簽到結果的通知，交給 Outbox 與同頻道的其他使用者合併發送"""
+        # 若不用@提及使用者，則在發送時將 USER_NAME 替換成此使用者的名稱
+        if user.is_mention is False and "Cookie已失效" not in message:
+            return Outbox.create(
+                user,
+                user.discord_channel_id,
+                "",
+                EmbedTemplate.normal(f"Automatic sign-in: {USER_NAME}：{message}"),
+                resolve_name=True,
+            )
+        else:  # 若需要@提及使用者或是 Cookie 已失效
+            return Outbox.create(
+                user,
+                user.discord_channel_id,
+                f"<@{user.discord_id}>",
+                EmbedTemplate.normal(f"Automatic sign-in: {message}"),
+            )
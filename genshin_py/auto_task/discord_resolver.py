@@ -0,0 +1,49 @@
+from typing import Final
+
+import discord
+from discord.ext import commands
+
+from utility import AsyncTTLCache, config
+
+CACHE_MAXSIZE: Final[int] = 10000
+"""頻道、使用者快取各自的最大數量"""
+
+ChannelType = discord.abc.GuildChannel | discord.abc.PrivateChannel | discord.Thread
+
+
+class DiscordResolver:
+    """自動排程共用的 Discord 頻道與使用者查詢，先使用 bot 的本地快取，找不到時才呼叫 REST API，
+    並將 API 的結果 (包含 NotFound、Forbidden) 快取一段時間，避免每次排程都重複查詢相同的頻道與使用者
+    """
+
+    def __init__(self) -> None:
+        self._channels: AsyncTTLCache[int, ChannelType] = AsyncTTLCache(
+            "discord_channel",
+            CACHE_MAXSIZE,
+            lambda: config.schedule_discord_cache_ttl,
+            lambda: config.schedule_discord_negative_cache_ttl,
+            (discord.NotFound, discord.Forbidden),
+        )
+        self._users: AsyncTTLCache[int, discord.User] = AsyncTTLCache(
+            "discord_user",
+            CACHE_MAXSIZE,
+            lambda: config.schedule_discord_cache_ttl,
+            lambda: config.schedule_discord_negative_cache_ttl,
+            (discord.NotFound, discord.Forbidden),
+        )
+
+    async def get_channel(self, bot: commands.Bot, channel_id: int) -> ChannelType:
+        """取得頻道，找不到時拋出 `discord.NotFound`、沒有權限時拋出 `discord.Forbidden`"""
+        if (channel := bot.get_channel(channel_id)) is not None:
+            return channel
+        return await self._channels.get_or_load(channel_id, lambda: bot.fetch_channel(channel_id))
+
+    async def get_user(self, bot: commands.Bot, user_id: int) -> discord.User:
+        """取得使用者，找不到時拋出 `discord.NotFound`"""
+        if (user := bot.get_user(user_id)) is not None:
+            return user
+        return await self._users.get_or_load(user_id, lambda: bot.fetch_user(user_id))
+
+
+discord_resolver = DiscordResolver()
+"""自動排程共用的 Discord 頻道與使用者查詢"""
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Final
+
+import discord
+import sentry_sdk
+from discord.ext import commands
+
+from utility import TokenBucket
+from utility.prometheus import Metrics
+
+from .discord_resolver import discord_resolver
+
+MAX_CONTENT_LENGTH: Final[int] = 2000
+"""Discord 單一訊息文字內容的長度上限"""
+MAX_EMBEDS: Final[int] = 10
+"""Discord 單一訊息 embed 的數量上限"""
+MAX_EMBEDS_LENGTH: Final[int] = 6000
+"""Discord 單一訊息所有 embed 加總的字數上限"""
+
+
+@dataclass
+class Notification:
+    """要發送到頻道的一則通知"""
+
+    discord_id: int
+    """通知對象的使用者 Discord ID"""
+    content: str
+    """訊息文字內容 (例如：@使用者)，合併訊息時以換行分隔"""
+    embed: discord.Embed | None = None
+    """訊息的 embed"""
+    on_failed: Callable[[Exception], Awaitable[None]] | None = None
+    """因為沒有權限、頻道不存在而發送失敗時呼叫"""
+    on_sent: Callable[[discord.Message], Awaitable[None]] | None = None
+    """訊息成功發送後呼叫，參數為包含此通知的訊息"""
+
+
+class NotificationDispatcher:
+    """將同一頻道的自動排程通知合併成盡量少的 Discord 訊息發送，
+    避免大量使用者共用同一個提醒頻道時觸發 Discord 的單一頻道速率限制；
+    通知由寄件匣 (`Outbox`) 定期讀取後依頻道分組交給本類別發送
+
+    Methods
+    -----
+    send(bot, channel_id, notifications)
+        將同一頻道的通知合併發送
+    """
+
+    def __init__(self) -> None:
+        self.notifications: int = 0
+        """已發送的通知數量"""
+        self.messages: int = 0
+        """實際呼叫 channel.send 的次數"""
+
+    @property
+    def saved_calls(self) -> int:
+        """合併訊息所節省的 Discord API 呼叫次數"""
+        return self.notifications - self.messages
+
+    async def send(
+        self,
+        bot: commands.Bot,
+        channel_id: int,
+        notifications: list[Notification],
+        rate_limiter: TokenBucket | None = None,
+    ) -> None:
+        """將同一頻道的通知分成符合 Discord 限制的訊息後發送，有傳入限速器時每則訊息發送前先取得 token"""
+        try:
+            channel = await discord_resolver.get_channel(bot, channel_id)
+        except (discord.Forbidden, discord.NotFound, discord.InvalidData) as e:
+            await self._on_failed(notifications, e)
+            return
+
+        for chunk in self._split(notifications):
+            content = "\n".join([n.content for n in chunk if len(n.content) > 0])
+            embeds = [n.embed for n in chunk if n.embed is not None]
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            try:
+                msg_sent = await channel.send(content or None, embeds=embeds)  # type: ignore
+            except (discord.Forbidden, discord.NotFound, discord.InvalidData) as e:
+                await self._on_failed(chunk, e)
+                continue
+            except Exception as e:
+                sentry_sdk.capture_exception(e)
+                continue
+            self.messages += 1
+            self.notifications += len(chunk)
+            Metrics.SCHEDULE_MESSAGES_SENT.inc()
+            Metrics.SCHEDULE_NOTIFICATIONS_SENT.inc(len(chunk))
+            for n in chunk:
+                if n.on_sent is not None:
+                    await n.on_sent(msg_sent)
+
+    @staticmethod
+    def _split(notifications: list[Notification]) -> list[list[Notification]]:
+        """依照 Discord 訊息的文字長度、embed 數量與字數上限，將通知分組"""
+        chunks: list[list[Notification]] = []
+        chunk: list[Notification] = []
+        content_length = embeds_count = embeds_length = 0
+        for n in notifications:
+            _content_length = len(n.content) + 1
+            _embed_length = len(n.embed) if n.embed is not None else 0
+            _embed_count = 1 if n.embed is not None else 0
+            if len(chunk) > 0 and (
+                content_length + _content_length > MAX_CONTENT_LENGTH
+                or embeds_count + _embed_count > MAX_EMBEDS
+                or embeds_length + _embed_length > MAX_EMBEDS_LENGTH
+            ):
+                chunks.append(chunk)
+                chunk = []
+                content_length = embeds_count = embeds_length = 0
+            chunk.append(n)
+            content_length += _content_length
+            embeds_count += _embed_count
+            embeds_length += _embed_length
+        if len(chunk) > 0:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    async def _on_failed(notifications: list[Notification], exception: Exception) -> None:
+        for n in notifications:
+            if n.on_failed is not None:
+                await n.on_failed(exception)
+
+
+notification_dispatcher = NotificationDispatcher()
+"""自動排程共用的通知發送器"""
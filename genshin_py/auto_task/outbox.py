@@ -0,0 +1,266 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, ClassVar, Final, Sequence
+
+import discord
+import sentry_sdk
+import sqlalchemy
+from discord.ext import commands
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import (
+    Database,
+    GenshinScheduleNotes,
+    NotificationOutbox,
+    ScheduleDailyCheckin,
+    StarrailScheduleNotes,
+    ZZZScheduleNotes,
+)
+from utility import LOG, TokenBucket, config
+from utility.prometheus import Metrics
+
+from .checkin_slot import CheckinSlotAllocator
+from .discord_resolver import discord_resolver
+from .message_dispatcher import Notification, notification_dispatcher
+
+USER_NAME: Final[str] = "{user_name}"
+"""embed 說明內要在發送前替換成使用者名稱的字串"""
+BATCH_SIZE: Final[int] = 500
+"""每次從寄件匣讀取的通知數量"""
+MAX_ATTEMPTS: Final[int] = 8
+"""通知最多嘗試發送的次數，超過後捨棄"""
+RETRY_SECONDS: Final[float] = 30.0
+"""第一次重試的等待時間（單位：秒），之後每次加倍，最多 1 小時"""
+
+T_Source = ScheduleDailyCheckin | GenshinScheduleNotes | StarrailScheduleNotes | ZZZScheduleNotes
+
+_SOURCE_TABLES: dict[str, type[T_Source]] = {
+    table.__tablename__: table
+    for table in (
+        ScheduleDailyCheckin,
+        GenshinScheduleNotes,
+        StarrailScheduleNotes,
+        ZZZScheduleNotes,
+    )
+}
+"""dict[資料表名稱, 排程資料表]"""
+
+
+class Outbox:
+    """自動排程通知的寄件匣
+
+    排程只將產生的通知寫入資料庫 (`NotificationOutbox`)，不等待 Discord 發送，
+    由獨立的發送器定期讀取寄件匣，以自己的同時發送數量與限速合併發送，
+    Discord 的速度不會拖慢簽到與檢查即時便箋，程序重啟後尚未發送的通知也會繼續發送
+
+    Methods
+    -----
+    create(source, channel_id, content, embed, ...)
+        建立一則通知的資料
+    put(session, rows)
+        在呼叫者的交易內寫入通知，與排程的狀態一起提交
+    enqueue(rows)
+        寫入通知
+    execute(bot)
+        發送寄件匣內到期的所有通知
+    """
+
+    _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    _rate_limiter: ClassVar[TokenBucket] = TokenBucket(lambda: config.schedule_outbox_rate_limit)
+    """所有頻道共用的 Discord 訊息限速器，速率可透過 /config 指令即時調整"""
+
+    @staticmethod
+    def create(
+        source: T_Source,
+        channel_id: int,
+        content: str,
+        embed: discord.Embed | None,
+        *,
+        resolve_name: bool = False,
+        check_mention: bool = False,
+    ) -> dict[str, Any]:
+        """建立一則通知的資料
+
+        Parameters
+        ------
+        source: `T_Source`
+            產生通知的使用者，發送失敗時從此資料表移除
+        channel_id: `int`
+            發送通知的 Discord 頻道 ID
+        content: `str`
+            訊息文字內容
+        embed: `discord.Embed` | `None`
+            訊息的 embed
+        resolve_name: `bool`
+            發送前是否將 embed 說明內的 `USER_NAME` 替換成使用者名稱
+        check_mention: `bool`
+            發送後是否檢查使用者在頻道內
+        """
+        return {
+            "discord_id": source.discord_id,
+            "channel_id": channel_id,
+            "source": source.__tablename__,
+            "content": content,
+            "embed": embed.to_dict() if embed is not None else None,
+            "resolve_name": resolve_name,
+            "check_mention": check_mention,
+            "attempts": 0,
+            "next_attempt_time": datetime.now(),
+        }
+
+    @staticmethod
+    async def put(session: AsyncSession, rows: Sequence[dict[str, Any]]) -> None:
+        """在呼叫者的交易內寫入通知，不會提交交易"""
+        if len(rows) > 0:
+            await session.execute(sqlalchemy.insert(NotificationOutbox), rows)
+
+    @classmethod
+    async def enqueue(cls, rows: Sequence[dict[str, Any]]) -> None:
+        """寫入通知"""
+        async with Database.transaction() as session:
+            await cls.put(session, rows)
+
+    @classmethod
+    async def execute(cls, bot: commands.Bot) -> None:
+        """發送寄件匣內到期的所有通知，同一頻道的通知合併發送
+
+        Parameters
+        -----
+        bot: `commands.Bot`
+            Discord 機器人客戶端
+        """
+        if cls._lock.locked():
+            return
+        async with cls._lock:
+            saved_calls = notification_dispatcher.saved_calls
+            total = 0
+            last_id = 0
+            while True:
+                now = datetime.now()
+                stmt = (
+                    sqlalchemy.select(NotificationOutbox)
+                    .where(NotificationOutbox.next_attempt_time <= now)
+                    .where(NotificationOutbox.id > last_id)
+                    .order_by(NotificationOutbox.id)
+                    .limit(BATCH_SIZE)
+                )
+                async with Database.sessionmaker() as session:
+                    rows = (await session.execute(stmt)).scalars().all()
+                    count = sqlalchemy.select(sqlalchemy.func.count(NotificationOutbox.id))
+                    Metrics.SCHEDULE_OUTBOX_PENDING.set(await session.scalar(count) or 0)
+                if len(rows) == 0:
+                    break
+                await cls._send_batch(bot, rows)
+                total += len(rows)
+                last_id = rows[-1].id
+            if total > 0:
+                LOG.System(
+                    f"Scheduled notifications: {total} processed, merged notifications saved "
+                    + f"{notification_dispatcher.saved_calls - saved_calls} Discord API calls"
+                )
+
+    @classmethod
+    async def _send_batch(cls, bot: commands.Bot, rows: Sequence[NotificationOutbox]) -> None:
+        """依頻道分組發送通知，完成 (發送成功或永久失敗) 的通知從寄件匣刪除，其餘延後重試"""
+        done: set[int] = set()
+        by_channel: dict[int, list[NotificationOutbox]] = {}
+        for row in rows:
+            by_channel.setdefault(row.channel_id, []).append(row)
+        semaphore = asyncio.Semaphore(max(1, config.schedule_outbox_concurrency))
+
+        async def send_channel(channel_id: int, channel_rows: list[NotificationOutbox]) -> None:
+            async with semaphore:
+                notifications = [await cls._to_notification(bot, row, done) for row in channel_rows]
+                await notification_dispatcher.send(
+                    bot,
+                    channel_id,
+                    [n for n in notifications if n is not None],
+                    rate_limiter=cls._rate_limiter,
+                )
+
+        results = await asyncio.gather(
+            *[send_channel(channel_id, group) for channel_id, group in by_channel.items()],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                sentry_sdk.capture_exception(result)
+                LOG.Error(f"自動排程發送通知時發生錯誤：{result}")
+
+        now = datetime.now()
+        retry = [row for row in rows if row.id not in done and row.attempts + 1 < MAX_ATTEMPTS]
+        retry_ids = {row.id for row in retry}
+        dropped = len(rows) - len(done) - len(retry)
+        if dropped > 0:
+            LOG.Error(f"自動排程有 {dropped} 則通知超過最大嘗試次數，已捨棄")
+        async with Database.sessionmaker() as session:
+            await session.execute(
+                sqlalchemy.delete(NotificationOutbox).where(
+                    NotificationOutbox.id.in_([row.id for row in rows if row.id not in retry_ids])
+                )
+            )
+            if len(retry) > 0:
+                table = NotificationOutbox.__table__
+                await session.execute(
+                    sqlalchemy.update(table)
+                    .where(table.c.id == sqlalchemy.bindparam("_id"))
+                    .values(
+                        attempts=sqlalchemy.bindparam("_attempts"),
+                        next_attempt_time=sqlalchemy.bindparam("_next_attempt_time"),
+                    ),
+                    [
+                        {
+                            "_id": row.id,
+                            "_attempts": row.attempts + 1,
+                            "_next_attempt_time": now
+                            + timedelta(seconds=min(RETRY_SECONDS * 2**row.attempts, 3600)),
+                        }
+                        for row in retry
+                    ],
+                )
+            await session.commit()
+
+    @classmethod
+    async def _to_notification(
+        cls, bot: commands.Bot, row: NotificationOutbox, done: set[int]
+    ) -> Notification | None:
+        """將寄件匣的資料轉換成 `Notification`，發送成功或永久失敗時將 ID 加入 done"""
+
+        async def on_failed(e: Exception) -> None:  # 發送訊息失敗，移除此使用者
+            done.add(row.id)
+            LOG.Except(f"自動排程發送通知失敗，移除此使用者 {LOG.User(row.discord_id)}：{e}")
+            await cls._remove_user(row)
+
+        async def on_sent(msg_sent: discord.Message) -> None:  # 成功發送訊息
+            done.add(row.id)
+            # 若使用者不在發送訊息的頻道則移除
+            if row.check_mention and not (
+                msg_sent.mention_everyone or any(m.id == row.discord_id for m in msg_sent.mentions)
+            ):
+                LOG.Except(f"自動排程通知的使用者不在頻道，移除此使用者 {LOG.User(row.discord_id)}")
+                await cls._remove_user(row)
+
+        embed = discord.Embed.from_dict(row.embed) if row.embed is not None else None
+        if row.resolve_name and embed is not None and embed.description is not None:
+            try:
+                user = await discord_resolver.get_user(bot, row.discord_id)
+            except (discord.Forbidden, discord.NotFound, discord.InvalidData) as e:
+                await on_failed(e)
+                return None
+            except Exception as e:  # 暫時性的錯誤，之後重試
+                sentry_sdk.capture_exception(e)
+                return None
+            embed.description = embed.description.replace(USER_NAME, user.name, 1)
+        return Notification(
+            row.discord_id, row.content, embed, on_failed=on_failed, on_sent=on_sent
+        )
+
+    @staticmethod
+    async def _remove_user(row: NotificationOutbox) -> None:
+        """從產生通知的排程資料表移除使用者"""
+        if (table := _SOURCE_TABLES.get(row.source)) is None:
+            return
+        if table is ScheduleDailyCheckin:  # 一併釋放使用者分配到的簽到時段
+            await CheckinSlotAllocator.remove(ScheduleDailyCheckin.discord_id == row.discord_id)
+        else:
+            await Database.delete(table, table.discord_id.is_(row.discord_id))
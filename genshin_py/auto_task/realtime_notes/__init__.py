@@ -1 +1,2 @@
 from .realtime_notes import RealtimeNotes
+from .remote import RemoteNotes
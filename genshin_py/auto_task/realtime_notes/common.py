@@ -5,8 +5,18 @@ import discord
 import genshin
 
 from database import Database, GenshinScheduleNotes, StarrailScheduleNotes, ZZZScheduleNotes
+from utility.prometheus import Metrics
 
-from ... import errors, get_genshin_notes, get_starrail_notes, get_zzz_notes
+from ... import (
+    HoyolabOutage,
+    UserClientFactory,
+    error_label,
+    errors,
+    get_genshin_notes,
+    get_starrail_notes,
+    get_zzz_notes,
+)
+from .remote import RemoteHostError, RemoteNotes
 
 T_User = TypeVar("T_User", GenshinScheduleNotes, StarrailScheduleNotes)
 
@@ -19,18 +29,33 @@ class CheckResult(NamedTuple):
 
 
 async def get_realtime_notes(
-    user: T_User,
+    user: T_User, host: str = "LOCAL", clients: UserClientFactory | None = None
 ) -> genshin.models.Notes | genshin.models.StarRailNote | genshin.models.ZZZNotes | None:
-    """根據傳入的使用者取得即時便箋，若發生 InternalDatabaseError 以外的例外則拋出"""
+    """根據傳入的使用者取得即時便箋，若發生 InternalDatabaseError 以外的例外則拋出
+
+    host 為 "LOCAL" 時在本地向 Hoyolab 請求，否則交給該遠端 API 取得；
+    遠端 API 本身無法使用時拋出 `RemoteHostError`，不更新使用者的下次檢查時間；
+    有傳入 clients 時，同一位使用者的多個遊戲共用已讀取的使用者資料
+    """
     notes = None
     try:
-        if isinstance(user, GenshinScheduleNotes):
-            notes = await get_genshin_notes(user.discord_id)
-        if isinstance(user, StarrailScheduleNotes):
-            notes = await get_starrail_notes(user.discord_id)
-        if isinstance(user, ZZZScheduleNotes):
-            notes = await get_zzz_notes(user.discord_id)
+        if host != "LOCAL":
+            notes = await RemoteNotes.get_notes(host, user, clients)
+        elif isinstance(user, GenshinScheduleNotes):
+            notes = await get_genshin_notes(user.discord_id, clients=clients)
+        elif isinstance(user, StarrailScheduleNotes):
+            notes = await get_starrail_notes(user.discord_id, clients=clients)
+        elif isinstance(user, ZZZScheduleNotes):
+            notes = await get_zzz_notes(user.discord_id, clients=clients)
+    except RemoteHostError:
+        raise
     except Exception as e:
+        Metrics.SCHEDULE_ERRORS.labels(user.__tablename__, error_label(e)).inc()
+        # Hoyolab 異常造成的錯誤不延後檢查時間，恢復後再檢查
+        if HoyolabOutage.is_paused():
+            return None
+        # 過載錯誤在請求內已依併發控制器與重試退避處理過，到這裡的是單一使用者持續發生的錯誤，
+        # 以小時為單位延後這位使用者的檢查時間
         # 當錯誤為 InternalDatabaseError 時，忽略並設定1小時後檢查
         if isinstance(e, errors.GenshinAPIException) and isinstance(
             e.origin, genshin.errors.InternalDatabaseError
@@ -1,17 +1,29 @@
 import asyncio
+import time
 from datetime import datetime
 from typing import Awaitable, Callable, ClassVar
 
 import discord
 import sentry_sdk
-import sqlalchemy
 from discord.ext import commands
 
-from database import Database, GenshinScheduleNotes, StarrailScheduleNotes, ZZZScheduleNotes
-from utility import LOG, config
+from database import (
+    Database,
+    GenshinScheduleNotes,
+    StarrailScheduleNotes,
+    User,
+    ZZZScheduleNotes,
+)
+from utility import LOG, TokenBucket, config
+from utility.prometheus import Metrics
 
+from ... import HoyolabOutage, UserClientFactory, error_label, use_schedule_concurrency
+from ..backlog_drain import BacklogDrain
+from ..outbox import Outbox
 from .common import CheckResult, T_User
 from .genshin import check_genshin_notes
+from .remote import RemoteHostError, RemoteNotes
+from .schedule_queue import NotesScheduleQueue
 from .starrail import check_starrail_notes
 from .zzz import check_zzz_notes
 
@@ -26,7 +38,8 @@ class RealtimeNotes:
     """
 
     _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
-    _bot: commands.Bot
+    _rate_limiter: ClassVar[TokenBucket] = TokenBucket(lambda: config.schedule_notes_rate_limit)
+    """所有遊戲共用的 Hoyolab 請求限速器，速率可透過 /config 指令即時調整"""
 
     @classmethod
     async def execute(cls, bot: commands.Bot):
@@ -40,26 +53,47 @@ class RealtimeNotes:
         if cls._lock.locked():
             return
         await cls._lock.acquire()
-        cls._bot = bot
+        start_time = time.perf_counter()
+        use_schedule_concurrency()  # 檢查任務在此之後建立，一併使用自動排程的併發控制器
         try:
             LOG.System("Start automatic resin checking")
-            await asyncio.gather(
-                cls._check_games_note(GenshinScheduleNotes, "Genshin Impact", check_genshin_notes),
-                cls._check_games_note(StarrailScheduleNotes, "Honkai: Star Rail", check_starrail_notes),
-                cls._check_games_note(ZZZScheduleNotes, "Zenless Zone Zero", check_zzz_notes),
-            )
+            if not NotesScheduleQueue.is_loaded():
+                await NotesScheduleQueue.load()
+            hosts = await RemoteNotes.available_hosts()
+            if config.schedule_notes_unified:
+                await cls._check_users_notes(hosts)
+            else:
+                await asyncio.gather(
+                    *[
+                        cls._check_games_note(game_orm, game_name, check_function, hosts)
+                        for game_orm, game_name, check_function in cls._games()
+                    ]
+                )
         except Exception as e:
             sentry_sdk.capture_exception(e)
             LOG.Error(f"Automatic schedule Real-time Notes encountered an error：{e}")
         finally:
+            Metrics.SCHEDULE_RUN_DURATION.labels("realtime_notes").observe(
+                time.perf_counter() - start_time
+            )
             cls._lock.release()
 
+    @staticmethod
+    def _games() -> list[tuple[type[T_User], str, Callable[..., Awaitable[CheckResult | None]]]]:
+        """各遊戲的 (排程資料表, 遊戲名稱, 檢查即時便箋的函式)"""
+        return [
+            (GenshinScheduleNotes, "Genshin Impact", check_genshin_notes),
+            (StarrailScheduleNotes, "Honkai: Star Rail", check_starrail_notes),
+            (ZZZScheduleNotes, "Zenless Zone Zero", check_zzz_notes),
+        ]
+
     @classmethod
     async def _check_games_note(
         cls,
         game_orm: type[T_User],
         game_name: str,
-        game_check_fucntion: Callable[[T_User], Awaitable[CheckResult | None]],
+        game_check_fucntion: Callable[[T_User, str], Awaitable[CheckResult | None]],
+        hosts: list[str],
     ) -> None:
         """檢查指定遊戲的所有使用者的即時便箋
 
@@ -69,54 +103,323 @@ class RealtimeNotes:
             排程檢查即時便箋的 ORM（物件關聯對映）類型
         game_name: `str`
             遊戲名稱
-        game_check_function: Callable[[`T_User`], Awaitable[`CheckResult` | `None`]]
+        game_check_function: Callable[[`T_User`, `str`], Awaitable[`CheckResult` | `None`]]
             檢查遊戲便箋的函式
+        hosts: list[`str`]
+            可以使用的遠端即時便箋 API，除了本地的 worker 之外，每個遠端 API 另外啟動 worker
+
+        """
+        # 從計時佇列取出檢查時間已到的使用者，放入佇列讓多個 worker 同時檢查
+        now = datetime.now()
+        due_users: list[tuple[int, datetime]] = []
+        pending = 0
+        for user_id, check_time in NotesScheduleQueue.pop_due(game_orm, now):
+            # 遊戲維護結束後的釋放期內，尚未到釋放時間的使用者重新排入計時佇列
+            if BacklogDrain.is_released(user_id, check_time, now):
+                due_users.append((user_id, check_time))
+            else:
+                NotesScheduleQueue.reschedule(game_orm, user_id, check_time)
+                pending += 1
+        # Hoyolab 異常時暫停檢查或只檢查少量使用者，其餘重新排入計時佇列
+        admitted = HoyolabOutage.admit(len(due_users))
+        for user_id, check_time in due_users[admitted:]:
+            NotesScheduleQueue.reschedule(game_orm, user_id, check_time)
+        pending += len(due_users) - admitted
+        due_users = due_users[:admitted]
+        BacklogDrain.report(game_orm.__tablename__, len(due_users), pending, now)
+        queue: asyncio.Queue[tuple[int, datetime]] = asyncio.Queue()
+        for due_user in due_users:
+            queue.put_nowait(due_user)
+        Metrics.SCHEDULE_QUEUE_DEPTH.labels(game_orm.__tablename__).set(queue.qsize())
+
+        num_of_workers = max(1, min(config.schedule_notes_workers, len(due_users)))
+        num_of_remote_workers = min(config.schedule_notes_remote_workers, len(due_users))
+        workers = [
+            cls._check_games_note_worker(queue, game_orm, game_name, game_check_fucntion)
+            for _ in range(num_of_workers)
+        ] + [
+            cls._check_games_note_worker(queue, game_orm, game_name, game_check_fucntion, host)
+            for host in hosts
+            for _ in range(num_of_remote_workers)
+        ]
+        counts = await asyncio.gather(*workers)
+        # 遠端 API 暫停使用或 Hoyolab 異常後留在佇列的使用者，在下次排程時再檢查
+        while not queue.empty():
+            user_id, check_time = queue.get_nowait()
+            NotesScheduleQueue.reschedule(game_orm, user_id, check_time)
+        LOG.System(
+            f"{game_name} automatic real-time notes check ended, "
+            + f"{sum(counts)}/{len(due_users)} people have been checked"
+        )
+
+    @classmethod
+    async def _check_games_note_worker(
+        cls,
+        queue: asyncio.Queue[tuple[int, datetime]],
+        game_orm: type[T_User],
+        game_name: str,
+        game_check_fucntion: Callable[[T_User, str], Awaitable[CheckResult | None]],
+        host: str = "LOCAL",
+    ) -> int:
+        """從佇列取出使用者並檢查即時便箋，直到佇列為空，回傳此 worker 檢查的人數
 
+        host 為遠端 API 網址時，向 Hoyolab 的請求交給該遠端 API，不受本地限速器限制；
+        遠端 API 無法使用時將使用者放回佇列，API 暫停使用後此 worker 結束
         """
         count = 0
-        # 選擇所有使用者 ID
-        stmt = sqlalchemy.select(game_orm.discord_id)
+        while not queue.empty():
+            if HoyolabOutage.is_paused():  # Hoyolab 異常，停止檢查
+                break
+            user_id, check_time = queue.get_nowait()
+            requeued = False
+            Metrics.SCHEDULE_QUEUE_DEPTH.labels(game_orm.__tablename__).set(queue.qsize())
+            try:
+                # 取得要檢查的使用者，若資料庫內的檢查時間還沒到則重新排入計時佇列
+                user = await Database.select_one(game_orm, game_orm.discord_id.is_(user_id))
+                if user is None:
+                    NotesScheduleQueue.remove(game_orm.__tablename__, user_id)
+                    continue
+                if user.next_check_time and datetime.now() < user.next_check_time:
+                    NotesScheduleQueue.push(game_orm.__tablename__, user_id, user.next_check_time)
+                    continue
+                # 所有遊戲共用的限速器，取代使用者之間固定的等待間隔
+                if host == "LOCAL":
+                    await cls._rate_limiter.acquire()
+                if check_time != datetime.min:  # 排定的檢查時間到實際檢查的延遲
+                    Metrics.SCHEDULE_LAG.labels(game_orm.__tablename__).observe(
+                        max((datetime.now() - check_time).total_seconds(), 0.0)
+                    )
+                start_time = time.perf_counter()
+                r = await game_check_fucntion(user, host)
+                Metrics.SCHEDULE_NOTES_CHECK_LATENCY.labels(game_name).observe(
+                    time.perf_counter() - start_time
+                )
+                if host != "LOCAL":
+                    RemoteNotes.report_success(host)
+                if r is not None:
+                    count += 1
+                # 當有錯誤訊息或是即時便箋快要額滿時，向使用者發送訊息
+                if r and len(r.message) > 0:
+                    await cls._send_message(user, r.message, r.embed)
+            except RemoteHostError as e:
+                Metrics.SCHEDULE_ERRORS.labels(game_orm.__tablename__, error_label(e)).inc()
+                queue.put_nowait((user_id, check_time))  # 放回佇列，交給其他 worker 檢查
+                requeued = True
+                if RemoteNotes.report_failure(host, e):
+                    break
+            except Exception as e:
+                Metrics.SCHEDULE_ERRORS.labels(game_orm.__tablename__, error_label(e)).inc()
+                sentry_sdk.capture_exception(e)
+                LOG.Error(f"Automatic schedule Real-time Notes {LOG.User(user_id)} error：{e}")
+            finally:
+                # 檢查後時間沒有更新的使用者，在下次排程時再檢查
+                if not requeued:
+                    NotesScheduleQueue.reschedule(game_orm, user_id, check_time)
+        return count
+
+    @classmethod
+    async def _check_users_notes(cls, hosts: list[str]) -> None:
+        """將所有遊戲到期的檢查依使用者分組，同一位使用者到期的遊戲一起檢查
+
+        多個遊戲都開啟提醒的使用者只讀取一次使用者資料、共用 Client 並同時檢查所有到期的遊戲，
+        各遊戲的提醒合併成一則通知發送
+
+        Parameters
+        ----------
+        hosts: list[`str`]
+            可以使用的遠端即時便箋 API，除了本地的 worker 之外，每個遠端 API 另外啟動 worker
+        """
+        now = datetime.now()
+        groups: dict[int, list[tuple[type[T_User], datetime]]] = {}
+        for game_orm, _, _ in cls._games():
+            released = pending = 0
+            for user_id, check_time in NotesScheduleQueue.pop_due(game_orm, now):
+                if BacklogDrain.is_released(user_id, check_time, now):
+                    groups.setdefault(user_id, []).append((game_orm, check_time))
+                    released += 1
+                else:
+                    NotesScheduleQueue.reschedule(game_orm, user_id, check_time)
+                    pending += 1
+            BacklogDrain.report(game_orm.__tablename__, released, pending, now)
+
+        # Hoyolab 異常時暫停檢查或只檢查少量使用者，其餘重新排入計時佇列
+        due_groups = list(groups.items())
+        admitted = HoyolabOutage.admit(len(due_groups))
+        for user_id, checks in due_groups[admitted:]:
+            cls._reschedule(user_id, checks)
+        queue: asyncio.Queue[tuple[int, list[tuple[type[T_User], datetime]]]] = asyncio.Queue()
+        for group in due_groups[:admitted]:
+            queue.put_nowait(group)
+        Metrics.SCHEDULE_QUEUE_DEPTH.labels("realtime_notes").set(queue.qsize())
+
+        num_of_workers = max(1, min(config.schedule_notes_workers, admitted))
+        num_of_remote_workers = min(config.schedule_notes_remote_workers, admitted)
+        workers = [cls._check_users_notes_worker(queue) for _ in range(num_of_workers)] + [
+            cls._check_users_notes_worker(queue, host)
+            for host in hosts
+            for _ in range(num_of_remote_workers)
+        ]
+        counts = await asyncio.gather(*workers)
+        # 遠端 API 暫停使用或 Hoyolab 異常後留在佇列的使用者，在下次排程時再檢查
+        while not queue.empty():
+            cls._reschedule(*queue.get_nowait())
+        LOG.System(
+            "Unified automatic real-time notes check ended, "
+            + f"{sum(counts)}/{admitted} people have been checked"
+        )
+
+    @classmethod
+    async def _check_users_notes_worker(
+        cls,
+        queue: asyncio.Queue[tuple[int, list[tuple[type[T_User], datetime]]]],
+        host: str = "LOCAL",
+    ) -> int:
+        """從佇列取出使用者，檢查該使用者所有到期的遊戲，回傳完成檢查的使用者數量"""
+        count = 0
+        while not queue.empty():
+            if HoyolabOutage.is_paused():  # Hoyolab 異常，停止檢查
+                break
+            user_id, checks = queue.get_nowait()
+            Metrics.SCHEDULE_QUEUE_DEPTH.labels("realtime_notes").set(queue.qsize())
+            retry: list[tuple[type[T_User], datetime]] = []
+            host_error: RemoteHostError | None = None
+            try:
+                if host == "LOCAL":  # 每個遊戲各自向 Hoyolab 請求，依遊戲數量取得 token
+                    for _ in checks:
+                        await cls._rate_limiter.acquire()
+                checked, retry, host_error = await cls._check_user_notes(user_id, checks, host)
+                if checked:
+                    count += 1
+            except Exception as e:
+                Metrics.SCHEDULE_ERRORS.labels("realtime_notes", error_label(e)).inc()
+                sentry_sdk.capture_exception(e)
+                LOG.Error(f"Automatic schedule Real-time Notes {LOG.User(user_id)} error：{e}")
+            finally:
+                # 檢查後時間沒有更新的遊戲，在下次排程時再檢查
+                cls._reschedule(user_id, [check for check in checks if check not in retry])
+            if host_error is not None:
+                queue.put_nowait((user_id, retry))  # 放回佇列，交給其他 worker 檢查
+                if RemoteNotes.report_failure(host, host_error):
+                    break
+            elif host != "LOCAL":
+                RemoteNotes.report_success(host)
+        return count
+
+    @classmethod
+    async def _check_user_notes(
+        cls, user_id: int, checks: list[tuple[type[T_User], datetime]], host: str
+    ) -> tuple[bool, list[tuple[type[T_User], datetime]], RemoteHostError | None]:
+        """以同一份使用者資料同時檢查使用者所有到期的遊戲，並將提醒合併成一則通知
+
+        Returns
+        ------
+        `tuple[bool, list, RemoteHostError | None]`:
+            (是否有遊戲完成檢查, 因遠端 API 無法使用而需要重新檢查的遊戲, 遠端 API 的錯誤)
+        """
+        games = {game_orm: (name, function) for game_orm, name, function in cls._games()}
+        # 在同一個 session 內讀取各遊戲的排程資料與使用者資料
         async with Database.sessionmaker() as session:
-            user_ids = (await session.execute(stmt)).scalars().all()
-        for user_id in user_ids:
-            # 取得要檢查的使用者，若檢查時間還沒到則跳過
-            user = await Database.select_one(game_orm, game_orm.discord_id.is_(user_id))
-            if user is None or user.next_check_time and datetime.now() < user.next_check_time:
-                continue
-            r = await game_check_fucntion(user)
-            if r is not None:
-                count += 1
-            # 當有錯誤訊息或是即時便箋快要額滿時，向使用者發送訊息
-            if r and len(r.message) > 0:
-                await cls._send_message(user, r.message, r.embed)
-            # 使用者之間的檢查間隔時間
-            await asyncio.sleep(config.schedule_loop_delay)
-        LOG.System(f"{game_name} automatic real-time notes check ended, {count}/{len(user_ids)} people have been checked")
+            rows = [
+                (await session.get(game_orm, user_id), game_orm, check_time)
+                for game_orm, check_time in checks
+            ]
+            account = await session.get(User, user_id)
+        clients = UserClientFactory(account) if account is not None else None
+        last_used_time = account.last_used_time if account is not None else None
+
+        due: list[tuple[T_User, type[T_User], datetime]] = []
+        for user, game_orm, check_time in rows:
+            if user is None:
+                NotesScheduleQueue.remove(game_orm.__tablename__, user_id)
+            elif user.next_check_time and datetime.now() < user.next_check_time:
+                NotesScheduleQueue.push(game_orm.__tablename__, user_id, user.next_check_time)
+            else:
+                due.append((user, game_orm, check_time))
+                if check_time != datetime.min:  # 排定的檢查時間到實際檢查的延遲
+                    Metrics.SCHEDULE_LAG.labels(game_orm.__tablename__).observe(
+                        max((datetime.now() - check_time).total_seconds(), 0.0)
+                    )
+
+        async def check(user: T_User, game_orm: type[T_User]) -> CheckResult | None:
+            game_name, game_check_function = games[game_orm]
+            start_time = time.perf_counter()
+            try:
+                return await game_check_function(user, host, clients=clients)
+            finally:
+                Metrics.SCHEDULE_NOTES_CHECK_LATENCY.labels(game_name).observe(
+                    time.perf_counter() - start_time
+                )
+
+        results = await asyncio.gather(
+            *[check(user, game_orm) for user, game_orm, _ in due], return_exceptions=True
+        )
+        # 共用使用者資料時，成功取得便箋後的最後使用時間只寫入資料庫一次
+        if account is not None and account.last_used_time != last_used_time:
+            await Database.insert_or_replace(account)
+
+        checked = False
+        retry: list[tuple[type[T_User], datetime]] = []
+        host_error: RemoteHostError | None = None
+        reminders: list[tuple[T_User, str, CheckResult]] = []
+        for (user, game_orm, check_time), r in zip(due, results):
+            if isinstance(r, RemoteHostError):
+                Metrics.SCHEDULE_ERRORS.labels(game_orm.__tablename__, error_label(r)).inc()
+                retry.append((game_orm, check_time))
+                host_error = r
+            elif isinstance(r, BaseException):
+                Metrics.SCHEDULE_ERRORS.labels(game_orm.__tablename__, error_label(r)).inc()
+                sentry_sdk.capture_exception(r)
+                LOG.Error(f"Automatic schedule Real-time Notes {LOG.User(user_id)} error：{r}")
+            elif r is not None:
+                checked = True
+                # 當有錯誤訊息或是即時便箋快要額滿時，向使用者發送訊息
+                if len(r.message) > 0:
+                    reminders.append((user, games[game_orm][0], r))
+        # 各遊戲可能設定不同的提醒頻道，同一個頻道的提醒合併發送
+        by_channel: dict[int, list[tuple[T_User, str, CheckResult]]] = {}
+        for reminder in reminders:
+            by_channel.setdefault(reminder[0].discord_channel_id, []).append(reminder)
+        for channel_reminders in by_channel.values():
+            await cls._send_combined_message(channel_reminders)
+        return checked, retry, host_error
+
+    @staticmethod
+    def _reschedule(user_id: int, checks: list[tuple[type[T_User], datetime]]) -> None:
+        """檢查後時間沒有更新的遊戲，重新排入計時佇列"""
+        for game_orm, check_time in checks:
+            NotesScheduleQueue.reschedule(game_orm, user_id, check_time)
 
     @classmethod
-    async def _send_message(cls, user: T_User, message: str, embed: discord.Embed) -> None:
-        """發送訊息提醒使用者"""
-        bot = cls._bot
-        try:
-            _id = user.discord_channel_id
-            channel = bot.get_channel(_id) or await bot.fetch_channel(_id)
-            discord_user = bot.get_user(user.discord_id) or await bot.fetch_user(user.discord_id)
-            msg_sent = await channel.send(f"{discord_user.mention}，{message}", embed=embed)  # type: ignore
-        except (
-            discord.Forbidden,
-            discord.NotFound,
-            discord.InvalidData,
-        ) as e:  # 發送訊息失敗，移除此使用者
-            LOG.Except(
-                f"自動檢查即時便箋發送訊息失敗，移除此使用者 {LOG.User(user.discord_id)}：{e}"
+    async def _send_combined_message(cls, reminders: list[tuple[T_User, str, CheckResult]]) -> None:
+        """將同一位使用者在同一個頻道的各遊戲提醒合併成一則通知寫入寄件匣
+
+        第一筆通知包含標記使用者與所有遊戲的提醒文字，其他遊戲只附上 embed，
+        寄件匣會將同一次寫入的通知合併成同一則 Discord 訊息
+        """
+        user = reminders[0][0]
+        content = f"<@{user.discord_id}>，" + "\n".join(
+            f"{game_name}：{r.message}" for _, game_name, r in reminders
+        )
+        notifications = [
+            Outbox.create(
+                source,
+                user.discord_channel_id,
+                content if i == 0 else "",
+                r.embed,
+                check_mention=(i == 0),
             )
-            await Database.delete_instance(user)
-        except Exception as e:
-            sentry_sdk.capture_exception(e)
-        else:  # 成功發送訊息
-            # 若使用者不在發送訊息的頻道則移除
-            if discord_user.mentioned_in(msg_sent) is False:
-                LOG.Except(
-                    f"自動檢查即時便箋使用者不在頻道，移除此使用者 {LOG.User(discord_user)}"
-                )
-                await Database.delete_instance(user)
+            for i, (source, _, r) in enumerate(reminders)
+        ]
+        await Outbox.enqueue(notifications)
+
+    @classmethod
+    async def _send_message(cls, user: T_User, message: str, embed: discord.Embed) -> None:
+        """將提醒訊息寫入寄件匣，由寄件匣與同頻道的其他使用者合併發送"""
+        notification = Outbox.create(
+            user,
+            user.discord_channel_id,
+            f"<@{user.discord_id}>，{message}",
+            embed,
+            check_mention=True,
+        )
+        await Outbox.enqueue([notification])
@@ -0,0 +1,199 @@
+import asyncio
+import time
+from typing import Any, Final
+
+import aiohttp
+import genshin
+import sentry_sdk
+
+import database
+from database import Database, GenshinScheduleNotes, StarrailScheduleNotes, User, ZZZScheduleNotes
+from utility import LOG, config
+
+from ...client.common import UserClientFactory
+from ...errors import RemoteHostError, UserDataNotFound
+from ...errors_decorator import generalErrorHandler
+
+MAX_CONSECUTIVE_FAILURES: Final[int] = 5
+"""遠端 API 連續失敗幾次後暫停使用"""
+EVICTION_SECONDS: Final[float] = 300.0
+"""遠端 API 暫停使用後，多久之後重新測試（單位：秒）"""
+REQUEST_TIMEOUT: Final[float] = 30.0
+"""向遠端 API 請求的逾時時間（單位：秒）"""
+
+Notes = genshin.models.Notes | genshin.models.StarRailNote | genshin.models.ZZZNotes
+
+
+class _HostHealth:
+    """單一遠端 API 的健康狀態"""
+
+    def __init__(self) -> None:
+        self.consecutive_failures: int = 0
+        self.evicted_until: float = 0.0
+
+    @property
+    def is_evicted(self) -> bool:
+        return time.monotonic() < self.evicted_until
+
+
+class RemoteNotes:
+    """將自動檢查即時便箋向 Hoyolab 的請求交給遠端 API
+
+    遠端 API 只負責取得即時便箋的原始資料，閾值判斷與發送提醒仍在本地進行。
+    - `GET {host}`：測試 API 是否正常，回傳 HTTP 200 表示正常
+    - `POST {host}/realtime-notes`：傳入 `{discord_id, game, uid, cookie}`，
+      成功時回傳 `{"notes": 原始資料}`，Hoyolab 回傳錯誤時回傳 `{"retcode": 錯誤碼, "message": 訊息}`
+
+    遠端 API 連續失敗 `MAX_CONSECUTIVE_FAILURES` 次後暫停使用 `EVICTION_SECONDS` 秒，之後重新測試
+
+    Methods
+    -----
+    available_hosts()
+        測試並回傳目前可以使用的遠端 API
+    get_notes(host, user)
+        透過遠端 API 取得使用者的即時便箋
+    report_success(host)
+        記錄遠端 API 成功一次
+    report_failure(host, e)
+        記錄遠端 API 失敗一次，回傳此 API 是否已暫停使用
+    close()
+        關閉與遠端 API 的連線
+    """
+
+    _health: dict[str, _HostHealth] = {}
+    _session: aiohttp.ClientSession | None = None
+
+    @classmethod
+    async def available_hosts(cls) -> list[str]:
+        """測試並回傳目前可以使用的遠端 API，暫停使用中的 API 不會測試"""
+        hosts: list[str] = []
+        for host in config.realtime_notes_api_list:
+            health = cls._health.setdefault(host, _HostHealth())
+            if health.is_evicted:
+                continue
+            try:
+                async with cls._get_session().get(host) as resp:
+                    if resp.status != 200:
+                        raise RemoteHostError(host, f"Http 狀態碼 {resp.status}")
+            except Exception as e:
+                sentry_sdk.capture_exception(e)
+                LOG.Error(f"自動排程 RealtimeNotes 測試 API {host} 時發生錯誤：{e}")
+                cls._evict(host, health)
+            else:
+                hosts.append(host)
+        return hosts
+
+    @classmethod
+    async def get_notes(
+        cls, host: str, user: Any, clients: UserClientFactory | None = None
+    ) -> Notes:
+        """透過遠端 API 取得使用者的即時便箋
+
+        Parameters
+        ------
+        host: `str`
+            遠端 API 網址
+        user: `GenshinScheduleNotes` | `StarrailScheduleNotes` | `ZZZScheduleNotes`
+            要檢查的使用者
+        clients: `UserClientFactory` | `None`
+            已讀取的使用者資料，有傳入時不再查詢資料庫
+
+        Raises
+        ------
+        RemoteHostError
+            遠端 API 無法使用
+        GenshinAPIException
+            Hoyolab 回傳錯誤
+        """
+        match user:
+            case GenshinScheduleNotes():
+                game = genshin.Game.GENSHIN
+            case StarrailScheduleNotes():
+                game = genshin.Game.STARRAIL
+            case ZZZScheduleNotes():
+                game = genshin.Game.ZZZ
+            case _:
+                raise TypeError(f"不支援的即時便箋類型：{type(user).__name__}")
+        return await _get_remote_notes(user.discord_id, host, game, clients=clients)
+
+    @classmethod
+    def report_success(cls, host: str) -> None:
+        """記錄遠端 API 成功一次，重設連續失敗次數"""
+        cls._health.setdefault(host, _HostHealth()).consecutive_failures = 0
+
+    @classmethod
+    def report_failure(cls, host: str, e: Exception) -> bool:
+        """記錄遠端 API 失敗一次，回傳此 API 是否已暫停使用"""
+        health = cls._health.setdefault(host, _HostHealth())
+        health.consecutive_failures += 1
+        LOG.Error(
+            f"遠端即時便箋 API：{host} 發生錯誤 "
+            + f"({health.consecutive_failures}/{MAX_CONSECUTIVE_FAILURES})：{e}"
+        )
+        if health.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+            sentry_sdk.capture_exception(e)
+            cls._evict(host, health)
+        return health.is_evicted
+
+    @classmethod
+    async def close(cls) -> None:
+        """關閉與遠端 API 的連線"""
+        if cls._session is not None:
+            await cls._session.close()
+            cls._session = None
+
+    @classmethod
+    async def _request(cls, host: str, payload: dict[str, Any]) -> dict[str, Any]:
+        """向遠端 API 發送取得即時便箋的請求，API 無法使用時拋出 `RemoteHostError`"""
+        try:
+            async with cls._get_session().post(host + "/realtime-notes", json=payload) as resp:
+                if resp.status != 200:
+                    raise RemoteHostError(host, f"Http 狀態碼 {resp.status}")
+                return await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RemoteHostError(host, repr(e)) from e
+
+    @classmethod
+    def _get_session(cls) -> aiohttp.ClientSession:
+        # 所有遠端 API 共用同一個 session，重複使用已建立的連線
+        if cls._session is None or cls._session.closed:
+            cls._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+            )
+        return cls._session
+
+    @classmethod
+    def _evict(cls, host: str, health: _HostHealth) -> None:
+        health.consecutive_failures = 0
+        health.evicted_until = time.monotonic() + EVICTION_SECONDS
+        LOG.Error(f"遠端即時便箋 API：{host} 暫停使用 {EVICTION_SECONDS:.0f} 秒")
+
+
+@generalErrorHandler
+async def _get_remote_notes(
+    user_id: int, host: str, game: genshin.Game, *, clients: UserClientFactory | None = None
+) -> Notes:
+    """讀取使用者的 cookie 交給遠端 API 取得即時便箋原始資料，再於本地轉換成 genshin.py 的模型"""
+    if clients is not None:
+        user = clients.user
+    else:
+        user = await Database.select_one(User, User.discord_id.is_(user_id))
+    check, msg = await database.Tool.check_user(user, check_uid=True, game=game)
+    if check is False or user is None:
+        raise UserDataNotFound(msg)
+    cookie, uid = (clients or UserClientFactory(user)).credentials(game)
+    payload = {"discord_id": user_id, "game": game.value, "uid": uid, "cookie": cookie}
+    result = await RemoteNotes._request(host, payload)
+
+    if (raw := result.get("notes")) is None:
+        # 將遠端 API 回傳的 Hoyolab 錯誤還原成 genshin.py 的例外，交給 generalErrorHandler 處理
+        genshin.errors.raise_for_retcode(
+            {"retcode": result.get("retcode", -1), "message": result.get("message", "")}
+        )
+    match game:
+        case genshin.Game.STARRAIL:
+            return genshin.models.StarRailNote(**raw)
+        case genshin.Game.ZZZ:
+            return genshin.models.ZZZNotes(**raw)
+        case _:
+            return genshin.models.Notes(**raw)
@@ -0,0 +1,144 @@
+import heapq
+from datetime import datetime
+from typing import Any, Callable, ClassVar, Sequence
+
+import sqlalchemy
+from sqlalchemy import event
+
+from database import Database, GenshinScheduleNotes, StarrailScheduleNotes, ZZZScheduleNotes
+
+NotesTable = type[GenshinScheduleNotes] | type[StarrailScheduleNotes] | type[ZZZScheduleNotes]
+
+NOTES_TABLES: tuple[NotesTable, ...] = (
+    GenshinScheduleNotes,
+    StarrailScheduleNotes,
+    ZZZScheduleNotes,
+)
+
+
+class NotesScheduleQueue:
+    """即時便箋排程的記憶體計時佇列，每個遊戲一個 `(next_check_time, discord_id)` 的 min-heap
+
+    啟動後從資料庫載入一次，之後透過 ORM 的 insert/update/delete 事件與
+    `Database.delete_where` 的批次刪除事件保持同步，
+    每次排程只需取出已到期的使用者，不必再對整張表逐筆查詢
+
+    Methods
+    -----
+    load()
+        從資料庫載入所有即時便箋排程使用者
+    pop_due(table, now)
+        取出指定遊戲所有已到期的使用者
+    """
+
+    _heaps: ClassVar[dict[str, list[tuple[datetime, int]]]] = {
+        table.__tablename__: [] for table in NOTES_TABLES
+    }
+    """各遊戲的 min-heap dict[table_name, heap]"""
+    _entries: ClassVar[dict[tuple[str, int], datetime]] = {}
+    """每位使用者目前有效的下次檢查時間 dict[(table_name, discord_id), next_check_time]，
+    heap 內時間與此不符的元素視為過期並在取出時忽略"""
+    _loaded: ClassVar[bool] = False
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        return cls._loaded
+
+    @classmethod
+    async def load(cls) -> None:
+        """從資料庫載入所有即時便箋排程使用者的下次檢查時間"""
+        entries: dict[tuple[str, int], datetime] = {}
+        async with Database.sessionmaker() as session:
+            for table in NOTES_TABLES:
+                stmt = cls._load_stmt(table)
+                for discord_id, next_check_time in (await session.execute(stmt)).all():
+                    entries[(table.__tablename__, discord_id)] = next_check_time or datetime.min
+        # 載入期間透過 ORM 事件寫入的資料較新，以事件的時間為準
+        entries.update(cls._entries)
+
+        heaps: dict[str, list[tuple[datetime, int]]] = {t.__tablename__: [] for t in NOTES_TABLES}
+        for (table_name, discord_id), check_time in entries.items():
+            heaps[table_name].append((check_time, discord_id))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        cls._heaps = heaps
+        cls._entries = entries
+        cls._loaded = True
+
+    @staticmethod
+    def _load_stmt(table: NotesTable) -> sqlalchemy.Select[tuple[int, datetime | None]]:
+        """讀取資料表內所有使用者的下次檢查時間，載入後以 heapify 建立順序，不需由 SQLite 排序"""
+        return sqlalchemy.select(table.discord_id, table.next_check_time)
+
+    @classmethod
+    def push(cls, table_name: str, discord_id: int, next_check_time: datetime | None) -> None:
+        """新增或更新使用者的下次檢查時間，`None` 表示立即檢查"""
+        check_time = next_check_time or datetime.min
+        key = (table_name, discord_id)
+        if cls._entries.get(key) == check_time:
+            return
+        cls._entries[key] = check_time
+        heapq.heappush(cls._heaps[table_name], (check_time, discord_id))
+
+    @classmethod
+    def remove(cls, table_name: str, discord_id: int) -> None:
+        """移除使用者，heap 內對應的元素會在取出時被忽略"""
+        cls._entries.pop((table_name, discord_id), None)
+
+    @classmethod
+    def pop_due(cls, table: NotesTable, now: datetime | None = None) -> list[tuple[int, datetime]]:
+        """取出指定遊戲所有下次檢查時間已到的使用者
+
+        被取出的使用者仍保留在 `_entries`，檢查完畢寫回資料庫時會由 ORM 事件重新排入；
+        若檢查後時間沒有變動，需呼叫 `reschedule` 讓使用者在下次排程再被檢查
+
+        Returns
+        ------
+        `list[tuple[int, datetime]]`:
+            已到期的 (使用者 Discord ID, 排定的檢查時間)，依檢查時間排序
+        """
+        now = now or datetime.now()
+        table_name = table.__tablename__
+        heap = cls._heaps[table_name]
+        due: list[tuple[int, datetime]] = []
+        while len(heap) > 0 and heap[0][0] <= now:
+            check_time, discord_id = heapq.heappop(heap)
+            if cls._entries.get((table_name, discord_id)) != check_time:
+                continue  # 已被更新或刪除的過期元素
+            due.append((discord_id, check_time))
+        return due
+
+    @classmethod
+    def reschedule(cls, table: NotesTable, discord_id: int, check_time: datetime) -> None:
+        """若使用者被取出後下次檢查時間沒有變動，重新將原時間排入 heap"""
+        table_name = table.__tablename__
+        if cls._entries.get((table_name, discord_id)) == check_time:
+            heapq.heappush(cls._heaps[table_name], (check_time, discord_id))
+
+
+def _on_write(mapper, connection, target) -> None:
+    # insert_default 為 SQL 函式時，寫入後欄位會被 expire，這裡不觸發 lazy load
+    next_check_time = target.__dict__.get("next_check_time")
+    if not isinstance(next_check_time, datetime):
+        next_check_time = None
+    NotesScheduleQueue.push(target.__tablename__, target.discord_id, next_check_time)
+
+
+def _on_delete(mapper, connection, target) -> None:
+    NotesScheduleQueue.remove(target.__tablename__, target.discord_id)
+
+
+def _on_bulk_delete(table_name: str) -> Callable[[Sequence[Any]], None]:
+    def on_delete(discord_ids: Sequence[Any]) -> None:
+        for discord_id in discord_ids:
+            NotesScheduleQueue.remove(table_name, discord_id)
+
+    return on_delete
+
+
+for _table in NOTES_TABLES:
+    event.listen(_table, "after_insert", _on_write)
+    event.listen(_table, "after_update", _on_write)
+    event.listen(_table, "after_delete", _on_delete)
+    # 批次 DELETE 語句不會觸發 ORM 的 after_delete 事件
+    Database.listen_delete(_table, _on_bulk_delete(_table.__tablename__))
@@ -5,14 +5,19 @@ import genshin
 from database import Database, StarrailScheduleNotes
 from utility import EmbedTemplate
 
-from ... import parse_starrail_notes
+from ... import UserClientFactory, parse_starrail_notes
 from .common import CheckResult, cal_next_check_time, get_realtime_notes
+from .remote import RemoteHostError
 
 
-async def check_starrail_notes(user: StarrailScheduleNotes) -> CheckResult | None:
+async def check_starrail_notes(
+    user: StarrailScheduleNotes, host: str = "LOCAL", clients: UserClientFactory | None = None
+) -> CheckResult | None:
     """依據每位使用者的設定檢查即時便箋，若超出設定值時則回傳提醒訊息；若跳過此使用者，回傳 None"""
     try:
-        notes = await get_realtime_notes(user)
+        notes = await get_realtime_notes(user, host, clients)
+    except RemoteHostError:  # 遠端 API 無法使用，交給排程換其他主機重新檢查
+        raise
     except Exception as e:
         return CheckResult("星穹鐵道自動檢查即時便箋時發生錯誤，預計5小時後再檢查。", EmbedTemplate.error(e))
 
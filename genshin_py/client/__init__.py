@@ -1,4 +1,7 @@
+from .adaptive import *
 from .common import *
 from .genshin import *
+from .outage import *
+from .pool import *
 from .starrail import *
 from .zzz import *
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import contextlib
+import contextvars
+import random
+import time
+import typing
+
+import aiohttp
+import genshin
+
+from utility import config
+from utility.prometheus import Metrics
+
+from .outage import HoyolabOutage
+
+_in_slot: contextvars.ContextVar[bool] = contextvars.ContextVar("_in_slot", default=False)
+"""目前的協程是否已經取得請求名額，避免 request 內部巢狀呼叫時重複取得而卡住"""
+
+
+def is_overload_error(exception: BaseException) -> bool:
+    """判斷例外是否代表 Hoyolab 過載 (需要降低併發數)"""
+    if isinstance(exception, (genshin.errors.InternalDatabaseError, genshin.errors.VisitsTooFrequently)):
+        return True
+    if isinstance(exception, genshin.errors.GenshinException) and exception.retcode == 50000:
+        return True
+    if isinstance(exception, (aiohttp.ClientError, asyncio.TimeoutError)):
+        return True
+    return False
+
+
+class AdaptiveConcurrency:
+    """AIMD (加法增加、乘法減少) 的併發控制器
+
+    請求成功時緩慢增加同時進行的請求數量上限 (window)，遇到過載錯誤時將 window 減半並暫停一段時間，
+    讓呼叫 Hoyolab 的功能自動找出最快且安全的請求速率；使用者指令與自動排程各自使用一個控制器，
+    排程的請求與過載不會讓使用者指令排隊等待
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        min_window: float = 1.0,
+        max_window: float = 32.0,
+        initial_window: float | None = None,
+        decrease_factor: float = 0.5,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.min_window = min_window
+        self.max_window = max_window
+        self.decrease_factor = decrease_factor
+        self.max_backoff = max_backoff
+        self.window: float = min(max(initial_window or min_window, min_window), max_window)
+        """目前允許同時進行的請求數量上限"""
+        self.in_flight: int = 0
+        """目前正在進行的請求數量"""
+        self._epoch: int = 0
+        """每次減少 window 時遞增，同一批請求的失敗只會減少一次 window"""
+        self._consecutive_overloads: int = 0
+        self._resume_time: float = 0.0
+        self._condition = asyncio.Condition()
+        self._export()
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> typing.AsyncIterator[None]:
+        """取得一個請求名額，結束時依照結果調整 window
+
+        Example: `async with controller.slot(): await client.request(...)`
+        """
+        if _in_slot.get():
+            yield
+            return
+        epoch = await self._acquire()
+        token = _in_slot.set(True)
+        try:
+            yield
+        except BaseException as e:
+            if is_overload_error(e):
+                self._on_overload(epoch)
+                HoyolabOutage.record(False)
+            elif not isinstance(e, asyncio.CancelledError):
+                self._on_success()  # 伺服器有正常回應 (例如 Cookie 失效)，不視為過載
+                HoyolabOutage.record(True)
+            raise
+        else:
+            self._on_success()
+            HoyolabOutage.record(True)
+        finally:
+            _in_slot.reset(token)
+            await self._release()
+
+    async def _acquire(self) -> int:
+        while True:
+            delay = self._resume_time - time.monotonic()
+            if delay > 0:  # 過載後的暫停期間
+                await asyncio.sleep(delay)
+                continue
+            async with self._condition:
+                if self.in_flight < max(1, int(self.window)):
+                    self.in_flight += 1
+                    self._export()
+                    return self._epoch
+                await self._condition.wait()
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._export()
+            self._condition.notify_all()
+
+    def _on_success(self) -> None:
+        # 加法增加：大約每完成一整個 window 的請求，window 增加 1
+        self._consecutive_overloads = 0
+        self.window = min(self.max_window, self.window + 1.0 / self.window)
+        self._export()
+
+    def _on_overload(self, epoch: int) -> None:
+        if epoch != self._epoch:  # 這批請求已經減少過 window
+            return
+        # 乘法減少，並依連續過載的次數以指數增加暫停時間
+        self._epoch += 1
+        self._consecutive_overloads += 1
+        self.window = max(self.min_window, self.window * self.decrease_factor)
+        backoff = min(self.max_backoff, 2.0 ** (self._consecutive_overloads - 1))
+        self._resume_time = max(self._resume_time, time.monotonic() + backoff)
+        Metrics.HOYOLAB_OVERLOADS.labels(self.name).inc()
+        self._export()
+
+    def _export(self) -> None:
+        Metrics.HOYOLAB_CONCURRENCY_WINDOW.labels(self.name).set(self.window)
+        Metrics.HOYOLAB_IN_FLIGHT.labels(self.name).set(self.in_flight)
+
+
+def retry_backoff(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """第 attempt 次 (從 0 開始) 重試前的等待時間（單位：秒），指數增加並加入隨機抖動，
+    避免同時失敗的請求在同一時間重試"""
+    return random.uniform(0, min(cap, base * 2.0**attempt))
+
+
+interactive_concurrency = AdaptiveConcurrency(
+    "interactive",
+    min_window=config.hoyolab_min_concurrency,
+    max_window=config.hoyolab_interactive_concurrency,
+    initial_window=config.hoyolab_interactive_concurrency,
+)
+"""使用者指令的 genshin.Client 請求使用的併發控制器，保留固定的名額給使用者指令"""
+
+schedule_concurrency = AdaptiveConcurrency(
+    "schedule",
+    min_window=config.hoyolab_min_concurrency,
+    max_window=max(
+        config.hoyolab_min_concurrency,
+        config.hoyolab_max_concurrency - config.hoyolab_interactive_concurrency,
+    ),
+    initial_window=config.hoyolab_initial_concurrency,
+)
+"""自動排程的 genshin.Client 請求使用的併發控制器，上限為總上限扣除使用者指令保留的名額"""
+
+_controller: contextvars.ContextVar[AdaptiveConcurrency] = contextvars.ContextVar(
+    "_controller", default=interactive_concurrency
+)
+"""目前的協程使用的併發控制器"""
+
+
+def use_schedule_concurrency() -> None:
+    """讓目前的協程與之後建立的子任務改用自動排程的併發控制器，在自動排程的進入點呼叫"""
+    _controller.set(schedule_concurrency)
+
+
+class AdaptiveClient(genshin.Client):
+    """所有 HTTP 請求都經過併發控制器控制的 genshin.Client，
+    預設使用 `interactive_concurrency`，自動排程內使用 `schedule_concurrency`"""
+
+    async def request(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        async with _controller.get().slot():
+            return await super().request(*args, **kwargs)
@@ -1,15 +1,20 @@
 import asyncio
+from datetime import date
 from typing import Mapping, Sequence
 
 import genshin
 import sentry_sdk
+import sqlalchemy
 
 import database
 from database import Database, GeetestChallenge, User
 from utility import LOG, config, get_app_command_mention
+from utility.prometheus import Metrics
 
-from ..errors import UserDataNotFound
+from ..errors import UserDataNotFound, error_label
 from ..errors_decorator import generalErrorHandler
+from .adaptive import AdaptiveClient, is_overload_error, retry_backoff
+from .pool import client_pool
 
 
 async def get_client(
@@ -17,6 +22,7 @@ async def get_client(
     *,
     game: genshin.Game = genshin.Game.GENSHIN,
     check_uid=True,
+    clients: "UserClientFactory | None" = None,
 ) -> genshin.Client:
     """設定並取得原神 API 的 Client
 
@@ -28,50 +34,78 @@ async def get_client(
         要取得的遊戲 Client
     check_uid: `bool`
         是否檢查 UID
+    clients: `UserClientFactory` | `None`
+        呼叫者已讀取的使用者資料，有傳入時不再查詢資料庫
 
     Returns
     ------
     `genshin.Client`
         原神 API 的 Client
     """
-    user = await Database.select_one(User, User.discord_id.is_(user_id))
+    if clients is not None:
+        user = clients.user
+    else:
+        user = await Database.select_one(User, User.discord_id.is_(user_id))
     check, msg = await database.Tool.check_user(user, check_uid=check_uid, game=game)
     if check is False or user is None:
         raise UserDataNotFound(msg)
+    return (clients or UserClientFactory(user)).get(game)
 
-    client = genshin.Client(lang="vi-vn")
-    match game:
-        case genshin.Game.GENSHIN:
-            uid = user.uid_genshin or 0
-            cookie = user.cookie_genshin or user.cookie_default
-            if len(str(uid)) == 9 and str(uid)[0] in ["1", "2", "5"]:
-                client = genshin.Client(region=genshin.Region.CHINESE, lang="zh-cn")
-        case genshin.Game.HONKAI:
-            uid = user.uid_honkai3rd or 0
-            cookie = user.cookie_honkai3rd or user.cookie_default
-        case genshin.Game.STARRAIL:
-            uid = user.uid_starrail or 0
-            cookie = user.cookie_starrail or user.cookie_default
-            if str(uid)[0] in ["1", "2", "5"]:
-                client = genshin.Client(region=genshin.Region.CHINESE, lang="zh-cn")
-        case genshin.Game.ZZZ:
-            uid = user.uid_zzz or 0
-            cookie = user.cookie_zzz or user.cookie_default
-        case genshin.Game.THEMIS:
-            uid = 0
-            cookie = user.cookie_themis or user.cookie_default
-        case genshin.Game.THEMIS_TW:
-            uid = 0
-            cookie = user.cookie_themis or user.cookie_default
-        case _:
-            uid = 0
-            cookie = user.cookie_default
 
-    client.set_cookies(cookie)
-    client.default_game = game
-    client.uid = uid
-    client.proxy = config.genshin_py_proxy_server
-    return client
+class UserClientFactory:
+    """同一位使用者在一次請求內共用的 Client 工廠，
+    由已從資料庫讀取的 `User` 建立各遊戲的 Client，不必每個遊戲都重新查詢資料庫
+
+    Example: `clients = UserClientFactory(user); clients.get(genshin.Game.STARRAIL)`
+    """
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+        self._clients: dict[genshin.Game, genshin.Client] = {}
+
+    def get(self, game: genshin.Game = genshin.Game.GENSHIN) -> genshin.Client:
+        """取得指定遊戲的 Client，同一個遊戲只會建立一次"""
+        if (client := self._clients.get(game)) is None:
+            client = self._clients[game] = self._create_client(game)
+        return client
+
+    def credentials(self, game: genshin.Game) -> tuple[str | None, int]:
+        """取得指定遊戲使用的 (cookie, UID)，遊戲沒有設定 cookie 時使用預設的 cookie"""
+        user = self.user
+        match game:
+            case genshin.Game.GENSHIN:
+                return (user.cookie_genshin or user.cookie_default, user.uid_genshin or 0)
+            case genshin.Game.HONKAI:
+                return (user.cookie_honkai3rd or user.cookie_default, user.uid_honkai3rd or 0)
+            case genshin.Game.STARRAIL:
+                return (user.cookie_starrail or user.cookie_default, user.uid_starrail or 0)
+            case genshin.Game.ZZZ:
+                return (user.cookie_zzz or user.cookie_default, user.uid_zzz or 0)
+            case genshin.Game.THEMIS | genshin.Game.THEMIS_TW:
+                return (user.cookie_themis or user.cookie_default, 0)
+            case _:
+                return (user.cookie_default, 0)
+
+    def _create_client(self, game: genshin.Game) -> genshin.Client:
+        cookie, uid = self.credentials(game)
+        region, lang = genshin.Region.OVERSEAS, "vi-vn"
+        is_chinese_uid = str(uid)[0] in ["1", "2", "5"]
+        if (game == genshin.Game.GENSHIN and len(str(uid)) == 9 and is_chinese_uid) or (
+            game == genshin.Game.STARRAIL and is_chinese_uid
+        ):
+            region, lang = genshin.Region.CHINESE, "zh-cn"
+
+        def factory() -> genshin.Client:
+            if region == genshin.Region.CHINESE:
+                client = AdaptiveClient(region=region, lang=lang)
+            else:
+                client = AdaptiveClient(lang=lang)
+            client.default_game = game
+            client.uid = uid
+            return client
+
+        # 相同 cookie、區域、遊戲、UID 的 Client 從共用池取得，重複使用已建立的連線
+        return client_pool.get(cookie or "", region, game, uid, factory)
 
 
 @generalErrorHandler
@@ -117,7 +151,7 @@ async def set_cookie(user_id: int, cookie: str, games: Sequence[genshin.Game]) -
     """
     LOG.Info(f"設定 {LOG.User(user_id)} 的Cookie：{cookie}")
 
-    client = genshin.Client(lang="vi-vn")
+    client = AdaptiveClient(lang="vi-vn")
     client.set_cookies(cookie)
 
     # 先以國際服 client 取得帳號資訊，若失敗則嘗試使用中國服 client
@@ -182,6 +216,29 @@ async def set_cookie(user_id: int, cookie: str, games: Sequence[genshin.Game]) -
     return result
 
 
+class _CommunityCheckinMarker:
+    """記錄今天已完成 Hoyolab 社群簽到的使用者，同一天內不再重複請求，日期改變時自動清空"""
+
+    _date: date = date.today()
+    _user_ids: set[int] = set()
+
+    @classmethod
+    def is_done(cls, user_id: int) -> bool:
+        cls._rollover()
+        return user_id in cls._user_ids
+
+    @classmethod
+    def mark_done(cls, user_id: int) -> None:
+        cls._rollover()
+        cls._user_ids.add(user_id)
+
+    @classmethod
+    def _rollover(cls) -> None:
+        if (today := date.today()) != cls._date:
+            cls._date = today
+            cls._user_ids = set()
+
+
 async def claim_daily_reward(
     user_id: int,
     *,
@@ -192,6 +249,7 @@ async def claim_daily_reward(
     has_themis: bool = False,
     has_themis_tw: bool = False,
     is_geetest: bool = False,
+    metric_task: str | None = None,
 ) -> str:
     """為使用者在 Hoyolab 簽到
 
@@ -213,25 +271,40 @@ async def claim_daily_reward(
         是否簽到未定事件簿(台服)
     is_geetest: `bool`
         是否要設定 Geetest 驗證，若 True 的話返回設定網頁連結
+    metric_task: `str` | `None`
+        自動排程呼叫時的排程名稱，簽到錯誤會計入該排程的 `SCHEDULE_ERRORS`；使用者指令不計入
 
     Returns
     ------
     `str`
         回覆給使用者的訊息
     """
-    try:
-        client = await get_client(user_id, check_uid=False)
-    except Exception as e:
-        return str(e)
-
-    # Hoyolab 社群簽到
-    try:
-        await client.check_in_community()
-    except genshin.errors.GenshinException as e:
-        if e.retcode != 2001:
+    # 一次查詢取得使用者資料與保存的 geetest 驗證資料，之後各遊戲的 Client 都由此建立
+    stmt = (
+        sqlalchemy.select(User, GeetestChallenge)
+        .outerjoin(GeetestChallenge, GeetestChallenge.discord_id == User.discord_id)
+        .where(User.discord_id == user_id)
+    )
+    async with Database.sessionmaker() as session:
+        row = (await session.execute(stmt)).first()
+    user, _gt_challenge = (row[0], row[1]) if row is not None else (None, None)
+    check, msg = await database.Tool.check_user(user)
+    if check is False or user is None:
+        return msg
+    clients = UserClientFactory(user)
+
+    # Hoyolab 社群簽到 (每天只需要成功一次)
+    if not _CommunityCheckinMarker.is_done(user_id):
+        try:
+            await clients.get().check_in_community()
+            _CommunityCheckinMarker.mark_done(user_id)
+        except genshin.errors.GenshinException as e:
+            if e.retcode == 2001:  # 今天已經簽到過
+                _CommunityCheckinMarker.mark_done(user_id)
+            else:
+                LOG.FuncExceptionLog(user_id, "claimDailyReward: Hoyolab", e)
+        except Exception as e:
             LOG.FuncExceptionLog(user_id, "claimDailyReward: Hoyolab", e)
-    except Exception as e:
-        LOG.FuncExceptionLog(user_id, "claimDailyReward: Hoyolab", e)
 
     # 遊戲簽到
     if (
@@ -242,35 +315,39 @@ async def claim_daily_reward(
 
     # 使用者保存的 geetest 驗證資料
     gt_challenge: GeetestChallenge | None = None
-    if not is_geetest:  # 若要設定新的 geetest 驗證，則不從資料庫取出舊的資料帶入 header
-        gt_challenge = await Database.select_one(
-            GeetestChallenge, GeetestChallenge.discord_id.is_(user_id)
-        )
+    if not is_geetest:  # 若要設定新的 geetest 驗證，則不使用資料庫內舊的資料帶入 header
+        gt_challenge = _gt_challenge
 
     result = ""
     if has_genshin:
         challenge = gt_challenge.genshin if gt_challenge else None
-        client = await get_client(user_id, game=genshin.Game.GENSHIN, check_uid=False)
-        result += await _claim_reward(user_id, client, genshin.Game.GENSHIN, is_geetest, challenge)
+        client = clients.get(genshin.Game.GENSHIN)
+        result += await _claim_reward(
+            user_id, client, genshin.Game.GENSHIN, is_geetest, challenge, metric_task=metric_task
+        )
     if has_honkai3rd:
         challenge = gt_challenge.honkai3rd if gt_challenge else None
-        client = await get_client(user_id, game=genshin.Game.HONKAI, check_uid=False)
-        result += await _claim_reward(user_id, client, genshin.Game.HONKAI, is_geetest, challenge)
+        client = clients.get(genshin.Game.HONKAI)
+        result += await _claim_reward(
+            user_id, client, genshin.Game.HONKAI, is_geetest, challenge, metric_task=metric_task
+        )
     if has_starrail:
         challenge = gt_challenge.starrail if gt_challenge else None
-        client = await get_client(user_id, game=genshin.Game.STARRAIL, check_uid=False)
+        client = clients.get(genshin.Game.STARRAIL)
         result += await _claim_reward(
-            user_id, client, genshin.Game.STARRAIL, is_geetest, challenge
+            user_id, client, genshin.Game.STARRAIL, is_geetest, challenge, metric_task=metric_task
         )
     if has_zzz:
-        client = await get_client(user_id, game=genshin.Game.ZZZ, check_uid=False)
-        result += await _claim_reward(user_id, client, genshin.Game.ZZZ)
+        client = clients.get(genshin.Game.ZZZ)
+        result += await _claim_reward(user_id, client, genshin.Game.ZZZ, metric_task=metric_task)
     if has_themis:
-        client = await get_client(user_id, game=genshin.Game.THEMIS, check_uid=False)
-        result += await _claim_reward(user_id, client, genshin.Game.THEMIS)
+        client = clients.get(genshin.Game.THEMIS)
+        result += await _claim_reward(user_id, client, genshin.Game.THEMIS, metric_task=metric_task)
     if has_themis_tw:
-        client = await get_client(user_id, game=genshin.Game.THEMIS_TW, check_uid=False)
-        result += await _claim_reward(user_id, client, genshin.Game.THEMIS_TW)
+        client = clients.get(genshin.Game.THEMIS_TW)
+        result += await _claim_reward(
+            user_id, client, genshin.Game.THEMIS_TW, metric_task=metric_task
+        )
 
     return result
 
@@ -282,6 +359,8 @@ async def _claim_reward(
     is_geetest: bool = False,
     gt_challenge: Mapping[str, str] | None = None,
     retry: int = 5,
+    *,
+    metric_task: str | None = None,
 ) -> str:
     """遊戲簽到函式"""
     game_name = {
@@ -323,9 +402,14 @@ async def _claim_reward(
             return f"{game_name[game]}The request failed. Please try again later."
 
         LOG.FuncExceptionLog(user_id, "claimDailyReward", e)
+        if metric_task is not None:
+            Metrics.SCHEDULE_ERRORS.labels(metric_task, error_label(e)).inc()
         if retry > 0:
-            await asyncio.sleep(1)
-            return await _claim_reward(user_id, client, game, is_geetest, gt_challenge, retry - 1)
+            # 過載錯誤以指數增加的隨機時間後重試，其他錯誤固定等待 1 秒
+            await asyncio.sleep(retry_backoff(5 - retry) if is_overload_error(e) else 1)
+            return await _claim_reward(
+                user_id, client, game, is_geetest, gt_challenge, retry - 1, metric_task=metric_task
+            )
 
         LOG.Error(f"{LOG.User(user_id)} {game_name[game]}Failed to sign in")
         sentry_sdk.capture_exception(e)
@@ -6,24 +6,29 @@ import genshin
 from database import GenshinSpiralAbyss
 
 from ..errors_decorator import generalErrorHandler
-from .common import get_client
+from .adaptive import AdaptiveClient
+from .common import UserClientFactory, get_client
 
 
 @generalErrorHandler
-async def get_genshin_notes(user_id: int) -> genshin.models.Notes:
+async def get_genshin_notes(
+    user_id: int, *, clients: UserClientFactory | None = None
+) -> genshin.models.Notes:
     """取得使用者的即時便箋
 
     Parameters
     ------
     user_id: `int`
         使用者Discord ID
+    clients: `UserClientFactory` | `None`
+        呼叫者已讀取的使用者資料，同一位使用者查詢多個遊戲時共用
 
     Returns
     ------
     `Notes`
         查詢結果
     """
-    client = await get_client(user_id)
+    client = await get_client(user_id, clients=clients)
     return await client.get_genshin_notes(client.uid)
 
 
@@ -125,6 +130,6 @@ async def get_genshin_notices() -> Sequence[genshin.models.Announcement]:
     `Sequence[Announcement]`
         公告事項查詢結果
     """
-    client = genshin.Client(lang="vi-vn")
+    client = AdaptiveClient(lang="vi-vn")
     notices = await client.get_genshin_announcements()
     return notices
@@ -0,0 +1,143 @@
+import collections
+import enum
+import math
+import time
+from typing import ClassVar
+
+from utility import LOG, config
+from utility.prometheus import Metrics
+
+
+class OutageState(enum.IntEnum):
+    """Hoyolab 異常偵測的狀態，數值會匯出到 Prometheus"""
+
+    NORMAL = 0
+    """正常"""
+    RAMPING = 1
+    """測試成功後逐步恢復自動排程的處理人數"""
+    PROBING = 2
+    """以少量使用者測試 Hoyolab 是否恢復"""
+    OUTAGE = 3
+    """Hoyolab 異常，暫停自動排程"""
+
+
+class HoyolabOutage:
+    """Hoyolab 異常 (未公告的維護、大量錯誤) 的自動偵測
+
+    `config.game_maintenance_time` 需要管理員手動設定，Hoyolab 未公告的異常期間自動排程仍會持續請求。
+    所有經過併發控制器 (`AdaptiveConcurrency`) 的請求結果都會記錄在滑動視窗內：
+
+    - 視窗內的請求數達到 `config.hoyolab_outage_min_requests`，且過載錯誤的比例達到
+      `config.hoyolab_outage_error_ratio` 時判定為異常 (OUTAGE)，自動排程暫停
+    - 每隔 `config.hoyolab_outage_probe_minutes` 分鐘進入測試 (PROBING)，
+      每次排程只處理 `config.hoyolab_outage_canary_size` 位使用者，累積到同樣數量的請求結果後才判斷，
+      不受滑動視窗長度限制
+    - 測試的請求錯誤比例低於門檻則進入恢復期 (RAMPING)，在 `config.hoyolab_outage_ramp_minutes` 分鐘內
+      逐步增加每次排程的處理人數，恢復期結束後回到正常 (NORMAL)；期間錯誤比例再次達到門檻則回到異常
+
+    Methods
+    -----
+    record(ok)
+        記錄一次請求的結果
+    admit(total)
+        取得本次排程可以處理的使用者數量
+    is_paused()
+        自動排程是否應該停止處理使用者
+    """
+
+    _state: ClassVar[OutageState] = OutageState.NORMAL
+    _results: ClassVar[collections.deque[tuple[float, bool]]] = collections.deque()
+    """滑動視窗內的請求結果 (時間, 是否成功)"""
+    _state_since: ClassVar[float] = 0.0
+    """進入目前狀態的時間"""
+    _probe_total: ClassVar[int] = 0
+    """本次測試 (PROBING) 已記錄的請求數"""
+    _probe_errors: ClassVar[int] = 0
+    """本次測試 (PROBING) 已記錄的過載錯誤數"""
+
+    @classmethod
+    def state(cls) -> OutageState:
+        """目前的狀態"""
+        return cls._state
+
+    @classmethod
+    def is_paused(cls) -> bool:
+        """自動排程是否應該停止處理使用者"""
+        return cls._state == OutageState.OUTAGE
+
+    @classmethod
+    def record(cls, ok: bool) -> None:
+        """記錄一次請求的結果，`ok` 為 False 表示過載錯誤 (見 `is_overload_error`)"""
+        if config.hoyolab_outage_error_ratio <= 0 or cls._state == OutageState.OUTAGE:
+            return
+        if cls._state == OutageState.PROBING:
+            # 測試期間只有少量使用者，結果不受滑動視窗限制，累積到 canary 數量的請求後才判斷
+            cls._probe_total += 1
+            cls._probe_errors += int(not ok)
+            if cls._probe_total < max(1, config.hoyolab_outage_canary_size):
+                return
+            total = cls._probe_total
+            error_ratio = cls._probe_errors / total
+            if error_ratio < config.hoyolab_outage_error_ratio:
+                LOG.System("Hoyolab 測試請求恢復正常，開始逐步恢復自動排程")
+                cls._set_state(OutageState.RAMPING)
+                return
+        else:
+            now = time.monotonic()
+            cls._results.append((now, ok))
+            while len(cls._results) > 0 and cls._results[0][0] < now - cls._window_seconds():
+                cls._results.popleft()
+            total = len(cls._results)
+            if total < max(1, config.hoyolab_outage_min_requests):
+                return
+            error_ratio = sum(1 for _, success in cls._results if not success) / total
+        if error_ratio >= config.hoyolab_outage_error_ratio:
+            LOG.Error(
+                f"Hoyolab 最近 {total} 次請求的錯誤比例 {error_ratio:.0%}，判定為異常並暫停自動排程"
+            )
+            cls._set_state(OutageState.OUTAGE)
+
+    @classmethod
+    def admit(cls, total: int) -> int:
+        """取得本次排程可以處理的使用者數量
+
+        Parameters
+        ------
+        total: `int`
+            本次排程到期的使用者數量
+
+        Returns
+        ------
+        `int`:
+            正常時為 total；異常時為 0；測試時為 canary 數量；恢復期依經過的時間比例增加
+        """
+        now = time.monotonic()
+        canary = max(1, config.hoyolab_outage_canary_size)
+        if cls._state == OutageState.OUTAGE:
+            if now - cls._state_since < config.hoyolab_outage_probe_minutes * 60:
+                return 0
+            LOG.System(f"Hoyolab 異常已持續一段時間，以 {canary} 位使用者測試是否恢復")
+            cls._set_state(OutageState.PROBING)
+        if cls._state == OutageState.PROBING:
+            return min(total, canary)
+        if cls._state == OutageState.RAMPING:
+            ramp_seconds = config.hoyolab_outage_ramp_minutes * 60
+            progress = (now - cls._state_since) / ramp_seconds if ramp_seconds > 0 else 1.0
+            if progress < 1.0:
+                return min(total, max(canary, math.ceil(total * progress)))
+            LOG.System("Hoyolab 恢復期結束，自動排程恢復正常")
+            cls._set_state(OutageState.NORMAL)
+        return total
+
+    @staticmethod
+    def _window_seconds() -> float:
+        return max(1.0, config.hoyolab_outage_window_seconds)
+
+    @classmethod
+    def _set_state(cls, state: OutageState) -> None:
+        cls._state = state
+        cls._state_since = time.monotonic()
+        cls._results.clear()
+        cls._probe_total = 0
+        cls._probe_errors = 0
+        Metrics.HOYOLAB_OUTAGE_STATE.set(state)
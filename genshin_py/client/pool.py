@@ -0,0 +1,120 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Final
+
+import aiohttp
+import genshin
+
+from utility import config
+
+KEEPALIVE_TIMEOUT: Final[float] = 30.0
+"""共用連線閒置多久後關閉（單位：秒）"""
+EVICT_INTERVAL: Final[float] = 60.0
+"""檢查並移除閒置 Client 的最短間隔（單位：秒）"""
+
+ClientKey = tuple[str, genshin.Region, genshin.Game, int, str | None]
+"""(cookie 雜湊值, 伺服器區域, 遊戲, UID, proxy)"""
+
+
+class ClientPool:
+    """genshin.Client 的共用池
+
+    - Client 以 (cookie 雜湊值, 伺服器區域, 遊戲, UID, proxy) 為 key 重複使用，超過閒置時間或數量上限時移除
+    - 同一個伺服器區域與 proxy 的 Client 共用同一個 `aiohttp.TCPConnector`，
+      讓指令與自動排程的請求重複使用已建立的 TLS 連線，而不是每次請求都重新連線
+
+    Methods
+    -----
+    get(cookie, region, game, uid, factory)
+        取得 Client，不存在時以 factory 建立
+    close()
+        關閉所有共用連線，在 bot 關閉前呼叫
+    """
+
+    def __init__(self) -> None:
+        self._clients: OrderedDict[ClientKey, tuple[float, genshin.Client]] = OrderedDict()
+        """dict[key, (最後使用時間, client)]，依最後使用時間排序"""
+        self._connectors: dict[tuple[genshin.Region, str | None], aiohttp.TCPConnector] = {}
+        self._last_evict_time: float = 0.0
+
+    def get(
+        self,
+        cookie: str,
+        region: genshin.Region,
+        game: genshin.Game,
+        uid: int,
+        factory: Callable[[], genshin.Client],
+    ) -> genshin.Client:
+        """取得 Client，不存在時以 factory 建立並設定 cookie、共用連線
+
+        Parameters
+        ------
+        cookie: `str`
+            Hoyolab Cookie
+        region: `genshin.Region`
+            伺服器區域
+        game: `genshin.Game`
+            遊戲
+        uid: `int`
+            遊戲 UID
+        factory: `Callable[[], genshin.Client]`
+            建立新 Client 的函式，回傳的 Client 需已設定好 region、default_game、uid
+        """
+        now = time.monotonic()
+        self._evict_idle(now)
+        proxy = config.genshin_py_proxy_server
+        key: ClientKey = (hashlib.sha256(cookie.encode()).hexdigest(), region, game, uid, proxy)
+        if (item := self._clients.get(key)) is not None:
+            client = item[1]
+            self._clients.move_to_end(key)
+        else:
+            client = factory()
+            client.set_cookies(cookie)
+            client.proxy = proxy
+            self._bind_connector(client, self._get_connector(region, proxy))
+        self._clients[key] = (now, client)
+        while len(self._clients) > config.hoyolab_client_pool_size:
+            self._clients.popitem(last=False)
+        return client
+
+    async def close(self) -> None:
+        """關閉所有共用連線"""
+        self._clients.clear()
+        for connector in self._connectors.values():
+            await connector.close()
+        self._connectors.clear()
+
+    def _evict_idle(self, now: float) -> None:
+        """移除超過 `config.hoyolab_client_idle_seconds` 秒沒有使用的 Client"""
+        if now - self._last_evict_time < EVICT_INTERVAL:
+            return
+        self._last_evict_time = now
+        while len(self._clients) > 0:
+            last_used_time, _ = next(iter(self._clients.values()))
+            if now - last_used_time <= config.hoyolab_client_idle_seconds:
+                break
+            self._clients.popitem(last=False)
+
+    def _get_connector(self, region: genshin.Region, proxy: str | None) -> aiohttp.TCPConnector:
+        connector = self._connectors.get((region, proxy))
+        if connector is None or connector.closed:
+            connector = aiohttp.TCPConnector(keepalive_timeout=KEEPALIVE_TIMEOUT)
+            self._connectors[(region, proxy)] = connector
+        return connector
+
+    @staticmethod
+    def _bind_connector(client: genshin.Client, connector: aiohttp.TCPConnector) -> None:
+        """讓 Client 建立的 HTTP session 使用共用的連線"""
+        create_session = client.cookie_manager.create_session
+
+        def _create_session(**kwargs) -> aiohttp.ClientSession:
+            kwargs.setdefault("connector", connector)
+            kwargs.setdefault("connector_owner", False)
+            return create_session(**kwargs)
+
+        client.cookie_manager.create_session = _create_session  # type: ignore
+
+
+client_pool = ClientPool()
+"""所有 genshin.Client 共用的 Client 池"""
@@ -1,12 +1,14 @@
 import genshin
 
 from ..errors_decorator import generalErrorHandler
-from .common import get_client
+from .common import UserClientFactory, get_client
 
 
 @generalErrorHandler
-async def get_starrail_notes(user_id: int) -> genshin.models.StarRailNote:
-    client = await get_client(user_id, game=genshin.Game.STARRAIL)
+async def get_starrail_notes(
+    user_id: int, *, clients: UserClientFactory | None = None
+) -> genshin.models.StarRailNote:
+    client = await get_client(user_id, game=genshin.Game.STARRAIL, clients=clients)
     return await client.get_starrail_notes(client.uid)
 
 
@@ -28,3 +28,20 @@ class GenshinAPIException(Exception):
 
     def __str__(self) -> str:
         return f"{self.message}\n```{repr(self.origin)}```"
+
+
+class RemoteHostError(Exception):
+    """遠端 API 本身無法使用（連線失敗、HTTP 狀態碼錯誤）時的例外，與使用者的 Hoyolab 錯誤區分"""
+
+    def __init__(self, host: str, message: str) -> None:
+        self.host = host
+        super().__init__(f"遠端即時便箋 API {host}：{message}")
+
+
+def error_label(exception: BaseException) -> str:
+    """將例外轉換成統計用的分類名稱：genshin.py 的例外為 "retcode_<錯誤碼>"，其他為例外類別名稱"""
+    if isinstance(exception, GenshinAPIException):
+        exception = exception.origin
+    if isinstance(exception, genshin.errors.GenshinException):
+        return f"retcode_{exception.retcode}"
+    return type(exception).__name__
@@ -9,7 +9,8 @@ import sentry_sdk
 from database import Database, User
 from utility import LOG, config
 
-from .errors import GenshinAPIException, UserDataNotFound
+from .client.adaptive import retry_backoff
+from .errors import GenshinAPIException, RemoteHostError, UserDataNotFound
 
 
 def generalErrorHandler(func: Callable):
@@ -29,7 +30,11 @@ def generalErrorHandler(func: Callable):
                 try:
                     result = await func(*args, **kwargs)
 
-                    # 成功使用指令則更新使用者的最後使用時間
+                    # 成功使用指令則更新使用者的最後使用時間，
+                    # 呼叫者傳入共用的使用者資料 (clients) 時只更新物件，由呼叫者統一寫入資料庫
+                    if (clients := kwargs.get("clients")) is not None:
+                        clients.user.last_used_time = datetime.datetime.now()
+                        return result
                     user = await Database.select_one(User, User.discord_id.is_(user_id))
                     if user is not None:
                         user.last_used_time = datetime.datetime.now()
@@ -41,8 +46,8 @@ def generalErrorHandler(func: Callable):
                     if retry == 0:  # 當重試次數用完時拋出例外
                         raise
                     else:
-                        # 重試之間加入等待時間，並遞增每次的等待時間
-                        await asyncio.sleep(1.0 + RETRY_MAX - retry)
+                        # 每次請求以指數增加的隨機時間後重試，整體的請求速率另由併發控制器依過載程度調整
+                        await asyncio.sleep(retry_backoff(RETRY_MAX - retry))
                         continue
         except genshin.errors.DataNotPublic as e:
             LOG.FuncExceptionLog(user_id, func.__name__, e)
@@ -61,6 +66,10 @@ def generalErrorHandler(func: Callable):
             LOG.FuncExceptionLog(user_id, func.__name__, e)
             sentry_sdk.capture_exception(e)
             raise GenshinAPIException(e, e.original)
+        except RemoteHostError as e:
+            # 遠端 API 的錯誤由 RemoteNotes 統計，暫停使用該 API 時才回報 Sentry
+            LOG.FuncExceptionLog(user_id, func.__name__, e)
+            raise
         except UserDataNotFound as e:
             LOG.FuncExceptionLog(user_id, func.__name__, e)
             raise Exception(str(e))
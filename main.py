@@ -9,6 +9,8 @@ import sentry_sdk
 from discord.ext import commands
 
 import database
+import genshin_py
+import genshin_py.auto_task
 from utility import LOG, config, sentry_logging
 
 intents = discord.Intents.default()
@@ -69,6 +71,9 @@ class GenshinDiscordBot(commands.AutoShardedBot):
         # 關閉資料庫
         await database.Database.close()
         LOG.System("on_close: Database closed")
+        # 關閉 genshin.Client 共用的連線
+        await genshin_py.client_pool.close()
+        await genshin_py.auto_task.RemoteNotes.close()
         await super().close()
         LOG.System("on_close: Bot shutdown complete")
 
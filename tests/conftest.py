@@ -0,0 +1,37 @@
+import asyncio
+from typing import Any, Callable, Coroutine
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import Base, Database
+from genshin_py.auto_task.realtime_notes.schedule_queue import NotesScheduleQueue
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch) -> Callable[[Coroutine[Any, Any, Any]], Any]:
+    """將 `Database` 換成暫存目錄內的空白資料庫，並以新的 event loop 執行測試的協程
+
+    模組載入時建立的 engine 已綁定 `data/bot/bot.db` 的絕對路徑，必須替換 engine 才不會寫入專案內的資料庫
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bot.db'}")
+    monkeypatch.setattr(Database, "engine", engine)
+    monkeypatch.setattr(Database, "sessionmaker", async_sessionmaker(engine, expire_on_commit=False))
+    monkeypatch.setattr(NotesScheduleQueue, "_entries", {})
+    monkeypatch.setattr(
+        NotesScheduleQueue, "_heaps", {name: [] for name in NotesScheduleQueue._heaps}
+    )
+
+    def _run(coro: Coroutine[Any, Any, Any]) -> Any:
+        async def main() -> Any:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await coro
+            finally:
+                # 連線池的連線屬於這次的 event loop，結束前關閉
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return _run
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy
+
+from database import DailyCheckinSlot, Database, ScheduleDailyCheckin, User
+from genshin_py.auto_task.checkin_slot import CheckinSlotAllocator
+from utility import config
+
+DEADLINE = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+DEADLINE -= timedelta(minutes=DEADLINE.minute % 10)
+
+
+@pytest.fixture(autouse=True)
+def levelling(monkeypatch):
+    """期限前 30 分鐘內每 10 分鐘一個時段，共 4 個時段"""
+    monkeypatch.setattr(config, "schedule_daily_checkin_levelling_minutes", 30)
+    monkeypatch.setattr(config, "schedule_daily_checkin_interval", 10)
+    monkeypatch.setattr(config, "schedule_daily_checkin_slot_capacity", 2)
+
+
+def _user(discord_id: int) -> ScheduleDailyCheckin:
+    return ScheduleDailyCheckin(
+        discord_id,
+        discord_channel_id=1,
+        is_mention=False,
+        next_checkin_time=DEADLINE,
+    )
+
+
+async def _occupancy() -> dict[datetime, int]:
+    rows = await Database.select_all(DailyCheckinSlot)
+    return {row.slot_time: row.occupancy for row in rows}
+
+
+def test_allocate_spreads_users_within_capacity(run):
+    users = [_user(i) for i in range(10)]
+
+    async def main():
+        async with Database.sessionmaker() as session:
+            await CheckinSlotAllocator.allocate(session, users, datetime.now())
+            await session.commit()
+        slots = [DEADLINE - timedelta(minutes=m) for m in (0, 10, 20, 30)]
+        assert await _occupancy() == {slot: 2 for slot in slots}
+        # 人數相同時優先選擇接近期限的時段，全部額滿後在原本設定的時間簽到
+        assert [u.checkin_slot_time for u in users[:2]] == [DEADLINE, DEADLINE - timedelta(minutes=10)]
+        assert [u.checkin_slot_time for u in users[8:]] == [None, None]
+
+    run(main())
+
+
+def test_concurrent_allocations_add_up(monkeypatch, run):
+    monkeypatch.setattr(config, "schedule_daily_checkin_slot_capacity", 10)
+
+    async def allocate(discord_id: int) -> None:
+        async with Database.sessionmaker() as session:
+            await CheckinSlotAllocator.allocate(session, [_user(discord_id)], datetime.now())
+            await asyncio.sleep(0.01)  # 讓兩個交易讀到相同的人數後才寫入
+            await session.commit()
+
+    async def main():
+        await asyncio.gather(allocate(1), allocate(2))
+        assert await _occupancy() == {DEADLINE: 2}
+
+    run(main())
+
+
+def test_reallocate_releases_previous_slot(run):
+    async def main():
+        user = _user(1)
+        for _ in range(2):
+            async with Database.sessionmaker() as session:
+                await CheckinSlotAllocator.allocate(session, [user], datetime.now())
+                await session.commit()
+        assert await _occupancy() == {DEADLINE: 1}
+
+    run(main())
+
+
+def test_release_does_not_go_below_zero(run):
+    async def main():
+        user = _user(1)
+        async with Database.sessionmaker() as session:
+            await CheckinSlotAllocator.allocate(session, [user], datetime.now())
+            await CheckinSlotAllocator.release(session, [user, user], datetime.now())
+            await session.commit()
+        assert await _occupancy() == {DEADLINE: 0}
+
+    run(main())
+
+
+def test_remove_releases_slots(run):
+    async def main():
+        users = [_user(1), _user(2)]
+        async with Database.sessionmaker() as session:
+            await CheckinSlotAllocator.allocate(session, users, datetime.now())
+            await session.commit()
+        for user in users:
+            await Database.insert_or_replace(User(user.discord_id))
+            await Database.insert_or_replace(user)
+
+        await CheckinSlotAllocator.remove(ScheduleDailyCheckin.discord_id == 1)
+        assert await _occupancy() == {DEADLINE: 0, DEADLINE - timedelta(minutes=10): 1}
+        remaining = await Database.select_all(ScheduleDailyCheckin)
+        assert [u.discord_id for u in remaining] == [2]
+
+        # 刪除剩下的使用者，釋放其分配到的時段
+        await CheckinSlotAllocator.remove(sqlalchemy.true())
+        assert await _occupancy() == {DEADLINE: 0, DEADLINE - timedelta(minutes=10): 0}
+
+    run(main())
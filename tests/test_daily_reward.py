@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import (
+    DailyRewardJournal,
+    Database,
+    NotificationOutbox,
+    ScheduleDailyCheckin,
+    User,
+)
+from genshin_py.auto_task.daily_reward import DailyReward, _Completion
+from genshin_py.auto_task.outbox import Outbox
+from utility import config
+
+
+@pytest.fixture(autouse=True)
+def reset_daily_reward(monkeypatch):
+    monkeypatch.setattr(DailyReward, "_pending_completions", [])
+    monkeypatch.setattr(DailyReward, "_breakers", {})
+    monkeypatch.setattr(DailyReward, "_run_id", "test")
+    monkeypatch.setattr(config, "schedule_daily_checkin_levelling_minutes", 0)
+    monkeypatch.setattr(config, "schedule_loop_delay", 0)
+
+
+async def _add_users(*discord_ids: int) -> list[ScheduleDailyCheckin]:
+    users: list[ScheduleDailyCheckin] = []
+    for discord_id in discord_ids:
+        user = ScheduleDailyCheckin(
+            discord_id,
+            discord_channel_id=1,
+            is_mention=True,
+            next_checkin_time=datetime.now() - timedelta(minutes=1),
+        )
+        await Database.insert_or_replace(User(discord_id))
+        await Database.insert_or_replace(user)
+        await Database.insert_or_replace(DailyRewardJournal(discord_id, run_id="test"))
+        users.append(user)
+    return users
+
+
+async def _assert_done(users: list[ScheduleDailyCheckin]) -> None:
+    journal = await Database.select_all(DailyRewardJournal)
+    assert {j.discord_id: j.state for j in journal} == {u.discord_id: "done" for u in users}
+    for user in await Database.select_all(ScheduleDailyCheckin):
+        assert user.next_checkin_time > datetime.now()
+
+
+def test_flush_completions(run):
+    async def main():
+        users = await _add_users(1, 2)
+        for user in users:
+            user.update_next_checkin_time()
+        DailyReward._pending_completions = [
+            _Completion(users[0], "LOCAL", "簽到成功"),
+            _Completion(users[1], "LOCAL", None),
+        ]
+        await DailyReward._flush_completions()
+
+        assert DailyReward._pending_completions == []
+        await _assert_done(users)
+        journal = {j.discord_id: j for j in await Database.select_all(DailyRewardJournal)}
+        assert (journal[1].host, journal[1].is_counted) == ("LOCAL", True)
+        assert journal[2].is_counted is False
+        # 沒有訊息的使用者不發送通知
+        outbox = await Database.select_all(NotificationOutbox)
+        assert [row.discord_id for row in outbox] == [1]
+
+    run(main())
+
+
+def test_join_waits_for_flush(monkeypatch, run):
+    """佇列清空時簽到任務可能正在寫入資料庫，`queue.join()` 返回後關閉任務不能遺失該批次"""
+    monkeypatch.setattr(config, "schedule_daily_checkin_commit_batch", 2)
+
+    async def claim(host: str, user: ScheduleDailyCheckin) -> str:
+        return "簽到成功"
+
+    put = Outbox.put
+
+    async def slow_put(session, rows):
+        await asyncio.sleep(0.05)
+        await put(session, rows)
+
+    monkeypatch.setattr(DailyReward, "_claim_daily_reward", claim)
+    monkeypatch.setattr(Outbox, "put", slow_put)
+
+    async def main():
+        users = await _add_users(1, 2)
+        queue: asyncio.Queue[ScheduleDailyCheckin] = asyncio.Queue()
+        for user in users:
+            queue.put_nowait(user)
+        task = asyncio.create_task(DailyReward._claim_daily_reward_task(queue, "LOCAL"))
+        await queue.join()
+        task.cancel()
+        await DailyReward._flush_completions()
+
+        await _assert_done(users)
+        assert len(await Database.select_all(NotificationOutbox)) == 2
+
+    run(main())
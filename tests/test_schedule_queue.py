@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from database import Database, GenshinScheduleNotes, StarrailScheduleNotes, User
+from genshin_py.auto_task.realtime_notes.schedule_queue import NotesScheduleQueue
+
+GENSHIN = GenshinScheduleNotes.__tablename__
+STARRAIL = StarrailScheduleNotes.__tablename__
+
+
+async def _add_users(*discord_ids: int, next_check_time: datetime) -> None:
+    for discord_id in discord_ids:
+        await Database.insert_or_replace(User(discord_id))
+        await Database.insert_or_replace(
+            GenshinScheduleNotes(
+                discord_id, discord_channel_id=1, next_check_time=next_check_time
+            )
+        )
+        await Database.insert_or_replace(
+            StarrailScheduleNotes(
+                discord_id, discord_channel_id=1, next_check_time=next_check_time
+            )
+        )
+
+
+def test_orm_events_push_and_remove(run):
+    due = datetime.now() - timedelta(minutes=1)
+
+    async def main():
+        await _add_users(1, 2, next_check_time=due)
+        assert NotesScheduleQueue._entries[(GENSHIN, 1)] == due
+
+        user = await Database.select_one(GenshinScheduleNotes, GenshinScheduleNotes.discord_id == 1)
+        assert user is not None
+        await Database.delete_instance(user)
+        assert (GENSHIN, 1) not in NotesScheduleQueue._entries
+        assert [d for d, _ in NotesScheduleQueue.pop_due(GenshinScheduleNotes)] == [2]
+
+    run(main())
+
+
+def test_delete_where_removes_entries(run):
+    due = datetime.now() - timedelta(minutes=1)
+
+    async def main():
+        await _add_users(1, 2, 3, next_check_time=due)
+        deleted = await Database.delete_where(
+            GenshinScheduleNotes, GenshinScheduleNotes.discord_id.in_([1, 2])
+        )
+        assert deleted == 2
+        assert (GENSHIN, 1) not in NotesScheduleQueue._entries
+        assert (GENSHIN, 2) not in NotesScheduleQueue._entries
+        assert (STARRAIL, 1) in NotesScheduleQueue._entries
+        assert [d for d, _ in NotesScheduleQueue.pop_due(GenshinScheduleNotes)] == [3]
+
+    run(main())
+
+
+def test_delete_where_in_transaction_removes_entries(run):
+    due = datetime.now() - timedelta(minutes=1)
+
+    async def main():
+        await _add_users(1, next_check_time=due)
+        async with Database.transaction() as session:
+            await Database.delete_where(
+                GenshinScheduleNotes, GenshinScheduleNotes.discord_id == 1, session=session
+            )
+        assert (GENSHIN, 1) not in NotesScheduleQueue._entries
+
+    run(main())
+
+
+def test_delete_users_removes_entries_of_every_game(run):
+    due = datetime.now() - timedelta(minutes=1)
+
+    async def main():
+        await _add_users(1, 2, next_check_time=due)
+        counts = await Database.delete_users([1])
+        assert counts[GENSHIN] == 1
+        assert counts[STARRAIL] == 1
+        assert set(NotesScheduleQueue._entries) == {(GENSHIN, 2), (STARRAIL, 2)}
+        assert NotesScheduleQueue.pop_due(StarrailScheduleNotes) == [(2, due)]
+
+    run(main())
@@ -1,5 +1,7 @@
+from .cache import AsyncTTLCache
 from .config import config
 from .custom_log import LOG, ContextCommandLogger, SlashCommandLogger
 from .discord_ui_template import *
 from .emoji import emoji
+from .rate_limiter import TokenBucket
 from .utils import *
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from .prometheus import Metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class AsyncTTLCache(Generic[K, V]):
+    """非同步的 LRU + TTL 快取
+
+    - 同一個 key 同時有多個請求時，只會呼叫一次 loader，其他請求等待同一個結果
+    - loader 拋出 `negative_exceptions` 內的例外時，會將例外快取 `negative_ttl` 秒，期間內直接拋出
+    - 命中與未命中次數記錄在 Prometheus，以 `name` 區分各個快取
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float | Callable[[], float],
+        negative_ttl: float | Callable[[], float] = 0.0,
+        negative_exceptions: tuple[type[BaseException], ...] = (),
+    ) -> None:
+        """
+        Parameters
+        ------
+        name: `str`
+            快取名稱，用於 Prometheus 的 label
+        maxsize: `int`
+            快取的最大數量，超過時移除最久未使用的項目
+        ttl: `float` | `Callable[[], float]`
+            成功結果的存活時間（單位：秒）
+        negative_ttl: `float` | `Callable[[], float]`
+            失敗結果 (例外) 的存活時間（單位：秒）
+        negative_exceptions: `tuple[type[BaseException], ...]`
+            要被快取的例外類型
+        """
+        self.maxsize = maxsize
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self.negative_exceptions = negative_exceptions
+        self._data: OrderedDict[K, tuple[float, V | BaseException]] = OrderedDict()
+        self._inflight: dict[K, asyncio.Future[V]] = {}
+        self._hits = Metrics.CACHE_REQUESTS.labels(name, "hit")
+        self._misses = Metrics.CACHE_REQUESTS.labels(name, "miss")
+
+    def get(self, key: K) -> V | None:
+        """從快取取得尚未過期的結果，若不存在或快取的是例外則回傳 `None`"""
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic() or isinstance(item[1], BaseException):
+            return None
+        return item[1]
+
+    def set(self, key: K, value: V | BaseException) -> None:
+        """將結果或例外放入快取"""
+        is_negative = isinstance(value, BaseException)
+        _ttl = self._negative_ttl if is_negative else self._ttl
+        ttl = _ttl() if callable(_ttl) else _ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """移除快取中的項目"""
+        self._data.pop(key, None)
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        """從快取取得結果，若不存在則呼叫 loader 取得並放入快取"""
+        item = self._data.get(key)
+        if item is not None:
+            if item[0] >= time.monotonic():
+                self._hits.inc()
+                self._data.move_to_end(key)
+                if isinstance(item[1], BaseException):
+                    raise item[1]
+                return item[1]
+            del self._data[key]
+
+        if (future := self._inflight.get(key)) is not None:
+            self._hits.inc()
+            return await asyncio.shield(future)
+
+        self._misses.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if isinstance(e, self.negative_exceptions):
+                self.set(key, e)
+            future.set_exception(e)
+            future.exception()  # 避免沒有其他等待者時出現 "exception was never retrieved"
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
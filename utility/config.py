@@ -17,6 +17,10 @@ class Config(BaseSettings):
 
     daily_reward_api_list: list[str] = []
     """遠端簽到 API URL list"""
+    daily_reward_api_batch_size: int = 1
+    """每次向遠端簽到 API 請求簽到的人數，大於 1 時使用批次簽到端點 `/daily-reward/batch`"""
+    realtime_notes_api_list: list[str] = []
+    """遠端即時便箋 API URL list，自動檢查即時便箋時將部分請求交給遠端 API"""
 
     schedule_daily_checkin_interval: int = 10
     """自動簽到的間隔 (單位：分鐘)"""
@@ -24,8 +28,81 @@ class Config(BaseSettings):
     """自動檢查即時便箋的間隔 (單位：分鐘)"""
     schedule_loop_delay: float = 2.0
     """排程執行時每位使用者之間的等待間隔（單位：秒）"""
+    hoyolab_min_concurrency: int = 1
+    """向 Hoyolab 請求時，自動調整的同時請求數量下限"""
+    hoyolab_max_concurrency: int = 32
+    """向 Hoyolab 請求時，自動調整的同時請求數量上限 (使用者指令與自動排程合計)"""
+    hoyolab_interactive_concurrency: int = 4
+    """向 Hoyolab 請求時，保留給使用者指令的同時請求數量，其餘名額給自動排程"""
+    hoyolab_initial_concurrency: int = 8
+    """自動排程向 Hoyolab 請求時，啟動後一開始的同時請求數量，之後依請求結果自動調整"""
+    hoyolab_outage_error_ratio: float = 0.5
+    """Hoyolab 最近請求的過載錯誤比例達到此值時判定為異常並暫停自動排程，設為 0 表示不偵測"""
+    hoyolab_outage_window_seconds: float = 120
+    """偵測 Hoyolab 異常的滑動視窗長度（單位：秒）"""
+    hoyolab_outage_min_requests: int = 20
+    """滑動視窗內至少要有多少次請求才判斷是否異常"""
+    hoyolab_outage_probe_minutes: float = 5
+    """Hoyolab 異常時，每隔多久以少量使用者測試是否恢復（單位：分鐘）"""
+    hoyolab_outage_canary_size: int = 5
+    """Hoyolab 異常時，每次測試處理的使用者數量"""
+    hoyolab_outage_ramp_minutes: float = 10
+    """Hoyolab 恢復後，逐步恢復自動排程處理人數的時間長度（單位：分鐘）"""
+    hoyolab_client_pool_size: int = 1000
+    """共用 genshin.Client 的最大數量"""
+    hoyolab_client_idle_seconds: float = 600
+    """共用的 genshin.Client 閒置多久後移除（單位：秒）"""
+    schedule_daily_checkin_page_size: int = 500
+    """自動簽到時每次從資料庫讀取到期使用者的數量"""
+    schedule_daily_checkin_commit_batch: int = 50
+    """自動簽到時每累積多少位使用者，才將下次簽到時間批次寫入資料庫"""
+    schedule_daily_checkin_levelling_minutes: int = 0
+    """分散自動簽到時間的範圍（單位：分鐘），在使用者設定的簽到時間前這段時間內挑選人數較少的時段簽到，0 表示不分散"""
+    schedule_daily_checkin_slot_capacity: int = 300
+    """分散自動簽到時間時，每個時段最多分配的人數，時段長度為 schedule_daily_checkin_interval"""
+    schedule_message_coalesce_seconds: float = 3.0
+    """自動排程發送通知的間隔，期間內同一頻道的通知合併發送（單位：秒）"""
+    schedule_outbox_concurrency: int = 4
+    """自動排程發送通知時，同時發送的頻道數量"""
+    schedule_outbox_rate_limit: float = 10.0
+    """自動排程發送通知時，所有頻道共用的每秒訊息數上限，小於等於 0 表示不限速"""
+    schedule_discord_cache_ttl: float = 1800
+    """自動排程查詢 Discord 頻道、使用者結果的快取時間（單位：秒）"""
+    schedule_discord_negative_cache_ttl: float = 600
+    """自動排程查詢 Discord 頻道、使用者不存在或無權限時的快取時間（單位：秒）"""
+    schedule_notes_workers: int = 4
+    """自動檢查即時便箋時，每個遊戲同時檢查的使用者數量"""
+    schedule_notes_remote_workers: int = 2
+    """自動檢查即時便箋時，每個遊戲在每個遠端 API 同時檢查的使用者數量"""
+    schedule_notes_rate_limit: float = 1.5
+    """自動檢查即時便箋時，所有遊戲共用的每秒請求數上限，小於等於 0 表示不限速"""
+    schedule_notes_unified: bool = False
+    """自動檢查即時便箋時依使用者合併檢查所有遊戲，共用使用者資料並將各遊戲的提醒合併成一則通知"""
     game_maintenance_time: tuple[datetime, datetime] | None = None
     """遊戲的維護時間(起始, 結束)，在此期間內自動排程不會執行"""
+    schedule_maintenance_ramp_minutes: float = 30
+    """遊戲維護結束後，將逾期的自動排程分散執行的釋放期長度（單位：分鐘），設為 0 表示維護結束後立即全部執行"""
+    schedule_maintenance_jitter: float = 0.3
+    """釋放期內每位使用者執行時間的隨機抖動比例 (0~1)，0 表示完全依逾期程度排序"""
+
+    database_sqlite_profile: str = "wal"
+    """SQLite 設定檔：`wal` (WAL 日誌，讀取不會被寫入阻擋) 或 `default` (SQLite 預設的 rollback journal)"""
+    database_busy_timeout: float = 5.0
+    """資料庫被其他連線鎖定時，等待解鎖的最長時間（單位：秒）"""
+    database_mmap_size_mb: int = 256
+    """`wal` 設定檔以記憶體映射讀取資料庫的大小上限（單位：MB），0 表示不使用"""
+    database_cache_size_mb: int = 64
+    """`wal` 設定檔每個連線的頁面快取大小（單位：MB）"""
+    database_pool_size: int = 10
+    """資料庫連線池保持的連線數量"""
+    database_max_overflow: int = 10
+    """資料庫連線池在連線數量不足時，最多額外建立的連線數量"""
+    database_backup_pages_per_step: int = 1024
+    """每日備份資料庫時每個步驟複製的頁數，步驟之間會釋放資料庫的鎖，-1 表示一次複製全部"""
+    database_backup_compress: bool = False
+    """每日備份資料庫時是否以 gzip 壓縮備份檔案"""
+    database_backup_retention: int = 7
+    """保留最近幾份每日備份，較舊的備份會被刪除，0 表示全部保留"""
 
     expired_user_days: int = 180
     """過期使用者天數，會刪除超過此天數未使用任何指令的使用者"""
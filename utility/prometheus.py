@@ -1,6 +1,6 @@
 from typing import Final
 
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 
 class Metrics:
@@ -49,3 +49,124 @@ class Metrics:
         PREFIX + "process_start_time_seconds", "機器人程序啟動時當下的時間"
     )
     """機器人程序啟動時當下的時間 (UNIX Timestamp)"""
+
+    SCHEDULE_NOTIFICATIONS_SENT: Final[Counter] = Counter(
+        PREFIX + "schedule_notifications_sent", "自動排程已發送的通知數量"
+    )
+    """自動排程已發送的通知數量"""
+
+    SCHEDULE_MESSAGES_SENT: Final[Counter] = Counter(
+        PREFIX + "schedule_messages_sent", "自動排程合併通知後實際發送的 Discord 訊息數量"
+    )
+    """自動排程合併通知後實際發送的 Discord 訊息數量，與通知數量的差即為節省的 API 呼叫次數"""
+
+    HOYOLAB_CONCURRENCY_WINDOW: Final[Gauge] = Gauge(
+        PREFIX + "hoyolab_concurrency_window", "向 Hoyolab 請求時目前允許的同時請求數量", ["controller"]
+    )
+    """向 Hoyolab 請求時，AIMD 控制器目前允許的同時請求數量"""
+
+    HOYOLAB_IN_FLIGHT: Final[Gauge] = Gauge(
+        PREFIX + "hoyolab_in_flight_requests", "目前正在向 Hoyolab 進行的請求數量", ["controller"]
+    )
+    """目前正在向 Hoyolab 進行的請求數量"""
+
+    HOYOLAB_OVERLOADS: Final[Counter] = Counter(
+        PREFIX + "hoyolab_overload_events", "向 Hoyolab 請求時因過載而減少請求數量的次數", ["controller"]
+    )
+    """向 Hoyolab 請求時因過載 (retcode 50000、InternalDatabaseError、HTTP 錯誤) 而減少請求數量的次數"""
+
+    HOYOLAB_OUTAGE_STATE: Final[Gauge] = Gauge(
+        PREFIX + "hoyolab_outage_state", "Hoyolab 異常偵測的狀態"
+    )
+    """Hoyolab 異常偵測的狀態：0 正常、1 恢復期、2 測試中、3 異常 (自動排程暫停)"""
+
+    SCHEDULE_BACKLOG_PROGRESS: Final[Gauge] = Gauge(
+        PREFIX + "schedule_backlog_drain_progress", "遊戲維護結束後積壓釋放期的進度 (0~1)"
+    )
+    """遊戲維護結束後積壓釋放期已經過的比例，不在釋放期內時為 1"""
+
+    SCHEDULE_BACKLOG_PENDING: Final[Gauge] = Gauge(
+        PREFIX + "schedule_backlog_pending", "積壓釋放期內尚未到執行時間的使用者數量", ["task"]
+    )
+    """積壓釋放期內，最近一次排程因尚未到釋放時間而延後的使用者數量"""
+
+    SCHEDULE_BACKLOG_RELEASED: Final[Counter] = Counter(
+        PREFIX + "schedule_backlog_released", "積壓釋放期內已執行的使用者數量", ["task"]
+    )
+    """積壓釋放期內已執行的使用者數量"""
+
+    SCHEDULE_RUN_DURATION: Final[Histogram] = Histogram(
+        PREFIX + "schedule_run_duration_seconds",
+        "自動排程每次執行所花費的時間",
+        ["task"],
+        buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, float("inf")),
+    )
+    """自動排程每次執行所花費的時間（單位：秒）"""
+
+    SCHEDULE_QUEUE_DEPTH: Final[Gauge] = Gauge(
+        PREFIX + "schedule_queue_depth", "自動排程佇列內等待處理的使用者數量", ["task"]
+    )
+    """自動排程佇列內等待處理的使用者數量"""
+
+    SCHEDULE_DAILY_CHECKIN_USERS: Final[Counter] = Counter(
+        PREFIX + "schedule_daily_checkin_users", "自動簽到各主機完成簽到的使用者數量", ["host"]
+    )
+    """自動簽到各主機 (LOCAL 或遠端簽到 API) 完成簽到的使用者數量，以 rate() 計算各主機的處理速度"""
+
+    SCHEDULE_HOST_CIRCUIT_STATE: Final[Gauge] = Gauge(
+        PREFIX + "schedule_host_circuit_state", "自動簽到各主機的斷路器狀態", ["host"]
+    )
+    """自動簽到各主機的斷路器狀態：0 正常、1 半開測試中、2 斷路中"""
+
+    SCHEDULE_CHECKIN_SLOT_OCCUPANCY: Final[Gauge] = Gauge(
+        PREFIX + "schedule_checkin_slot_occupancy", "未來 24 小時各自動簽到時段的分配人數", ["slot"]
+    )
+    """分散自動簽到時間時，未來 24 小時各時段 (HH:MM) 分配到的人數"""
+
+    SCHEDULE_OUTBOX_PENDING: Final[Gauge] = Gauge(
+        PREFIX + "schedule_outbox_pending", "自動排程寄件匣內尚未發送的通知數量"
+    )
+    """自動排程寄件匣內尚未發送 (包含等待重試) 的通知數量"""
+
+    CACHE_REQUESTS: Final[Counter] = Counter(
+        PREFIX + "cache_requests", "快取的命中與未命中次數", ["cache", "result"]
+    )
+    """快取 (例：自動排程查詢的 Discord 頻道、使用者) 的命中 (hit) 與未命中 (miss) 次數"""
+
+    SCHEDULE_NOTES_CHECK_LATENCY: Final[Histogram] = Histogram(
+        PREFIX + "schedule_notes_check_seconds",
+        "自動檢查即時便箋每位使用者所花費的時間",
+        ["game"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf")),
+    )
+    """自動檢查即時便箋每位使用者所花費的時間（單位：秒）"""
+
+    SCHEDULE_ERRORS: Final[Counter] = Counter(
+        PREFIX + "schedule_errors", "自動排程發生錯誤的次數", ["task", "error"]
+    )
+    """自動排程發生錯誤的次數，error 為 Hoyolab 錯誤碼 (retcode_xxx) 或例外類別名稱"""
+
+    SCHEDULE_LAG: Final[Histogram] = Histogram(
+        PREFIX + "schedule_lag_seconds",
+        "使用者排定的時間到實際開始處理的延遲",
+        ["task"],
+        buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, float("inf")),
+    )
+    """使用者排定的時間 (next_checkin_time、next_check_time) 到實際開始處理的延遲（單位：秒）"""
+
+    DATABASE_BACKUP_DURATION: Final[Histogram] = Histogram(
+        PREFIX + "database_backup_duration_seconds",
+        "每日備份資料庫所花費的時間",
+        buckets=(0.5, 1, 5, 15, 30, 60, 120, 300, 600, float("inf")),
+    )
+    """每日備份資料庫 (包含壓縮) 所花費的時間（單位：秒）"""
+
+    DATABASE_BACKUP_SIZE: Final[Gauge] = Gauge(
+        PREFIX + "database_backup_size_bytes", "最近一次資料庫備份檔案的大小"
+    )
+    """最近一次資料庫備份檔案的大小（單位：bytes）"""
+
+    DATABASE_BACKUP_LAST_SUCCESS: Final[Gauge] = Gauge(
+        PREFIX + "database_backup_last_success_time_seconds", "最近一次資料庫備份成功的時間"
+    )
+    """最近一次資料庫備份成功的時間 (UNIX Timestamp)"""
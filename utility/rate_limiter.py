@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """非同步的 Token Bucket 限速器，可被多個協程共用
+
+    速率以函式傳入時，每次取得 token 都會重新讀取，因此可在執行期間動態調整 (例如從 config 讀取)
+    """
+
+    def __init__(self, rate: float | Callable[[], float], capacity: float = 1.0) -> None:
+        """
+        Parameters
+        ------
+        rate: `float` | `Callable[[], float]`
+            每秒產生的 token 數量，小於等於 0 表示不限速
+        capacity: `float`
+            bucket 最多能累積的 token 數量 (允許的瞬間突發請求數)
+        """
+        self._rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_time = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        """目前每秒產生的 token 數量"""
+        return self._rate() if callable(self._rate) else self._rate
+
+    def _refill(self, rate: float) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_time) * rate)
+        self._last_time = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """取得 token，若 bucket 內的 token 不足則等待直到足夠為止"""
+        async with self._lock:
+            while True:
+                rate = self.rate
+                if rate <= 0:
+                    return
+                self._refill(rate)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / rate)